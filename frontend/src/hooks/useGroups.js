@@ -11,7 +11,7 @@ export const useGroups = () => {
     try {
       setLoading(true);
       setError(null);
-      const response = await groupAPI.getGroups();
+      const response = await groupAPI.getGroupSummaries();
       
       if (response.success) {
         setGroups(response.groups || []);
@@ -39,7 +39,7 @@ const BusinessAlert = () => {
       const response = await alertAPI.sendBusinessAlert(alertData);
       
       if (response.success) {
-        toast.success(`Alert sent successfully! ${response.message || ''}`);
+        toast.success(response.message || 'Alert queued');
         reset();
       } else {
         throw new Error(response.error || 'Failed to send alert');
@@ -1,9 +1,75 @@
-import React from 'react';
+import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { ArrowLeftIcon, UserGroupIcon, PlusIcon } from '@heroicons/react/24/outline';
+import toast from 'react-hot-toast';
 import { useGroups } from '../hooks/useGroups';
+import { groupAPI } from '../services/api';
 import LoadingSpinner from '../components/LoadingSpinner';
 
+// Loads a group's contacts a page at a time, only when asked to
+const GroupContacts = ({ groupName, contactCount }) => {
+  const [contacts, setContacts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loaded, setLoaded] = useState(false);
+  const [loading, setLoading] = useState(false);
+
+  const loadPage = async (cursor = null) => {
+    try {
+      setLoading(true);
+      const response = await groupAPI.getGroupContacts(groupName, cursor);
+      if (!response.success) {
+        throw new Error(response.error || 'Failed to load contacts');
+      }
+      setContacts((previous) => (cursor ? [...previous, ...response.contacts] : response.contacts));
+      setNextCursor(response.next_cursor);
+      setLoaded(true);
+    } catch (err) {
+      toast.error(err.response?.data?.error || err.message || 'Failed to load contacts');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  if (!contactCount) {
+    return null;
+  }
+
+  if (!loaded) {
+    return (
+      <button onClick={() => loadPage()} className="btn-secondary text-sm" disabled={loading}>
+        {loading ? 'Loading...' : 'Show Contacts'}
+      </button>
+    );
+  }
+
+  return (
+    <div className="space-y-2">
+      <h4 className="font-medium text-gray-700 mb-2">Contacts:</h4>
+      <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
+        {contacts.map((contact) => (
+          <div
+            key={contact.phone}
+            className="flex items-center justify-between p-3 bg-gray-50 rounded-lg"
+          >
+            <div>
+              <p className="font-medium text-gray-900">{contact.name}</p>
+              <p className="text-sm text-gray-600">{contact.phone}</p>
+            </div>
+            <button className="text-error-600 hover:text-error-700 text-sm">
+              Remove
+            </button>
+          </div>
+        ))}
+      </div>
+      {nextCursor && (
+        <button onClick={() => loadPage(nextCursor)} className="btn-secondary text-sm" disabled={loading}>
+          {loading ? 'Loading...' : 'Load More'}
+        </button>
+      )}
+    </div>
+  );
+};
+
 const Contacts = () => {
   const navigate = useNavigate();
   const { groups, loading, error, refetch } = useGroups();
@@ -90,7 +156,7 @@ const Contacts = () => {
                           {group.name}
                         </h3>
                         <p className="text-gray-600">
-                          {group.contacts?.length || 0} contacts
+                          {group.contact_count || 0} contacts
                         </p>
                       </div>
                       <div className="flex space-x-2">
@@ -104,27 +170,7 @@ const Contacts = () => {
                     </div>
 
                     {/* Contacts List */}
-                    {group.contacts && group.contacts.length > 0 && (
-                      <div className="space-y-2">
-                        <h4 className="font-medium text-gray-700 mb-2">Contacts:</h4>
-                        <div className="grid grid-cols-1 md:grid-cols-2 gap-2">
-                          {group.contacts.map((contact, contactIndex) => (
-                            <div
-                              key={contactIndex}
-                              className="flex items-center justify-between p-3 bg-gray-50 rounded-lg"
-                            >
-                              <div>
-                                <p className="font-medium text-gray-900">{contact.name}</p>
-                                <p className="text-sm text-gray-600">{contact.phone}</p>
-                              </div>
-                              <button className="text-error-600 hover:text-error-700 text-sm">
-                                Remove
-                              </button>
-                            </div>
-                          ))}
-                        </div>
-                      </div>
-                    )}
+                    <GroupContacts groupName={group.name} contactCount={group.contact_count} />
 
                     {/* Add Contact Button */}
                     <div className="mt-4 pt-4 border-t border-gray-200">
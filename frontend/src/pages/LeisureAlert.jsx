@@ -31,7 +31,7 @@ const LeisureAlert = () => {
       const response = await alertAPI.sendLeisureAlert(alertData);
       
       if (response.success) {
-        toast.success(`Alert sent successfully! ${response.message || ''}`);
+        toast.success(response.message || 'Alert queued');
         reset();
       } else {
         throw new Error(response.error || 'Failed to send alert');
@@ -102,7 +102,7 @@ const LeisureAlert = () => {
                   <option value="">Select a group</option>
                   {groups.map((group) => (
                     <option key={group.name} value={group.name}>
-                      {group.name} ({group.contacts?.length || 0} contacts)
+                      {group.name} ({group.contact_count || 0} contacts)
                     </option>
                   ))}
                 </select>
@@ -182,7 +182,7 @@ const LeisureAlert = () => {
                 >
                   <span className="font-medium text-gray-900">{group.name}</span>
                   <span className="text-sm text-gray-600">
-                    {group.contacts?.length || 0} contacts
+                    {group.contact_count || 0} contacts
                   </span>
                 </div>
               ))}
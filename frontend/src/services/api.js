@@ -60,11 +60,39 @@ export const alertAPI = {
   },
 };
 
+// Sends are queued; poll a job for the status of every recipient
+export const jobAPI = {
+  getJob: async (jobId) => {
+    const response = await api.get(`/api/jobs/${encodeURIComponent(jobId)}`);
+    return response.data;
+  },
+};
+
 export const groupAPI = {
   getGroups: async () => {
     const response = await api.get('/api/groups');
     return response.data;
   },
+
+  // Names and contact counts only
+  getGroupSummaries: async () => {
+    const response = await api.get('/api/groups', { params: { summary: 1 } });
+    return response.data;
+  },
+
+  // One page of a group's contacts; pass the previous page's next_cursor
+  getGroupContacts: async (groupName, cursor = null, limit = 100) => {
+    const params = cursor ? { cursor, limit } : { limit };
+    const response = await api.get(`/api/groups/${encodeURIComponent(groupName)}/contacts`, { params });
+    return response.data;
+  },
+};
+
+export const contactAPI = {
+  searchContacts: async (query, limit = 20) => {
+    const response = await api.get('/api/contacts/search', { params: { q: query, limit } });
+    return response.data;
+  },
 };
 
 export const scriptAPI = {
@@ -0,0 +1,140 @@
+"""
+Memory and load-time benchmark for the contact models.
+
+Reports bytes per contact and load time for synthetic contact books, both
+for bare Contact objects parsed from JSON, for a full resident storage
+load (contacts plus groups that reference them) and for reopening the same
+data in columnar mode.
+
+Usage (from the src directory):
+    python -m benchmarks.model_memory
+    python -m benchmarks.model_memory --sizes 10000 100000 --groups 20
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from models.contact import Contact
+from services.contact_table import ColumnarStorageBackend
+from services.storage_backends import JsonStorageBackend
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def synthetic_name(i: int) -> str:
+    """A unique, valid contact name (letters only) for index i"""
+    letters = []
+    while True:
+        i, remainder = divmod(i, 26)
+        letters.append(chr(ord('a') + remainder))
+        if not i:
+            break
+    return f"Contact {''.join(letters).capitalize()}"
+
+
+def synthetic_records(count: int) -> list:
+    return [{'name': synthetic_name(i), 'phone': f'+1{2000000000 + i}', 'version': 1} for i in range(count)]
+
+
+def synthetic_groups(count: int, groups: int, group_share: float) -> list:
+    """Groups that each reference a slice of the contacts by phone"""
+    size = int(count * group_share)
+    records = []
+    for g in range(groups):
+        start = (g * size) % max(count - size, 1)
+        records.append({
+            'name': f'Group {synthetic_name(g)}',
+            'members': [f'+1{2000000000 + i}' for i in range(start, start + size)],
+            'version': 1,
+        })
+    return records
+
+
+def measure(build):
+    """(seconds, retained bytes) of build(); timed without tracing, then traced"""
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained
+
+
+def bench_models(count: int) -> tuple:
+    payload = json.dumps(synthetic_records(count))
+    return measure(lambda: [Contact.from_dict(data) for data in json.loads(payload)])
+
+
+def write_synthetic_files(directory: str, count: int, groups: int, group_share: float) -> tuple:
+    """Write synthetic contacts.json/groups.json into directory; returns their paths"""
+    contacts_file = os.path.join(directory, 'contacts.json')
+    groups_file = os.path.join(directory, 'groups.json')
+    with open(contacts_file, 'w') as f:
+        json.dump(synthetic_records(count), f)
+    with open(groups_file, 'w') as f:
+        json.dump(synthetic_groups(count, groups, group_share), f)
+    return contacts_file, groups_file
+
+
+def bench_storage(count: int, groups: int, group_share: float) -> tuple:
+    with tempfile.TemporaryDirectory() as directory:
+        contacts_file, groups_file = write_synthetic_files(directory, count, groups, group_share)
+
+        def load():
+            backend = JsonStorageBackend(contacts_file, groups_file, resident=True)
+            with backend.session():
+                backend._ensure_loaded()
+            return backend
+
+        return measure(load)
+
+
+def bench_columnar(count: int, groups: int, group_share: float) -> tuple:
+    with tempfile.TemporaryDirectory() as directory:
+        contacts_file, groups_file = write_synthetic_files(directory, count, groups, group_share)
+        table_file = os.path.join(directory, 'contacts.columns')
+
+        def load():
+            backend = ColumnarStorageBackend(table_file, f'{table_file}.journal', contacts_file, groups_file)
+            with backend.session():
+                pass
+            return backend
+
+        # The first open converts the JSON files; measure reopening the table
+        load()
+        return measure(load)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Contact model memory/load-time benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Contact book sizes")
+    parser.add_argument('--groups', type=int, default=10, help="Groups in the storage benchmark")
+    parser.add_argument('--group-share', type=float, default=0.1,
+                        help="Fraction of all contacts in each group")
+    args = parser.parse_args(argv)
+
+    print(f"{'contacts':>10}  {'benchmark':<8}  {'load (s)':>9}  {'bytes/contact':>13}")
+    for count in args.sizes:
+        for label, run in (
+            ('models', lambda: bench_models(count)),
+            ('storage', lambda: bench_storage(count, args.groups, args.group_share)),
+            ('columnar', lambda: bench_columnar(count, args.groups, args.group_share)),
+        ):
+            elapsed, retained = run()
+            print(f"{count:>10}  {label:<8}  {elapsed:>9.3f}  {retained / count:>13.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,74 @@
+"""
+Throughput benchmark for InputValidator.
+
+Reports values validated per second for each kind, calling the validator
+once per value and through validate_many(), serially and (with
+--processes) across a process pool. Per-call phone validation goes through
+the phone cache; --distinct sets how many different values there are.
+
+Usage (from the src directory):
+    python -m benchmarks.validation_throughput
+    python -m benchmarks.validation_throughput --count 500000 --processes 4
+"""
+import argparse
+import time
+
+from benchmarks.model_memory import synthetic_name
+from utils.validation import InputValidator
+
+DEFAULT_COUNT = 200_000
+
+# The public per-call validator of each kind
+VALIDATORS = {
+    'phone': 'validate_phone_number',
+    'contact_name': 'validate_contact_name',
+    'business_name': 'validate_business_name',
+    'message': 'validate_message',
+    'group_name': 'validate_group_name',
+}
+
+# Phone numbers as people type them: E.164, US punctuation, international without +
+PHONE_FORMATS = ('+1415{:07d}', '(415) 555-{:04d}', '44 20 {:08d}')
+
+
+def synthetic_values(kind: str, count: int, distinct: int) -> list:
+    if kind == 'phone':
+        return [PHONE_FORMATS[i % 3].format(i % distinct // 3) for i in range(count)]
+    if kind == 'message':
+        return [f"Meet at the park at {i % distinct}, bring snacks for everyone!" for i in range(count)]
+    return [synthetic_name(i % distinct) for i in range(count)]
+
+
+def throughput(run, count: int) -> float:
+    start = time.perf_counter()
+    run()
+    return count / (time.perf_counter() - start)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="InputValidator throughput benchmark")
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT, help="Values per kind")
+    parser.add_argument('--kinds', nargs='+', choices=list(VALIDATORS),
+                        default=['phone', 'contact_name', 'message'], help="Kinds of value to validate")
+    parser.add_argument('--distinct', type=int, default=30_000, help="Different values per kind")
+    parser.add_argument('--processes', type=int, default=1, help="Also time validate_many with a pool this size")
+    args = parser.parse_args(argv)
+
+    print(f"{'kind':<14}  {'path':<16}  {'values/s':>10}")
+    for kind in args.kinds:
+        values = synthetic_values(kind, args.count, args.distinct)
+        validate = getattr(InputValidator, VALIDATORS[kind])
+        runs = [
+            ('per call', lambda: [validate(value) for value in values]),
+            ('validate_many', lambda: InputValidator.validate_many(kind, values)),
+        ]
+        if args.processes > 1:
+            runs.append((f'{args.processes} processes',
+                         lambda: InputValidator.validate_many(kind, values, processes=args.processes)))
+        for label, run in runs:
+            print(f"{kind:<14}  {label:<16}  {throughput(run, args.count):>10,.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -3,7 +3,6 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton,
                             QMessageBox, QWidget, QStackedWidget, QComboBox, QMainWindow)
 from PyQt6.QtCore import Qt, QTimer
 from models.group import Group
-from models.contact import Contact
 from .gradient_button import GradientButton
 from .stylesheets import MAIN_STYLE
 
@@ -214,8 +213,7 @@ class ContactsManager(QWidget):
     def refresh_contacts_tree(self, group_name):
         """Refresh the contacts tree for the selected group"""
         self.contacts_tree.clear()
-        groups = self.alert_system.contact_storage.load_groups()
-        group = next((g for g in groups if g.name == group_name), None)
+        group = self.alert_system.contact_storage.get_group_by_name(group_name)
         
         if group:
             for contact in group.contacts:
@@ -233,21 +231,19 @@ class ContactsManager(QWidget):
             return
             
         try:
-            groups = self.alert_system.contact_storage.load_groups()
-            group = next((g for g in groups if g.name == group_name), None)
+            # Validates and stores just this member, not the whole group
+            result = self.alert_system.contact_storage.add_contact_to_group(group_name, name, phone)
+            if not result.is_valid:
+                QMessageBox.warning(self, "Error", f"Failed to add contact: {result.error_message}")
+                return
             
-            if group:
-                contact = Contact(name, phone)
-                group.contacts.append(contact)
-                self.alert_system.contact_storage.update_group(group)
-                
-                # Clear inputs
-                self.contact_name_input.clear()
-                self.contact_phone_input.clear()
-                
-                # Refresh display
-                self.refresh_contacts_tree(group_name)
-                QMessageBox.information(self, "Success", "Contact added successfully!")
+            # Clear inputs
+            self.contact_name_input.clear()
+            self.contact_phone_input.clear()
+            
+            # Refresh display
+            self.refresh_contacts_tree(group_name)
+            QMessageBox.information(self, "Success", "Contact added successfully!")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to add contact: {str(e)}")
 
@@ -271,15 +267,13 @@ class ContactsManager(QWidget):
         
         if reply == QMessageBox.StandardButton.Yes:
             try:
-                groups = self.alert_system.contact_storage.load_groups()
-                group = next((g for g in groups if g.name == group_name), None)
+                result = self.alert_system.contact_storage.remove_contact_from_group(group_name, contact_phone)
+                if not result.is_valid:
+                    QMessageBox.warning(self, "Error", f"Failed to delete contact: {result.error_message}")
+                    return
                 
-                if group:
-                    group.contacts = [c for c in group.contacts 
-                                    if not (c.name == contact_name and c.phone == contact_phone)]
-                    self.alert_system.contact_storage.update_group(group)
-                    self.refresh_contacts_tree(group_name)
-                    QMessageBox.information(self, "Success", "Contact deleted successfully!")
+                self.refresh_contacts_tree(group_name)
+                QMessageBox.information(self, "Success", "Contact deleted successfully!")
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed to delete contact: {str(e)}")
 
@@ -167,16 +167,15 @@ class OnArrivalGUI(QMainWindow):
         return True, "All inputs valid"
 
     def sanitize_business_inputs(self, business_name: str, phone: str, message: str) -> tuple[str, str, str]:
-        """Sanitize business inputs and return cleaned values"""
-        business_validation = InputValidator.validate_business_name(business_name)
-        phone_validation = InputValidator.validate_phone_number(phone)
-        message_validation = InputValidator.validate_message(message)
-        
-        return (
-            business_validation.sanitized_value,
-            phone_validation.sanitized_value,
-            message_validation.sanitized_value
-        )
+        """
+        Sanitize business inputs and return cleaned values, typed so that
+        make_call does not validate them again
+        """
+        sanitized_business, _ = InputValidator.safe_business_name(business_name)
+        sanitized_phone, _ = InputValidator.e164_phone(phone)
+        sanitized_message, _ = InputValidator.safe_message(message)
+        
+        return sanitized_business, sanitized_phone, sanitized_message
 
     def open_contacts_manager(self):
         """Open the contacts manager window"""
@@ -262,7 +261,7 @@ class OnArrivalGUI(QMainWindow):
             
             # Send notification
             try:
-                self.alert_system.notification_service.make_call(
+                self.alert_system.call_dispatcher.make_call(
                     self.business_phone,
                     self.business_message,
                     self.business_name
@@ -306,8 +305,7 @@ class OnArrivalGUI(QMainWindow):
                 QMessageBox.warning(self, "Error", "Please select a group!")
                 return
 
-            groups = self.alert_system.contact_storage.load_groups()
-            group = next((g for g in groups if g.name == selected_group), None)
+            group = self.alert_system.contact_storage.get_group_by_name(selected_group)
             
             if not group:
                 QMessageBox.warning(self, "Error", "Selected group not found!")
@@ -336,33 +334,13 @@ class OnArrivalGUI(QMainWindow):
                 QMessageBox.warning(self, "Validation Error", error_msg)
                 return
 
-            # Send alerts to all contacts in group
-            success_count = 0
-            error_messages = []
+            # Sanitize the template once; each contact only fills in the name
+            safe_template, _ = InputValidator.safe_message(message_template)
             
-            for contact in group.contacts:
-                try:
-                    # Sanitize message for each contact
-                    message_validation = InputValidator.validate_message(message_template.replace('()', contact.name))
-                    if not message_validation.is_valid:
-                        error_messages.append(f"Invalid message for {contact.name}: {message_validation.error_message}")
-                        continue
-                    
-                    sanitized_message = message_validation.sanitized_value
-                    
-                    result = self.alert_system.notification_service.make_call(
-                        contact.phone, 
-                        sanitized_message,
-                        include_follow_up=True
-                    )
-                    
-                    if result:
-                        success_count += 1
-                    else:
-                        error_messages.append(f"Failed to send alert to {contact.name}")
-                        
-                except Exception as e:
-                    error_messages.append(f"Error sending to {contact.name}: {str(e)}")
+            # Send alerts to all contacts in group, several at a time
+            summary = self.alert_system.call_dispatcher.send_group_alert(group.contacts, safe_template)
+            success_count = summary.success_count
+            error_messages = summary.error_messages
             
             # Show results
             if success_count > 0:
@@ -408,8 +386,7 @@ class OnArrivalGUI(QMainWindow):
     def update_contact_count(self, selected_group: str):
         """Update the contact count when group selection changes"""
         try:
-            groups = self.alert_system.contact_storage.load_groups()
-            group = next((g for g in groups if g.name == selected_group), None)
+            group = self.alert_system.contact_storage.get_group_by_name(selected_group)
             if group:
                 count = len(group.contacts)
                 self.contact_count.setText(f"{count} contact{'s' if count != 1 else ''} will be notified")
@@ -531,7 +508,7 @@ class OnArrivalGUI(QMainWindow):
         else:
             # Send alert immediately
             try:
-                result = self.alert_system.notification_service.make_call(
+                result = self.alert_system.call_dispatcher.make_call(
                     sanitized_phone,
                     sanitized_message,
                     business_name=sanitized_business
@@ -1,8 +1,19 @@
 from utils.validation import InputValidator, ValidationResult
 from typing import Dict, Tuple
+import sys
+
+def intern_phone(phone):
+    """
+    Return the shared string object for a phone number, so the contacts
+    table, group memberships and indexes don't each hold their own copy.
+    """
+    return sys.intern(phone) if type(phone) is str else phone
 
 class Contact:
-    def __init__(self, name: str, phone: str, validate: bool = True):
+    # No per-instance __dict__: large contact books hold many of these
+    __slots__ = ('name', 'phone', 'version')
+    
+    def __init__(self, name: str, phone: str, validate: bool = True, version: int = 0):
         if validate:
             # Validate inputs during creation
             name_result = InputValidator.validate_contact_name(name)
@@ -15,22 +26,26 @@ class Contact:
             
             # Use sanitized values
             self.name = name_result.sanitized_value
-            self.phone = phone_result.sanitized_value
+            self.phone = intern_phone(phone_result.sanitized_value)
         else:
             # Skip validation (for loading from storage)
             self.name = name
-            self.phone = phone
+            self.phone = intern_phone(phone)
+        
+        # Bumped by storage on every change; 0 means never stored
+        self.version = version
 
     def to_dict(self) -> dict:
         return {
             "name": self.name,
-            "phone": self.phone
+            "phone": self.phone,
+            "version": self.version
         }
 
     @classmethod
     def from_dict(cls, data: dict) -> 'Contact':
         """Create contact from dictionary without validation (for loading from storage)"""
-        return cls(data["name"], data["phone"], validate=False)
+        return cls(data["name"], data["phone"], validate=False, version=data.get("version", 0))
     
     @classmethod
     def create_validated(cls, name: str, phone: str) -> Tuple['Contact', ValidationResult]:
@@ -52,7 +67,7 @@ class Contact:
         """Update contact phone with validation"""
         phone_result = InputValidator.validate_phone_number(new_phone)
         if phone_result.is_valid:
-            self.phone = phone_result.sanitized_value
+            self.phone = intern_phone(phone_result.sanitized_value)
         return phone_result
     
     def __str__(self) -> str:
@@ -1,9 +1,17 @@
-from typing import List, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 from models.contact import Contact
 from utils.validation import InputValidator, ValidationResult
 
+class GroupSummary(NamedTuple):
+    """A group's name, version and member count, without its contacts"""
+    name: str
+    version: int
+    contact_count: int
+
 class Group:
-    def __init__(self, name: str, contacts: List[Contact] = None, validate: bool = True):
+    __slots__ = ('name', 'contacts', 'version')
+    
+    def __init__(self, name: str, contacts: List[Contact] = None, validate: bool = True, version: int = 0):
         if validate:
             # Validate group name
             name_result = InputValidator.validate_group_name(name)
@@ -16,18 +24,22 @@ class Group:
             self.name = name
         
         self.contacts = contacts or []
+        
+        # Bumped by storage whenever the group or its membership changes; 0 means never stored
+        self.version = version
 
     def to_dict(self) -> dict:
         return {
             "name": self.name,
-            "contacts": [contact.to_dict() for contact in self.contacts]
+            "contacts": [contact.to_dict() for contact in self.contacts],
+            "version": self.version
         }
 
     @classmethod
     def from_dict(cls, data: dict) -> 'Group':
         """Create group from dictionary without validation (for loading from storage)"""
         contacts = [Contact.from_dict(contact_data) for contact_data in data.get("contacts", [])]
-        return cls(data["name"], contacts, validate=False)
+        return cls(data["name"], contacts, validate=False, version=data.get("version", 0))
     
     @classmethod
     def create_validated(cls, name: str) -> Tuple['Group', ValidationResult]:
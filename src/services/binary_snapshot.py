@@ -0,0 +1,839 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models.contact import Contact
+from models.group import Group, GroupSummary
+from services.journal_backend import append_journal_entry, replay_journal
+from services.storage_backends import (
+    atomic_write_bytes, copy_contact, file_fingerprint, load_generation, name_key, page_members,
+    parse_group_record
+)
+
+# File layout (all integers little-endian):
+#
+#   header         HEADER, see below
+#   contacts       per contact: CONTACT_RECORD, phone, name (UTF-8),
+#                  then u32 indices of the groups it belongs to
+#   groups         per group: GROUP_RECORD, name (UTF-8), then u32 member
+#                  contact indices
+#   offset index   u64 file offset of each contact / group record
+#   lookup index   u32 record indices sorted by phone, by contact name key
+#                  and by group name key, for binary search
+#
+# Only the header is decoded on open; records are decoded when touched.
+MAGIC = b'OACB'
+FORMAT_VERSION = 1
+
+# magic, format version, reserved, journal seq, contact count, group count,
+# positions of: contact offsets, phone index, name index, group offsets, group index
+HEADER = struct.Struct('<4sHHQIIQQQQQ')
+CONTACT_RECORD = struct.Struct('<IBHH')   # version, phone length, name length, group count
+GROUP_RECORD = struct.Struct('<IHI')      # version, name length, member count
+U32 = struct.Struct('<I')
+U64 = struct.Struct('<Q')
+
+
+def _pack_array(fmt: str, values: list) -> bytes:
+    return struct.pack(f'<{len(values)}{fmt}', *values)
+
+
+def encode_snapshot(contacts: List[Contact], groups: List[Tuple[str, int, List[str]]], seq: int = 0) -> bytes:
+    """
+    Encode contacts and groups as a binary snapshot.
+
+    ``groups`` holds (name, version, member phones) tuples; members that
+    aren't in ``contacts`` are dropped.
+    """
+    position = {contact.phone: i for i, contact in enumerate(contacts)}
+    group_members = []
+    member_of = [[] for _ in contacts]
+    for g, (_, _, phones) in enumerate(groups):
+        members = [position[phone] for phone in phones if phone in position]
+        for member in members:
+            member_of[member].append(g)
+        group_members.append(members)
+
+    body = bytearray(HEADER.size)
+
+    contact_offsets = []
+    for i, contact in enumerate(contacts):
+        contact_offsets.append(len(body))
+        phone = contact.phone.encode('ascii')
+        name = contact.name.encode('utf-8')
+        body += CONTACT_RECORD.pack(contact.version, len(phone), len(name), len(member_of[i]))
+        body += phone
+        body += name
+        body += _pack_array('I', member_of[i])
+
+    group_offsets = []
+    for (name, version, _), members in zip(groups, group_members):
+        group_offsets.append(len(body))
+        encoded = name.encode('utf-8')
+        body += GROUP_RECORD.pack(version, len(encoded), len(members))
+        body += encoded
+        body += _pack_array('I', members)
+
+    sections = []
+    for fmt, values in (
+        ('Q', contact_offsets),
+        ('I', sorted(range(len(contacts)), key=lambda i: contacts[i].phone)),
+        ('I', sorted(range(len(contacts)), key=lambda i: name_key(contacts[i].name))),
+        ('Q', group_offsets),
+        ('I', sorted(range(len(groups)), key=lambda g: name_key(groups[g][0]))),
+    ):
+        sections.append(len(body))
+        body += _pack_array(fmt, values)
+
+    HEADER.pack_into(body, 0, MAGIC, FORMAT_VERSION, 0, seq, len(contacts), len(groups), *sections)
+    return bytes(body)
+
+
+class BinarySnapshot:
+    """Read-only, memory-mapped view of an encoded snapshot"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            # The map stays valid after the file is closed or replaced
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, _, self.seq, self.contact_count, self.group_count,
+         self._contact_offsets, self._phone_index, self._name_index,
+         self._group_offsets, self._group_index) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a contact snapshot (format {version})")
+
+    def _u32(self, section: int, i: int) -> int:
+        return U32.unpack_from(self._map, section + 4 * i)[0]
+
+    def _u64(self, section: int, i: int) -> int:
+        return U64.unpack_from(self._map, section + 8 * i)[0]
+
+    def _search(self, index: int, count: int, key_at, key) -> Optional[int]:
+        """Binary search a sorted u32 index for a record whose key equals ``key``"""
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            record = self._u32(index, middle)
+            record_key = key_at(record)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return record
+        return None
+
+    # Contacts
+
+    def _contact_header(self, i: int) -> Tuple[int, tuple]:
+        offset = self._u64(self._contact_offsets, i)
+        return offset + CONTACT_RECORD.size, CONTACT_RECORD.unpack_from(self._map, offset)
+
+    def phone_at(self, i: int) -> str:
+        start, (_, phone_length, _, _) = self._contact_header(i)
+        return self._map[start:start + phone_length].decode('ascii')
+
+    def name_at(self, i: int) -> str:
+        start, (_, phone_length, name_length, _) = self._contact_header(i)
+        start += phone_length
+        return self._map[start:start + name_length].decode('utf-8')
+
+    def contact_at(self, i: int) -> Contact:
+        start, (version, phone_length, name_length, _) = self._contact_header(i)
+        phone = self._map[start:start + phone_length].decode('ascii')
+        start += phone_length
+        name = self._map[start:start + name_length].decode('utf-8')
+        return Contact(name, phone, validate=False, version=version)
+
+    def contact_groups(self, i: int) -> List[int]:
+        start, (_, phone_length, name_length, group_count) = self._contact_header(i)
+        start += phone_length + name_length
+        return list(struct.unpack_from(f'<{group_count}I', self._map, start))
+
+    def find_contact(self, phone: str) -> Optional[int]:
+        return self._search(self._phone_index, self.contact_count, self.phone_at, phone)
+
+    def find_contact_by_name(self, key: str) -> Optional[int]:
+        return self._search(self._name_index, self.contact_count, lambda i: name_key(self.name_at(i)), key)
+
+    # Groups
+
+    def group_name_at(self, g: int) -> str:
+        offset = self._u64(self._group_offsets, g)
+        _, name_length, _ = GROUP_RECORD.unpack_from(self._map, offset)
+        start = offset + GROUP_RECORD.size
+        return self._map[start:start + name_length].decode('utf-8')
+
+    def group_at(self, g: int) -> Tuple[str, int, List[int]]:
+        """(name, version, member contact indices)"""
+        offset = self._u64(self._group_offsets, g)
+        version, name_length, member_count = GROUP_RECORD.unpack_from(self._map, offset)
+        start = offset + GROUP_RECORD.size
+        name = self._map[start:start + name_length].decode('utf-8')
+        members = struct.unpack_from(f'<{member_count}I', self._map, start + name_length)
+        return name, version, list(members)
+
+    def group_summary(self, g: int) -> GroupSummary:
+        """Name, version and member count, without decoding the members"""
+        offset = self._u64(self._group_offsets, g)
+        version, name_length, member_count = GROUP_RECORD.unpack_from(self._map, offset)
+        start = offset + GROUP_RECORD.size
+        return GroupSummary(self._map[start:start + name_length].decode('utf-8'), version, member_count)
+
+    def find_group(self, key: str) -> Optional[int]:
+        return self._search(self._group_index, self.group_count, lambda g: name_key(self.group_name_at(g)), key)
+
+
+class _OverlayGroup:
+    """A group changed since the snapshot was written"""
+
+    def __init__(self, name: str, version: int, members: Dict[str, None]):
+        self.name = name
+        self.version = version
+        self.members = members   # ordered set of member phones
+
+
+class BinarySnapshotBackend:
+    """
+    Contacts and groups in a memory-mapped binary snapshot plus a journal.
+
+    Opening the store decodes only the snapshot header, and a lookup decodes
+    just the records it touches through the offset and sorted indexes. The
+    mapped pages live in the OS page cache and are shared by every worker.
+
+    Changes are kept in a small in-memory overlay (with tombstones for
+    records deleted from the snapshot) and appended to a journal, as in
+    journal mode. Once the journal or the overlay reaches
+    ``compact_threshold`` entries, a background compaction writes a new
+    snapshot and clears both. Like the memory and journal modes, this
+    assumes a single process owns the files.
+    """
+
+    def __init__(self, snapshot_file: str, journal_file: str, contacts_file: str, groups_file: str,
+                 compact_threshold: int = 1000):
+        # contacts_file/groups_file are only read to seed the first snapshot
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self.contacts_file = contacts_file
+        self.groups_file = groups_file
+        self.compact_threshold = compact_threshold
+        self.lock = threading.RLock()
+
+        self._base: Optional[BinarySnapshot] = None
+        self._generation = None
+        self._seq = 0
+        self._journal = None
+        self._compacting = False
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread = None
+        # Journal entries queued by the open transaction, if any
+        self._pending: Optional[list] = None
+        self._reset_overlay()
+
+    def _reset_overlay(self):
+        self._contacts: Dict[str, Optional[Contact]] = {}        # phone -> contact, None if deleted
+        # Phones listed after the snapshot's, in order: new ones and ones re-added after a delete
+        self._added: Dict[str, None] = {}
+        # Renumbered snapshot contacts keep their position: slot -> phone and back
+        self._slot_phones: Dict[int, str] = {}
+        self._phone_slots: Dict[str, int] = {}
+        self._names: Dict[str, Optional[str]] = {}               # name key -> phone, None if freed
+        self._groups: Dict[str, Optional[_OverlayGroup]] = {}    # group key -> group, None if deleted
+        self._added_groups: Dict[str, None] = {}                 # group keys listed after the snapshot's
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def session(self):
+        """Hold the storage lock across several calls"""
+        with self.lock:
+            self._ensure_loaded()
+            yield self
+
+    def _ensure_loaded(self):
+        if self._base is not None:
+            return
+
+        if not os.path.exists(self.snapshot_file):
+            self._seed_from_json()
+        self._generation = load_generation([self.snapshot_file, self.journal_file])
+        self._base = BinarySnapshot(self.snapshot_file)
+        self._seq = self._base.seq
+
+        def apply(entry):
+            getattr(self, f"_apply_{entry['op']}")(**entry['args'])
+
+        last_seq = replay_journal(self.journal_file, self._base.seq, apply)
+        if last_seq is not None:
+            self._seq = last_seq
+
+    def _seed_from_json(self):
+        """First start in this mode: build the snapshot from the JSON files"""
+        def read_list(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                return data if isinstance(data, list) else []
+            except (FileNotFoundError, ValueError):
+                return []
+
+        contacts = {}
+        for data in read_list(self.contacts_file):
+            contact = Contact.from_dict(data)
+            contact.version = contact.version or 1
+            contacts.setdefault(contact.phone, contact)
+
+        groups = []
+        for record in read_list(self.groups_file):
+            name, members = parse_group_record(record)
+            for member in members:
+                if member.name and member.phone not in contacts:
+                    contacts[member.phone] = Contact(member.name, member.phone, validate=False, version=1)
+            groups.append((name, record.get('version') or 1, [m.phone for m in members]))
+
+        atomic_write_bytes(self.snapshot_file, encode_snapshot(list(contacts.values()), groups))
+
+    # ------------------------------------------------------------------
+    # Merged view of snapshot + overlay
+    # ------------------------------------------------------------------
+
+    def _in_base(self, phone: str) -> bool:
+        return self._base.find_contact(phone) is not None
+
+    def _contact(self, phone: str) -> Optional[Contact]:
+        if phone in self._contacts:
+            return self._contacts[phone]
+        i = self._base.find_contact(phone)
+        return self._base.contact_at(i) if i is not None else None
+
+    def _contact_by_name(self, key: str) -> Optional[Contact]:
+        if key in self._names:
+            phone = self._names[key]
+        else:
+            i = self._base.find_contact_by_name(key)
+            phone = self._base.phone_at(i) if i is not None else None
+        contact = self._contact(phone) if phone else None
+        # The contact may have been renamed since the entry was made
+        return contact if contact and name_key(contact.name) == key else None
+
+    def _base_group(self, g: int) -> _OverlayGroup:
+        name, version, members = self._base.group_at(g)
+        return _OverlayGroup(name, version, {self._base.phone_at(i): None for i in members})
+
+    def _group(self, key: str) -> Optional[_OverlayGroup]:
+        if key in self._groups:
+            return self._groups[key]
+        g = self._base.find_group(key)
+        return self._base_group(g) if g is not None else None
+
+    def _touch_group(self, key: str) -> Optional[_OverlayGroup]:
+        """Copy a snapshot group into the overlay before changing it"""
+        if key not in self._groups:
+            group = self._group(key)
+            if group is None:
+                return None
+            self._groups[key] = group
+        return self._groups[key]
+
+    def _group_keys_for(self, phone: str) -> List[str]:
+        """Keys of the groups that currently contain a contact"""
+        candidates = [key for key, group in self._groups.items() if group and phone in group.members]
+        i = self._base.find_contact(phone)
+        if i is not None:
+            for g in self._base.contact_groups(i):
+                key = name_key(self._base.group_name_at(g))
+                if key not in self._groups:
+                    candidates.append(key)
+        return candidates
+
+    def _current_contacts(self) -> Iterator[Contact]:
+        """Contacts in snapshot order, then ones added since (internal objects)"""
+        for i in range(self._base.contact_count):
+            moved = self._slot_phones.get(i)
+            if moved is not None:
+                yield self._contacts[moved]
+                continue
+            phone = self._base.phone_at(i)
+            if phone in self._contacts:
+                contact = self._contacts[phone]
+                if contact is not None and phone not in self._added and phone not in self._phone_slots:
+                    yield contact
+            else:
+                yield self._base.contact_at(i)
+        for phone in self._added:
+            yield self._contacts[phone]
+
+    def _current_group_keys(self) -> Iterator[str]:
+        for g in range(self._base.group_count):
+            key = name_key(self._base.group_name_at(g))
+            if self._groups.get(key, True) is not None and key not in self._added_groups:
+                yield key
+        yield from self._added_groups
+
+    def _materialize_group(self, group: _OverlayGroup) -> Group:
+        contacts = []
+        for phone in group.members:
+            contact = self._contact(phone)
+            if contact is not None:
+                contacts.append(copy_contact(contact))
+        return Group(group.name, contacts, validate=False, version=group.version)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def list_contacts(self) -> List[Contact]:
+        with self.session():
+            return [copy_contact(c) for c in self._current_contacts()]
+
+    def iter_contacts(self) -> Iterator[Contact]:
+        """Yield contacts one at a time, decoding snapshot records as they go"""
+        with self.session():
+            contacts = list(self._current_contacts()) if self._contacts else None
+            base = self._base
+        if contacts is not None:
+            for contact in contacts:
+                yield copy_contact(contact)
+            return
+        # No overlay: stream straight from the mapped snapshot
+        for i in range(base.contact_count):
+            yield base.contact_at(i)
+
+    def list_groups(self) -> List[Group]:
+        with self.session():
+            return [self._materialize_group(self._group(key)) for key in self._current_group_keys()]
+
+    def get_contact(self, phone: str) -> Optional[Contact]:
+        with self.session():
+            contact = self._contact(phone)
+            return copy_contact(contact) if contact else None
+
+    def find_contact_by_name(self, name: str) -> Optional[Contact]:
+        with self.session():
+            contact = self._contact_by_name(name_key(name))
+            return copy_contact(contact) if contact else None
+
+    def get_group(self, name: str) -> Optional[Group]:
+        with self.session():
+            group = self._group(name_key(name))
+            return self._materialize_group(group) if group else None
+
+    def has_group(self, name: str) -> bool:
+        with self.session():
+            return self._group(name_key(name)) is not None
+
+    def group_member(self, group_name: str, phone: str) -> Optional[Contact]:
+        with self.session():
+            group = self._group(name_key(group_name))
+            if group is None or phone not in group.members:
+                return None
+            contact = self._contact(phone)
+            return copy_contact(contact) if contact else None
+
+    def group_member_by_name(self, group_name: str, contact_name: str) -> Optional[Contact]:
+        with self.session():
+            group = self._group(name_key(group_name))
+            contact = self._contact_by_name(name_key(contact_name))
+            if group is None or contact is None or contact.phone not in group.members:
+                return None
+            return copy_contact(contact)
+
+    def groups_for_contact(self, phone: str) -> List[str]:
+        with self.session():
+            return [self._group(key).name for key in self._group_keys_for(phone)]
+
+    def group_summaries(self) -> List[GroupSummary]:
+        with self.session():
+            summaries = []
+            for g in range(self._base.group_count):
+                summary = self._base.group_summary(g)
+                key = name_key(summary.name)
+                if key not in self._groups:
+                    summaries.append(summary)
+                elif self._groups[key] is not None and key not in self._added_groups:
+                    group = self._groups[key]
+                    summaries.append(GroupSummary(group.name, group.version, len(group.members)))
+            for key in self._added_groups:
+                group = self._groups[key]
+                summaries.append(GroupSummary(group.name, group.version, len(group.members)))
+            return summaries
+
+    def group_members_page(self, group_name: str, cursor: Optional[str],
+                           limit: int) -> Optional[Tuple[List[Contact], Optional[str]]]:
+        """One page of a group's members and the cursor of the next page, or None if no such group"""
+        with self.session():
+            group = self._group(name_key(group_name))
+            if group is None:
+                return None
+            phones, next_cursor = page_members(list(group.members), cursor, limit)
+            return [copy_contact(self._contact(phone)) for phone in phones], next_cursor
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def _mutate(self, op: str, **args) -> bool:
+        with self.session():
+            changed = getattr(self, f'_apply_{op}')(**args)
+            if changed:
+                if self._pending is not None:
+                    self._pending.append({'op': op, 'args': args})
+                else:
+                    self._append(op, args)
+            return changed
+
+    def _append(self, op: str, args: dict):
+        """Journal a change already applied to the overlay (lock held)"""
+        self._seq += 1
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a')
+        append_journal_entry(self._journal, self._seq, op, args)
+        self._maybe_compact()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Journal several mutations as one entry.
+
+        Inside the block each mutation updates the overlay at once, so later
+        calls see it; the outermost transaction appends them all as a single
+        ``transaction`` line when it exits. If the block raises, the overlay
+        is rebuilt from the snapshot and journal.
+        """
+        with self.session():
+            if self._pending is not None:
+                yield self
+                return
+
+            self._pending = []
+            try:
+                yield self
+            except BaseException:
+                self._pending = None
+                self._discard_overlay()
+                raise
+
+            pending, self._pending = self._pending, None
+            if pending:
+                try:
+                    self._append('transaction', {'entries': pending})
+                except Exception:
+                    self._discard_overlay()
+                    raise
+
+    def _discard_overlay(self):
+        """Drop uncommitted changes; the next call reloads from storage"""
+        self._base = None
+        self._reset_overlay()
+
+    def replace_contacts(self, contacts: List[Contact]):
+        self._mutate('replace_contacts', contacts=[c.to_dict() for c in contacts])
+
+    def replace_groups(self, groups: List[Group]):
+        self._mutate('replace_groups', groups=[g.to_dict() for g in groups])
+
+    def insert_contact(self, contact: Contact):
+        self._mutate('insert_contact', name=contact.name, phone=contact.phone)
+
+    def insert_contacts(self, contacts: List[Contact]) -> int:
+        self._mutate('insert_contacts', contacts=[{'name': c.name, 'phone': c.phone} for c in contacts])
+        return len(contacts)
+
+    def update_contact(self, old_phone: str, contact: Contact) -> bool:
+        return self._mutate('update_contact', old_phone=old_phone, name=contact.name, phone=contact.phone)
+
+    def delete_contact(self, phone: str) -> bool:
+        """Delete a contact and drop it from every group that contains it"""
+        return self._mutate('delete_contact', phone=phone)
+
+    def insert_group(self, group: Group):
+        self._mutate('insert_group', group=group.to_dict())
+
+    def replace_group(self, group: Group) -> bool:
+        return self._mutate('replace_group', group=group.to_dict())
+
+    def delete_group(self, name: str) -> bool:
+        return self._mutate('delete_group', name=name)
+
+    def add_group_member(self, group_name: str, contact: Contact) -> bool:
+        return self._mutate('add_group_member', group=group_name, name=contact.name, phone=contact.phone)
+
+    def remove_group_member(self, group_name: str, phone: str) -> bool:
+        return self._mutate('remove_group_member', group=group_name, phone=phone)
+
+    # Operations on the overlay, shared by live calls and journal replay.
+    # Each returns True if it changed anything.
+
+    def _put_contact(self, contact: Contact, slot: Optional[int] = None):
+        """Store a contact, in snapshot position slot if given"""
+        # A snapshot contact deleted since is listed at the end if it comes back
+        deleted = contact.phone in self._contacts and self._contacts[contact.phone] is None
+        self._contacts[contact.phone] = contact
+        if slot is None:
+            # A renumbered contact being renamed stays where it is
+            slot = self._phone_slots.get(contact.phone)
+        if slot is not None:
+            self._slot_phones[slot] = contact.phone
+            self._phone_slots[contact.phone] = slot
+        elif deleted or not self._in_base(contact.phone) or self._base.find_contact(contact.phone) in self._slot_phones:
+            # New, or its own snapshot position is taken by a renumbered contact
+            self._added[contact.phone] = None
+        self._names[name_key(contact.name)] = contact.phone
+
+    def _slot_of(self, phone: str) -> Optional[int]:
+        """Snapshot position a contact is listed at, None if it is listed after the snapshot"""
+        if phone in self._phone_slots:
+            return self._phone_slots[phone]
+        if phone in self._added:
+            return None
+        return self._base.find_contact(phone)
+
+    def _remove_contact(self, contact: Contact):
+        slot = self._phone_slots.pop(contact.phone, None)
+        if slot is not None:
+            del self._slot_phones[slot]
+        self._added.pop(contact.phone, None)
+        if self._in_base(contact.phone):
+            self._contacts[contact.phone] = None
+        else:
+            del self._contacts[contact.phone]
+        key = name_key(contact.name)
+        if self._names.get(key) == contact.phone:
+            self._names[key] = None
+
+    def _apply_replace_contacts(self, contacts: list) -> bool:
+        stored = {}
+        for data in contacts:
+            contact = Contact.from_dict(data)
+            contact.version = contact.version or 1
+            stored[contact.phone] = contact
+
+        # Groups lose the members that are going away
+        for key in list(self._current_group_keys()):
+            members = self._group(key).members
+            kept = {phone: None for phone in members if phone in stored}
+            if len(kept) != len(members):
+                group = self._touch_group(key)
+                group.members = kept
+                group.version += 1
+
+        for contact in list(self._current_contacts()):
+            if contact.phone not in stored:
+                self._remove_contact(contact)
+        for contact in stored.values():
+            self._put_contact(contact)
+        return True
+
+    def _apply_replace_groups(self, groups: list) -> bool:
+        for key in list(self._current_group_keys()):
+            self._apply_delete_group(self._group(key).name)
+
+        for record in groups:
+            name, members = parse_group_record(record)
+            for member in members:
+                self._upsert_contact(member.name, member.phone)
+            key = name_key(name)
+            phones = {m.phone: None for m in members if self._contact(m.phone) is not None}
+            self._groups[key] = _OverlayGroup(name, record.get('version') or 1, phones)
+            self._added_groups[key] = None
+        return True
+
+    def _apply_transaction(self, entries: list) -> bool:
+        """Re-apply the operations of a committed transaction (journal replay)"""
+        for entry in entries:
+            getattr(self, f"_apply_{entry['op']}")(**entry['args'])
+        return True
+
+    def _upsert_contact(self, name: str, phone: str):
+        if name and self._contact(phone) is None:
+            self._put_contact(Contact(name, phone, validate=False, version=1))
+
+    def _apply_insert_contact(self, name: str, phone: str) -> bool:
+        self._put_contact(Contact(name, phone, validate=False, version=1))
+        return True
+
+    def _apply_insert_contacts(self, contacts: list) -> bool:
+        for data in contacts:
+            self._apply_insert_contact(data['name'], data['phone'])
+        return bool(contacts)
+
+    def _apply_update_contact(self, old_phone: str, name: str, phone: str) -> bool:
+        existing = self._contact(old_phone)
+        if existing is None:
+            return False
+
+        group_keys = self._group_keys_for(old_phone) if phone != old_phone else []
+        updated = Contact(name, phone, validate=False, version=existing.version + 1)
+        if self._contact_by_name(name_key(existing.name)) is not None:
+            self._names[name_key(existing.name)] = None
+        slot = None
+        if phone != old_phone:
+            # The contact keeps its place in the listing under its new number
+            slot = self._slot_of(old_phone)
+            if slot is None:
+                self._added = {(phone if added == old_phone else added): None for added in self._added}
+            self._remove_contact(existing)
+            for key in group_keys:
+                group = self._touch_group(key)
+                group.members = {(phone if member == old_phone else member): None for member in group.members}
+        self._put_contact(updated, slot)
+        return True
+
+    def _apply_delete_contact(self, phone: str) -> bool:
+        existing = self._contact(phone)
+        if existing is None:
+            return False
+
+        for key in self._group_keys_for(phone):
+            group = self._touch_group(key)
+            del group.members[phone]
+            group.version += 1
+        self._remove_contact(existing)
+        return True
+
+    def _put_group(self, record: dict, replace: bool) -> bool:
+        name, members = parse_group_record(record)
+        key = name_key(name)
+        existing = self._group(key)
+        if replace and existing is None:
+            return False
+
+        for member in members:
+            self._upsert_contact(member.name, member.phone)
+        phones = {m.phone: None for m in members if self._contact(m.phone) is not None}
+        self._groups[key] = _OverlayGroup(name, existing.version + 1 if existing else 1, phones)
+        if existing is None:
+            # New, or a snapshot group re-created after a delete: listed last
+            self._added_groups[key] = None
+        return True
+
+    def _apply_insert_group(self, group: dict) -> bool:
+        return self._put_group(group, replace=False)
+
+    def _apply_replace_group(self, group: dict) -> bool:
+        return self._put_group(group, replace=True)
+
+    def _apply_delete_group(self, name: str) -> bool:
+        key = name_key(name)
+        if self._group(key) is None:
+            return False
+        self._added_groups.pop(key, None)
+        if self._base.find_group(key) is not None:
+            self._groups[key] = None
+        else:
+            del self._groups[key]
+        return True
+
+    def _apply_add_group_member(self, group: str, name: str, phone: str) -> bool:
+        target = self._touch_group(name_key(group))
+        if target is None:
+            return False
+        self._upsert_contact(name, phone)
+        target.members[phone] = None
+        target.version += 1
+        return True
+
+    def _apply_remove_group_member(self, group: str, phone: str) -> bool:
+        key = name_key(group)
+        current = self._group(key)
+        if current is None or phone not in current.members:
+            return False
+        target = self._touch_group(key)
+        del target.members[phone]
+        target.version += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def _maybe_compact(self):
+        pending = max(self._seq - self._base.seq, len(self._contacts) + len(self._groups))
+        if pending >= self.compact_threshold and not self._compacting:
+            self._compacting = True
+            self._compaction_thread = threading.Thread(target=self.compact, name='snapshot-compaction', daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self):
+        """
+        Fold the overlay and journal into a new snapshot.
+
+        The current state is copied under the lock but encoded and written
+        without it, so writes carry on meanwhile; they are journaled after
+        the copied sequence number and replayed onto the new snapshot.
+        """
+        with self._compaction_lock:
+            try:
+                self._write_snapshot()
+            except Exception as e:
+                print(f"Warning: Snapshot compaction failed: {e}")
+            finally:
+                self._compacting = False
+
+    def _write_snapshot(self):
+        with self.session():
+            seq = self._seq
+            contacts = [copy_contact(c) for c in self._current_contacts()]
+            groups = []
+            for key in self._current_group_keys():
+                group = self._group(key)
+                groups.append((group.name, group.version, list(group.members)))
+
+        atomic_write_bytes(self.snapshot_file, encode_snapshot(contacts, groups, seq))
+
+        with self.lock:
+            # Keep entries appended while the snapshot was being written
+            self._close_journal()
+            remaining = []
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r') as f:
+                    remaining = [line for line in f if json.loads(line)['seq'] > seq]
+
+            temp_file = f"{self.journal_file}.tmp"
+            with open(temp_file, 'w') as f:
+                f.writelines(remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.journal_file)
+
+            # Readers still iterating the old map keep it alive until they finish
+            generation = self._generation
+            self._discard_overlay()
+            self._ensure_loaded()
+            self._generation = generation
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        # A compaction still running would rewrite the files after close,
+        # under a store that may already have been reopened on them
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        with self.lock:
+            self._close_journal()
+
+    def fingerprint(self) -> list:
+        """Changes whenever the stored data changes"""
+        fingerprint = file_fingerprint([self.snapshot_file, self.journal_file])
+        if self._pending:
+            # Queued in an open transaction, not journaled yet
+            fingerprint.append(len(self._pending))
+        return fingerprint
+
+    def data_version(self) -> str:
+        """
+        The journal sequence number, which survives restarts and compaction,
+        qualified by the generation loaded (see load_generation)
+        """
+        with self.session():
+            return f"{self._generation}.{self._seq}"
@@ -0,0 +1,264 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from models.contact import Contact
+from services.provider_guard import NOT_ATTEMPTED
+from utils.validation import InputValidator, SafeMessage
+
+DEFAULT_CALL_CONCURRENCY = 8
+DEFAULT_ASYNC_CALL_CONCURRENCY = 200
+
+DISPATCH_MODES = ('async', 'threads')
+
+
+@dataclass
+class CallOutcome:
+    """Result of alerting one contact of a group"""
+    contact: Contact
+    sent: bool
+    error: Optional[str] = None
+
+
+@dataclass
+class GroupAlertSummary:
+    """Per-contact outcomes of a group alert, in group order"""
+    outcomes: List[CallOutcome]
+
+    @property
+    def success_count(self) -> int:
+        return sum(1 for outcome in self.outcomes if outcome.sent)
+
+    @property
+    def error_messages(self) -> List[str]:
+        return [outcome.error for outcome in self.outcomes if outcome.error]
+
+
+def _personalize(contact: Contact, message: SafeMessage):
+    """(message for contact, None) or (None, failed CallOutcome)"""
+    personalized_message, message_validation = InputValidator.personalize_message(message, contact.name)
+    if personalized_message is None:
+        return None, CallOutcome(contact, False, f"Invalid message for {contact.name}: {message_validation.error_message}")
+    return personalized_message, None
+
+
+def _outcome(contact: Contact, sent: bool) -> CallOutcome:
+    if sent:
+        return CallOutcome(contact, True)
+    return CallOutcome(contact, False, f"Failed to send alert to {contact.name}")
+
+
+def create_call_dispatcher(notification_service):
+    """
+    The dispatcher selected by ONARRIVAL_CALL_DISPATCH: 'async' (default)
+    or 'threads'. Falls back to threads if aiohttp is not installed.
+    """
+    mode = os.getenv('ONARRIVAL_CALL_DISPATCH', 'async').lower()
+    if mode not in DISPATCH_MODES:
+        raise ValueError(f"Unknown call dispatch mode '{mode}'. Use one of: {', '.join(DISPATCH_MODES)}")
+
+    if mode == 'async':
+        dispatcher = AsyncCallDispatcher(notification_service)
+        if dispatcher.available:
+            return dispatcher
+        print("Warning: aiohttp is not installed; dispatching calls on threads")
+    return CallDispatcher(notification_service)
+
+
+class CallDispatcher:
+    """
+    Fans a group alert out across a bounded pool of worker threads.
+
+    Every call is a blocking Twilio REST round trip, so a group is alerted
+    in about the time of its slowest calls instead of the sum of all of
+    them. The pool is shared by all requests, which keeps the number of
+    calls in flight at max_workers however many groups are alerted at once.
+    """
+
+    def __init__(self, notification_service, max_workers: Optional[int] = None):
+        self.notification_service = notification_service
+        if max_workers is None:
+            max_workers = int(os.getenv('ONARRIVAL_CALL_CONCURRENCY', str(DEFAULT_CALL_CONCURRENCY)))
+        self.max_workers = max(1, max_workers)
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='call-dispatch')
+            return self._executor
+
+    def make_call(self, to_phone: str, message: str, business_name: str = None,
+                  include_follow_up: bool = False) -> bool:
+        """NotificationService.make_call(), on the calling thread"""
+        return self.notification_service.make_call(to_phone, message, business_name, include_follow_up)
+
+    def send_calls(self, calls: Sequence[dict]) -> List[Optional[str]]:
+        """
+        make_call(**call) for every call, concurrently. Returns the call
+        SIDs in order, None for calls that failed and NOT_ATTEMPTED for calls
+        the circuit breaker held back.
+        """
+        if self.max_workers == 1 or len(calls) <= 1:
+            return [self._call(call) for call in calls]
+
+        pool = self._pool()
+        return [future.result() for future in [pool.submit(self._call, call) for call in calls]]
+
+    def _call(self, call: dict) -> Optional[str]:
+        try:
+            return self.notification_service.place_call(**call)
+        except Exception as e:
+            print(f"Error sending to {call.get('to_phone')}: {e}")
+            return None
+
+    def send_group_alert(self, contacts: Sequence[Contact], message: SafeMessage,
+                         include_follow_up: bool = True) -> GroupAlertSummary:
+        """
+        Call every contact with message, its () placeholder replaced by the
+        contact's name. Returns once every call has finished.
+        """
+        if self.max_workers == 1 or len(contacts) <= 1:
+            return GroupAlertSummary([self._alert(contact, message, include_follow_up) for contact in contacts])
+
+        pool = self._pool()
+        futures = [pool.submit(self._alert, contact, message, include_follow_up) for contact in contacts]
+        return GroupAlertSummary([future.result() for future in futures])
+
+    def _alert(self, contact: Contact, message: SafeMessage, include_follow_up: bool) -> CallOutcome:
+        try:
+            personalized_message, failure = _personalize(contact, message)
+            if failure:
+                return failure
+            return _outcome(contact, self.notification_service.make_call(
+                contact.phone, personalized_message, include_follow_up=include_follow_up
+            ))
+        except Exception as e:
+            return CallOutcome(contact, False, f"Error sending to {contact.name}: {str(e)}")
+
+    def close(self) -> None:
+        """Wait for calls in flight and stop the worker threads"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class AsyncCallDispatcher:
+    """
+    Creates calls through Twilio's async HTTP client.
+
+    All calls of the process share one event loop, run on a background
+    thread, and one keep-alive aiohttp connection pool. A semaphore caps
+    the calls in flight at max_in_flight, so hundreds can be outstanding
+    without a thread each. The blocking methods are thin wrappers for the
+    web app and the GUI; asyncio code can await the *_async methods on the
+    dispatcher's loop.
+    """
+
+    def __init__(self, notification_service, max_in_flight: Optional[int] = None):
+        self.notification_service = notification_service
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv('ONARRIVAL_ASYNC_CALL_CONCURRENCY', str(DEFAULT_ASYNC_CALL_CONCURRENCY)))
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """False if Twilio's async HTTP client (aiohttp) is not installed"""
+        from services.notification_service import AsyncTwilioHttpClient
+        return AsyncTwilioHttpClient is not None
+
+    def _run(self, coroutine):
+        """Run coroutine on the dispatcher's loop and wait for its result"""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name='call-dispatch-loop', daemon=True)
+                self._thread.start()
+                asyncio.run_coroutine_threadsafe(self._open(), loop).result()
+                self._loop = loop
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _open(self) -> None:
+        # The aiohttp session and semaphore belong to the loop they are created on
+        self._client = self.notification_service.create_async_client()
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    def make_call(self, to_phone: str, message: str, business_name: str = None,
+                  include_follow_up: bool = False) -> bool:
+        """Blocking NotificationService.make_call() over the shared connection pool"""
+        return self._run(self.make_call_async(to_phone, message, business_name, include_follow_up))
+
+    async def make_call_async(self, to_phone: str, message: str, business_name: str = None,
+                              include_follow_up: bool = False) -> bool:
+        sid = await self.place_call_async(to_phone, message, business_name, include_follow_up)
+        return sid not in (None, NOT_ATTEMPTED)
+
+    async def place_call_async(self, to_phone: str, message: str, business_name: str = None,
+                               include_follow_up: bool = False) -> Optional[str]:
+        async with self._semaphore:
+            return await self.notification_service.place_call_async(
+                self._client, to_phone, message, business_name, include_follow_up
+            )
+
+    def send_calls(self, calls: Sequence[dict]) -> List[Optional[str]]:
+        """
+        make_call(**call) for every call, concurrently. Returns the call
+        SIDs in order, None for calls that failed and NOT_ATTEMPTED for calls
+        the circuit breaker held back.
+        """
+        return self._run(self.send_calls_async(calls))
+
+    async def send_calls_async(self, calls: Sequence[dict]) -> List[Optional[str]]:
+        return list(await asyncio.gather(*(self.place_call_async(**call) for call in calls)))
+
+    def send_group_alert(self, contacts: Sequence[Contact], message: SafeMessage,
+                         include_follow_up: bool = True) -> GroupAlertSummary:
+        """
+        Call every contact with message, its () placeholder replaced by the
+        contact's name. Returns once every call has finished.
+        """
+        return self._run(self.send_group_alert_async(contacts, message, include_follow_up))
+
+    async def send_group_alert_async(self, contacts: Sequence[Contact], message: SafeMessage,
+                                     include_follow_up: bool = True) -> GroupAlertSummary:
+        outcomes = await asyncio.gather(*(self._alert(contact, message, include_follow_up) for contact in contacts))
+        return GroupAlertSummary(list(outcomes))
+
+    async def _alert(self, contact: Contact, message: SafeMessage, include_follow_up: bool) -> CallOutcome:
+        try:
+            personalized_message, failure = _personalize(contact, message)
+            if failure:
+                return failure
+            return _outcome(contact, await self.make_call_async(
+                contact.phone, personalized_message, include_follow_up=include_follow_up
+            ))
+        except Exception as e:
+            return CallOutcome(contact, False, f"Error sending to {contact.name}: {str(e)}")
+
+    def close(self) -> None:
+        """Close the connection pool and stop the loop thread"""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def close_client():
+            if self._client is not None:
+                await self._client.http_client.close()
+
+        asyncio.run_coroutine_threadsafe(close_client(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
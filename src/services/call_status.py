@@ -0,0 +1,82 @@
+import atexit
+import threading
+from typing import Dict
+
+DEFAULT_FLUSH_SECONDS = 0.5
+DEFAULT_MAX_PENDING = 500
+
+
+def _sequence(fields: dict) -> int:
+    try:
+        return int(fields.get('SequenceNumber'))
+    except (TypeError, ValueError):
+        return -1
+
+
+class CallStatusBuffer:
+    """
+    Collects Twilio status callbacks and writes them to the outbox in batches.
+
+    Callbacks are keyed by call SID, so the several events of one call
+    (initiated, ringing, answered, completed) that arrive within a flush
+    window become one row write. A burst of callbacks from a large send is
+    written as one transaction every flush_seconds, or as soon as
+    max_pending calls are buffered. Pending statuses are flushed on close
+    or exit.
+    """
+
+    def __init__(self, outbox, flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        self.outbox = outbox
+        self.flush_seconds = flush_seconds
+        self.max_pending = max(1, max_pending)
+
+        self._pending: Dict[str, dict] = {}
+        self._flush_timer = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def record(self, sid: str, fields: dict) -> None:
+        """Buffer one callback; a newer event of the same call replaces older ones"""
+        with self._lock:
+            buffered = self._pending.get(sid)
+            if buffered is None:
+                self._pending[sid] = dict(fields)
+            elif _sequence(fields) >= _sequence(buffered):
+                # Later events omit fields reported earlier (and vice versa)
+                buffered.update(fields)
+            else:
+                for name, value in fields.items():
+                    buffered.setdefault(name, value)
+
+            if len(self._pending) < self.max_pending and self.flush_seconds > 0:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(self.flush_seconds, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered statuses now"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        try:
+            self.outbox.record_call_statuses(pending)
+        except Exception as e:
+            print(f"Error recording call statuses: {e}")
+            # Keep them for the next flush, behind anything newer
+            with self._lock:
+                for sid, fields in pending.items():
+                    self._pending.setdefault(sid, fields)
+
+    def close(self) -> None:
+        """Write the buffered statuses and drop the exit hook that would keep this buffer alive"""
+        self.flush()
+        atexit.unregister(self.flush)
@@ -1,80 +1,287 @@
-import json
 from models.contact import Contact
-from models.group import Group
+from models.group import Group, GroupSummary
+from services.binary_snapshot import BinarySnapshotBackend
+from services.contact_table import ColumnarStorageBackend
+from services.journal_backend import JournalStorageBackend
+from services.search_index import ContactSearchIndex
+from services.sqlite_backend import SqliteStorageBackend, migrate_json_to_sqlite
+from services.storage_backends import JsonStorageBackend, atomic_write_json, copy_contact
 from utils.validation import InputValidator, ValidationResult
+import hashlib
+import json
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Tuple
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Storage modes:
+#   json   - cache the parsed JSON files, re-parsing only when another
+#            process has changed them (default)
+#   memory - keep contacts and groups resident in memory with hash indexes,
+#            writing through to the JSON files only on mutation
+#   sqlite - store contacts, groups and memberships in a SQLite database
+#   journal - keep data resident and append each mutation to a journal,
+#             compacted into a snapshot in the background
+#   binary - memory-map a compact binary snapshot, decoding records only
+#            when they are read; changes go to a journal as in journal mode
+#   columnar - keep data resident in flat typed arrays (ContactTable) for
+#              very large books; changes go to a journal as in journal mode
+STORAGE_MODES = ('json', 'memory', 'sqlite', 'journal', 'binary', 'columnar')
+
+# Startup validation:
+#   background - validate changed data in a background thread (default)
+#   sync       - validate changed data before the constructor returns
+#   off        - skip startup validation
+# Data whose files are unchanged since the last validation is never rechecked.
+VALIDATION_MODES = ('background', 'sync', 'off')
+
+# error_code of a ValidationResult rejected because the record's version
+# didn't match the one the caller expected
+VERSION_CONFLICT = 'version_conflict'
+
+# Set operations of contacts_in_groups()
+GROUP_OPERATIONS = ('union', 'intersection', 'difference')
+
+# Use a directory in /tmp which is writable by the web app
+DEFAULT_DATA_DIR = '/tmp/onarrival_data'
 
 class ContactStorage:
-    def __init__(self):
+    def __init__(self, mode: Optional[str] = None, data_dir: Optional[str] = None):
         try:
-            # Use a directory in /tmp which is writable by the web app
-            self.data_dir = '/tmp/onarrival_data'
+            self.data_dir = data_dir or DEFAULT_DATA_DIR
             self.contacts_file = os.path.join(self.data_dir, 'contacts.json')
             self.groups_filename = os.path.join(self.data_dir, 'groups.json')
+            self.database_file = os.path.join(self.data_dir, 'contacts.db')
+            self.snapshot_file = os.path.join(self.data_dir, 'snapshot.json')
+            self.journal_file = os.path.join(self.data_dir, 'journal.ndjson')
+            self.binary_file = os.path.join(self.data_dir, 'contacts.bin')
+            self.binary_journal_file = os.path.join(self.data_dir, 'contacts.bin.journal')
+            self.table_file = os.path.join(self.data_dir, 'contacts.columns')
+            self.table_journal_file = os.path.join(self.data_dir, 'contacts.columns.journal')
+            self.watermark_file = os.path.join(self.data_dir, 'validated.json')
+            
+            self.mode = (mode or os.getenv('ONARRIVAL_STORAGE_MODE', 'json')).lower()
+            if self.mode not in STORAGE_MODES:
+                raise ValueError(f"Unknown storage mode '{self.mode}'. Use one of: {', '.join(STORAGE_MODES)}")
+            # Identifies this store (e.g. a tenant's shard) in data versions
+            self.store_id = hashlib.sha1(
+                f"{os.path.realpath(self.data_dir)}:{self.mode}".encode()
+            ).hexdigest()[:8]
+            
+            self.validation_mode = os.getenv('ONARRIVAL_STARTUP_VALIDATION', 'background').lower()
+            if self.validation_mode not in VALIDATION_MODES:
+                raise ValueError(f"Unknown startup validation '{self.validation_mode}'. Use one of: {', '.join(VALIDATION_MODES)}")
+            self._validation_thread = None
+            
+            # Built on the first search; _search_fingerprint is the backend
+            # fingerprint the index reflects, None until then. The index has
+            # its own lock so searches never take the storage session.
+            self._search_index = ContactSearchIndex()
+            self._search_fingerprint = None
+            self._search_lock = threading.Lock()
             
             # Create the directory if it doesn't exist
             os.makedirs(self.data_dir, exist_ok=True)
             
-            # Initialize empty contacts file if it doesn't exist
-            if not os.path.exists(self.contacts_file):
-                with open(self.contacts_file, 'w') as f:
-                    json.dump([], f)
-                    
-            # Initialize empty groups file if it doesn't exist
-            if not os.path.exists(self.groups_filename):
-                with open(self.groups_filename, 'w') as f:
-                    json.dump([], f)
+            self.backend = self._create_backend()
                     
-            # Validate existing data on startup
-            self._validate_existing_data()
+            # Validate existing data on startup, unless it is unchanged since last time
+            self._start_validation()
                     
         except Exception as e:
             print(f"Storage initialization error: {str(e)}")
             raise
 
+    def _create_backend(self):
+        """Create the persistence backend for the configured storage mode"""
+        if self.mode == 'sqlite':
+            backend = SqliteStorageBackend(self.database_file)
+            
+            # One-shot import of the legacy JSON files into a fresh database
+            if backend.is_empty() and not backend.get_meta('migrated_from_json'):
+                print(migrate_json_to_sqlite(self.contacts_file, self.groups_filename, backend))
+            
+            return backend
+        
+        if self.mode == 'journal':
+            return JournalStorageBackend(
+                self.snapshot_file,
+                self.journal_file,
+                self.contacts_file,
+                self.groups_filename,
+                compact_threshold=int(os.getenv('ONARRIVAL_JOURNAL_COMPACT_THRESHOLD', '1000'))
+            )
+        
+        if self.mode == 'binary':
+            return BinarySnapshotBackend(
+                self.binary_file,
+                self.binary_journal_file,
+                self.contacts_file,
+                self.groups_filename,
+                compact_threshold=int(os.getenv('ONARRIVAL_JOURNAL_COMPACT_THRESHOLD', '1000'))
+            )
+        
+        if self.mode == 'columnar':
+            return ColumnarStorageBackend(
+                self.table_file,
+                self.table_journal_file,
+                self.contacts_file,
+                self.groups_filename,
+                compact_threshold=int(os.getenv('ONARRIVAL_JOURNAL_COMPACT_THRESHOLD', '1000'))
+            )
+        
+        # Initialize empty contacts file if it doesn't exist
+        if not os.path.exists(self.contacts_file):
+            atomic_write_json(self.contacts_file, [])
+                
+        # Initialize empty groups file if it doesn't exist
+        if not os.path.exists(self.groups_filename):
+            atomic_write_json(self.groups_filename, [])
+        
+        # Optional group commit: collapse bursts of writes into one flush
+        commit_window = int(os.getenv('ONARRIVAL_GROUP_COMMIT_MS', '0')) / 1000.0
+        
+        return JsonStorageBackend(
+            self.contacts_file,
+            self.groups_filename,
+            resident=(self.mode == 'memory'),
+            commit_window=commit_window
+        )
+
+    def flush(self):
+        """Write out any changes still pending in a group-commit window"""
+        if hasattr(self.backend, 'flush'):
+            self.backend.flush()
+
+    def close(self):
+        """Flush pending changes and release files and connections"""
+        if self._validation_thread is not None:
+            self._validation_thread.join()
+        self.backend.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Batch several changes into one atomic write:
+
+            with storage.transaction():
+                for name, phone in members:
+                    storage.add_contact_to_group('Family', name, phone)
+
+        Each call still validates just its own record, reports failures as
+        usual and sees the changes made before it, but storage is written
+        once, when the block exits. Raise inside the block to discard all of
+        its changes. Other users of this storage wait until it commits.
+        """
+        try:
+            with self.backend.session():
+                with self.backend.transaction():
+                    yield self
+                    index_in_sync = self._search_index_in_sync()
+                if index_in_sync:
+                    self._search_fingerprint = self.backend.fingerprint()
+        except BaseException:
+            # The index may hold changes that were just discarded
+            self._search_fingerprint = None
+            raise
+
+    def _read_watermark(self) -> dict:
+        """Fingerprints of the data as last validated, keyed by storage mode"""
+        try:
+            with open(self.watermark_file, 'r') as f:
+                watermark = json.load(f)
+            return watermark if isinstance(watermark, dict) else {}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _record_watermark(self):
+        watermark = self._read_watermark()
+        watermark[self.mode] = self.backend.fingerprint()
+        atomic_write_json(self.watermark_file, watermark)
+
+    def _start_validation(self):
+        """Validate stored data only if it changed since it was last validated"""
+        if self.validation_mode == 'off':
+            return
+        
+        if self._read_watermark().get(self.mode) == self.backend.fingerprint():
+            return
+        
+        if self.validation_mode == 'sync':
+            self._validate_existing_data()
+        else:
+            self._validation_thread = threading.Thread(
+                target=self._validate_existing_data, name='storage-validation', daemon=True
+            )
+            self._validation_thread.start()
+
     def _validate_existing_data(self):
         """Validate existing data and repair/clean if necessary"""
         try:
-            # Validate and clean contacts
-            contacts = self.load_contacts()
-            cleaned_contacts = []
-            
-            for contact in contacts:
-                try:
-                    # Try to create a new contact to validate
-                    validated_contact = Contact(contact.name, contact.phone, validate=True)
-                    cleaned_contacts.append(validated_contact)
-                except ValueError as e:
-                    print(f"Warning: Removing invalid contact {contact.name} ({contact.phone}): {e}")
-            
-            if len(cleaned_contacts) != len(contacts):
-                print(f"Cleaned {len(contacts) - len(cleaned_contacts)} invalid contacts")
-                self.save_contacts(cleaned_contacts)
-            
-            # Validate and clean groups
-            groups = self.load_groups()
-            cleaned_groups = []
-            
-            for group in groups:
-                validation_result = group.validate_group_integrity()
-                if validation_result.is_valid:
-                    cleaned_groups.append(group)
-                else:
-                    print(f"Warning: Group '{group.name}' has issues: {validation_result.error_message}")
-                    # Try to repair the group by removing invalid contacts
-                    repaired_group = self._repair_group(group)
-                    if repaired_group:
-                        cleaned_groups.append(repaired_group)
-            
-            if len(cleaned_groups) != len(groups):
-                print(f"Cleaned {len(groups) - len(cleaned_groups)} invalid groups")
-                self.save_groups(cleaned_groups)
+            # Scan a snapshot without holding the storage session, so the
+            # pass does not block requests; only the repairs take it
+            invalid_contacts, invalid_groups = self._find_invalid_data()
+            if invalid_contacts or invalid_groups:
+                with self.transaction():
+                    self._repair_invalid_data(invalid_contacts, invalid_groups)
+            
+            # Everything stored now has been validated
+            self.flush()
+            self._record_watermark()
                 
         except Exception as e:
             print(f"Warning: Data validation failed: {e}")
 
+    def _find_invalid_data(self) -> Tuple[List[Contact], List[str]]:
+        """Invalid contacts, and names of groups with integrity issues, in the stored data"""
+        invalid_contacts = []
+        for contact in self.load_contacts():
+            try:
+                # Try to create a new contact to validate
+                Contact(contact.name, contact.phone, validate=True)
+            except ValueError as e:
+                print(f"Warning: Removing invalid contact {contact.name} ({contact.phone}): {e}")
+                invalid_contacts.append(contact)
+        
+        invalid_groups = []
+        for group in self.load_groups():
+            validation_result = group.validate_group_integrity()
+            if not validation_result.is_valid:
+                print(f"Warning: Group '{group.name}' has issues: {validation_result.error_message}")
+                invalid_groups.append(group.name)
+        
+        return invalid_contacts, invalid_groups
+
+    def _repair_invalid_data(self, invalid_contacts: List[Contact], invalid_groups: List[str]):
+        """Drop invalid contacts and repair invalid groups (inside a transaction)"""
+        removed = 0
+        for contact in invalid_contacts:
+            # Leave contacts that were changed since the scan
+            stored = self.backend.get_contact(contact.phone)
+            if stored is not None and stored.name == contact.name:
+                self.backend.delete_contact(contact.phone)
+                removed += 1
+        if removed:
+            print(f"Cleaned {removed} invalid contacts")
+        
+        removed = 0
+        for name in invalid_groups:
+            # Removing invalid contacts may already have fixed the group
+            group = self.backend.get_group(name)
+            if group is None or group.validate_group_integrity().is_valid:
+                continue
+            # Try to repair the group by removing invalid contacts
+            repaired_group = self._repair_group(group)
+            if repaired_group:
+                self.backend.replace_group(repaired_group)
+            else:
+                self.backend.delete_group(name)
+                removed += 1
+        if removed:
+            print(f"Cleaned {removed} invalid groups")
+
     def _repair_group(self, group: Group) -> Optional[Group]:
         """Try to repair a group by removing invalid contacts"""
         try:
@@ -103,11 +310,7 @@ class ContactStorage:
     def load_contacts(self) -> List[Contact]:
         """Load contacts from storage"""
         try:
-            with open(self.contacts_file, 'r') as f:
-                contacts_data = json.load(f)
-                return [Contact.from_dict(contact) for contact in contacts_data]
-        except FileNotFoundError:
-            return []
+            return self.backend.list_contacts()
         except Exception as e:
             print(f"Error loading contacts: {e}")
             return []
@@ -125,8 +328,7 @@ class ContactStorage:
             if len(phone_numbers) != len(set(phone_numbers)):
                 return ValidationResult(False, "Duplicate phone numbers detected")
             
-            with open(self.contacts_file, 'w') as f:
-                json.dump([contact.to_dict() for contact in contacts], f, indent=2)
+            self.backend.replace_contacts(contacts)
             
             return ValidationResult(True, sanitized_value=f"Successfully saved {len(contacts)} contacts")
             
@@ -141,111 +343,232 @@ class ContactStorage:
         if not validation_result.is_valid:
             return validation_result
         
-        # Load existing contacts
-        contacts = self.load_contacts()
-        
-        # Check for duplicates
-        if any(c.phone == contact.phone for c in contacts):
-            return ValidationResult(False, f"Contact with phone number {contact.phone} already exists")
-        
-        if any(c.name.lower() == contact.name.lower() for c in contacts):
-            return ValidationResult(False, f"Contact with name '{contact.name}' already exists")
-        
-        # Add contact and save
-        contacts.append(contact)
-        save_result = self.save_contacts(contacts)
-        
-        if save_result.is_valid:
+        try:
+            with self.backend.session():
+                # Check for duplicates
+                if self.backend.get_contact(contact.phone):
+                    return ValidationResult(False, f"Contact with phone number {contact.phone} already exists")
+                
+                if self.backend.find_contact_by_name(contact.name):
+                    return ValidationResult(False, f"Contact with name '{contact.name}' already exists")
+                
+                # Add contact and save
+                index_in_sync = self._search_index_in_sync()
+                self.backend.insert_contact(contact)
+                self._update_search_index(index_in_sync, added=[contact])
+            
             return ValidationResult(True, sanitized_value=f"Contact {contact.name} added successfully")
-        else:
-            return save_result
-
-    def update_contact(self, old_phone: str, new_name: str, new_phone: str) -> ValidationResult:
-        """Update an existing contact with validation"""
-        contacts = self.load_contacts()
-        
-        # Find the contact to update
-        contact_to_update = None
-        for contact in contacts:
-            if contact.phone == old_phone:
-                contact_to_update = contact
-                break
-        
-        if not contact_to_update:
-            return ValidationResult(False, f"Contact with phone {old_phone} not found")
         
-        # Validate new values
-        name_result = InputValidator.validate_contact_name(new_name)
-        if not name_result.is_valid:
-            return ValidationResult(False, f"Invalid name: {name_result.error_message}")
-        
-        phone_result = InputValidator.validate_phone_number(new_phone)
-        if not phone_result.is_valid:
-            return ValidationResult(False, f"Invalid phone: {phone_result.error_message}")
+        except Exception as e:
+            return ValidationResult(False, f"Failed to save contacts: {str(e)}")
+
+    def update_contact(self, old_phone: str, new_name: str, new_phone: str,
+                       expected_version: Optional[int] = None) -> ValidationResult:
+        """
+        Update an existing contact with validation.
         
-        # Check for duplicates (excluding the current contact)
-        for contact in contacts:
-            if contact != contact_to_update:
-                if contact.phone == phone_result.sanitized_value:
+        If expected_version is given, the update only applies if the contact
+        is still at that version (compare-and-swap).
+        """
+        try:
+            with self.backend.session():
+                # Find the contact to update
+                existing = self.backend.get_contact(old_phone)
+                if not existing:
+                    return ValidationResult(False, f"Contact with phone {old_phone} not found")
+                
+                conflict = self._version_conflict(f"Contact {existing.name}", existing.version, expected_version)
+                if conflict:
+                    return conflict
+                
+                # Validate new values
+                name_result = InputValidator.validate_contact_name(new_name)
+                if not name_result.is_valid:
+                    return ValidationResult(False, f"Invalid name: {name_result.error_message}")
+                
+                phone_result = InputValidator.validate_phone_number(new_phone)
+                if not phone_result.is_valid:
+                    return ValidationResult(False, f"Invalid phone: {phone_result.error_message}")
+                
+                # Check for duplicates (excluding the current contact)
+                phone_owner = self.backend.get_contact(phone_result.sanitized_value)
+                if phone_owner and phone_owner.phone != old_phone:
                     return ValidationResult(False, f"Phone number {phone_result.sanitized_value} already exists")
-                if contact.name.lower() == name_result.sanitized_value.lower():
+                
+                name_owner = self.backend.find_contact_by_name(name_result.sanitized_value)
+                if name_owner and name_owner.phone != old_phone:
                     return ValidationResult(False, f"Contact name '{name_result.sanitized_value}' already exists")
-        
-        # Update the contact
-        contact_to_update.name = name_result.sanitized_value
-        contact_to_update.phone = phone_result.sanitized_value
-        
-        # Save contacts
-        save_result = self.save_contacts(contacts)
-        
-        if save_result.is_valid:
+                
+                # Update the contact
+                updated = Contact(name_result.sanitized_value, phone_result.sanitized_value, validate=False)
+                index_in_sync = self._search_index_in_sync()
+                self.backend.update_contact(old_phone, updated)
+                self._update_search_index(index_in_sync, removed=[old_phone],
+                                          added=[self.backend.get_contact(updated.phone)])
+            
             return ValidationResult(True, sanitized_value=f"Contact updated successfully")
-        else:
-            return save_result
+        
+        except Exception as e:
+            return ValidationResult(False, f"Failed to save contacts: {str(e)}")
 
-    def delete_contact(self, contact: Contact) -> ValidationResult:
-        """Delete a contact with validation"""
+    def delete_contact(self, contact: Contact, expected_version: Optional[int] = None) -> ValidationResult:
+        """Delete a contact with validation, optionally only if it is still at expected_version"""
         try:
-            contacts = self.load_contacts()
-            original_count = len(contacts)
-            
-            # Remove contact
-            contacts = [c for c in contacts if c.phone != contact.phone]
-            
-            if len(contacts) == original_count:
-                return ValidationResult(False, f"Contact {contact.name} not found")
-            
-            # Also remove from all groups
-            groups = self.load_groups()
-            for group in groups:
-                group.contacts = [c for c in group.contacts if c.phone != contact.phone]
-            
-            # Save both contacts and groups
-            contact_save_result = self.save_contacts(contacts)
-            if not contact_save_result.is_valid:
-                return contact_save_result
-            
-            group_save_result = self.save_groups(groups)
-            if not group_save_result.is_valid:
-                return group_save_result
+            with self.backend.session():
+                conflict = self._contact_version_conflict(contact.phone, expected_version)
+                if conflict:
+                    return conflict
+                
+                # Remove contact (and drop it from all groups)
+                index_in_sync = self._search_index_in_sync()
+                if not self.backend.delete_contact(contact.phone):
+                    return ValidationResult(False, f"Contact {contact.name} not found")
+                self._update_search_index(index_in_sync, removed=[contact.phone])
             
             return ValidationResult(True, sanitized_value=f"Contact {contact.name} deleted successfully")
             
         except Exception as e:
             return ValidationResult(False, f"Failed to delete contact: {str(e)}")
 
+    def import_contacts(self, records: Iterable[dict], batch_size: int = 1000,
+                        processes: int = 1) -> ValidationResult:
+        """
+        Bulk-add contacts from an iterable of {"name", "phone"} records.
+
+        Records are consumed in batches, so the source can be a stream. Rows
+        that fail validation or duplicate an existing contact (or an earlier
+        row) are skipped; the accepted contacts are persisted with one write.
+        Validation runs without the storage session, which is only taken to
+        check the accepted rows against stored contacts and insert them.
+        With processes > 1, large batches are validated across a process pool
+        (see InputValidator.validate_many).
+        """
+        try:
+            accepted = []
+            seen_phones = set()
+            seen_names = set()
+            duplicates = 0
+            invalid = 0
+            row_number = 0
+
+            records = iter(records)
+            while True:
+                batch = list(islice(records, batch_size))
+                if not batch:
+                    break
+
+                name_results = InputValidator.validate_many(
+                    'contact_name', [record.get('name') or '' for record in batch], processes)
+                phone_results = InputValidator.validate_many(
+                    'phone', [record.get('phone') or '' for record in batch], processes)
+                for name_result, phone_result in zip(name_results, phone_results):
+                    row_number += 1
+                    if not name_result.is_valid or not phone_result.is_valid:
+                        invalid += 1
+                        if invalid <= 10:
+                            error = name_result.error_message or phone_result.error_message
+                            print(f"Warning: Skipping row {row_number}: {error}")
+                        continue
+
+                    name, phone = name_result.sanitized_value, phone_result.sanitized_value
+                    key = name.lower()
+                    if phone in seen_phones or key in seen_names:
+                        duplicates += 1
+                        continue
+
+                    seen_phones.add(phone)
+                    seen_names.add(key)
+                    accepted.append(Contact(name, phone, validate=False))
+
+            imported = []
+            if accepted:
+                with self.backend.session():
+                    for contact in accepted:
+                        if self.backend.get_contact(contact.phone) or self.backend.find_contact_by_name(contact.name):
+                            duplicates += 1
+                        else:
+                            imported.append(contact)
+
+                    if imported:
+                        index_in_sync = self._search_index_in_sync()
+                        self.backend.insert_contacts(imported)
+                        self._update_search_index(index_in_sync, added=imported)
+
+            return ValidationResult(
+                True,
+                sanitized_value=f"Imported {len(imported)} contacts "
+                                f"({duplicates} duplicates, {invalid} invalid rows skipped)"
+            )
+
+        except Exception as e:
+            return ValidationResult(False, f"Failed to import contacts: {str(e)}")
+
+    def iter_contacts(self) -> Iterator[Contact]:
+        """Iterate over stored contacts without building the full list"""
+        return self.backend.iter_contacts()
+
+    def search(self, query: str, limit: int = 20) -> List[Contact]:
+        """
+        Find contacts by name prefix (of the full name or any word in it) or
+        by phone digit prefix, for typeahead.
+
+        The index is built on first use and then kept up to date by this
+        storage's own mutations. Changes made any other way (another worker,
+        save_contacts, startup repair) are noticed through the backend
+        fingerprint and trigger a rebuild.
+
+        A search is a plain read: it does not take the storage session (in
+        SQLite mode an IMMEDIATE transaction), so typing never contends with
+        writers. The fingerprint is read before the contacts, so a change
+        that lands during a rebuild only makes the next search rebuild again.
+        """
+        try:
+            fingerprint = self.backend.fingerprint()
+            if fingerprint != self._search_fingerprint:
+                contacts = list(self.backend.iter_contacts())
+                with self._search_lock:
+                    self._search_index.rebuild(contacts)
+                    self._search_fingerprint = fingerprint
+            with self._search_lock:
+                return [copy_contact(c) for c in self._search_index.search(query, limit)]
+        except Exception as e:
+            print(f"Error searching contacts: {e}")
+            return []
+
+    def _search_index_in_sync(self) -> bool:
+        """Whether the search index reflects the stored data (backend session held)"""
+        return self._search_fingerprint is not None and self._search_fingerprint == self.backend.fingerprint()
+
+    def _update_search_index(self, in_sync: bool, removed=(), added=()):
+        """Apply a change just made through this storage to an in-sync index"""
+        if not in_sync:
+            return
+        with self._search_lock:
+            for phone in removed:
+                self._search_index.remove(phone)
+            for contact in added:
+                contact = copy_contact(contact)
+                # Newly stored records start at version 1
+                contact.version = contact.version or 1
+                self._search_index.add(contact)
+            self._search_fingerprint = self.backend.fingerprint()
+
     def load_groups(self) -> List[Group]:
         """Load groups from storage"""
         try:
-            with open(self.groups_filename, 'r') as f:
-                groups_data = json.load(f)
-                return [Group.from_dict(group_data) for group_data in groups_data]
-        except FileNotFoundError:
-            return []
+            return self.backend.list_groups()
         except Exception as e:
             print(f"Error loading groups: {e}")
             return []
 
+    def load_group_summaries(self) -> List[GroupSummary]:
+        """Name, version and contact count of every group, without loading members"""
+        try:
+            return self.backend.group_summaries()
+        except Exception as e:
+            print(f"Error loading group summaries: {e}")
+            return []
+
     def save_groups(self, groups: List[Group]) -> ValidationResult:
         """Save groups to storage with validation"""
         try:
@@ -263,8 +586,7 @@ class ContactStorage:
             if len(group_names) != len(set(group_names)):
                 return ValidationResult(False, "Duplicate group names detected")
             
-            with open(self.groups_filename, 'w') as f:
-                json.dump([group.to_dict() for group in groups], f, indent=2)
+            self.backend.replace_groups(groups)
             
             return ValidationResult(True, sanitized_value=f"Successfully saved {len(groups)} groups")
             
@@ -279,146 +601,231 @@ class ContactStorage:
         if not validation_result.is_valid:
             return validation_result
         
-        # Load existing groups
-        groups = self.load_groups()
-        
-        # Check for duplicates
-        if any(g.name.lower() == group.name.lower() for g in groups):
-            return ValidationResult(False, f"Group with name '{group.name}' already exists")
-        
-        # Add group and save
-        groups.append(group)
-        save_result = self.save_groups(groups)
-        
-        if save_result.is_valid:
+        try:
+            with self.backend.session():
+                # Check for duplicates
+                if self.backend.has_group(group.name):
+                    return ValidationResult(False, f"Group with name '{group.name}' already exists")
+                
+                # Add group and save
+                self.backend.insert_group(group)
+            
             return ValidationResult(True, sanitized_value=f"Group '{group.name}' created successfully")
-        else:
-            return save_result
+        
+        except Exception as e:
+            return ValidationResult(False, f"Failed to save groups: {str(e)}")
 
-    def delete_group(self, group_name: str) -> ValidationResult:
-        """Delete a group with validation"""
+    def delete_group(self, group_name: str, expected_version: Optional[int] = None) -> ValidationResult:
+        """Delete a group with validation, optionally only if it is still at expected_version"""
         try:
-            groups = self.load_groups()
-            original_count = len(groups)
-            
-            # Remove group
-            groups = [g for g in groups if g.name.lower() != group_name.lower()]
-            
-            if len(groups) == original_count:
-                return ValidationResult(False, f"Group '{group_name}' not found")
-            
-            # Save groups
-            save_result = self.save_groups(groups)
+            with self.backend.session():
+                conflict = self._group_version_conflict(group_name, expected_version)
+                if conflict:
+                    return conflict
+                
+                if not self.backend.delete_group(group_name):
+                    return ValidationResult(False, f"Group '{group_name}' not found")
             
-            if save_result.is_valid:
-                return ValidationResult(True, sanitized_value=f"Group '{group_name}' deleted successfully")
-            else:
-                return save_result
+            return ValidationResult(True, sanitized_value=f"Group '{group_name}' deleted successfully")
                 
         except Exception as e:
             return ValidationResult(False, f"Failed to delete group: {str(e)}")
 
-    def update_group(self, group: Group) -> ValidationResult:
-        """Update an existing group with validation"""
+    def update_group(self, group: Group, expected_version: Optional[int] = None) -> ValidationResult:
+        """
+        Update an existing group with validation.
+        
+        If expected_version is given, the update only applies if the stored
+        group is still at that version, so concurrent editors can't silently
+        overwrite each other.
+        """
         try:
             # Validate the group
             validation_result = group.validate_group_integrity()
             if not validation_result.is_valid:
                 return validation_result
             
-            groups = self.load_groups()
-            
-            # Find and update the group
-            for i, existing_group in enumerate(groups):
-                if existing_group.name.lower() == group.name.lower():
-                    groups[i] = group
-                    break
-            else:
-                return ValidationResult(False, f"Group '{group.name}' not found")
-            
-            # Save groups
-            save_result = self.save_groups(groups)
+            with self.backend.session():
+                conflict = self._group_version_conflict(group.name, expected_version)
+                if conflict:
+                    return conflict
+                
+                # Members reference shared contacts, so their names must agree
+                for contact in group.contacts:
+                    conflict = self._member_conflict(contact)
+                    if conflict:
+                        return conflict
+                
+                # Find and update the group
+                if not self.backend.replace_group(group):
+                    return ValidationResult(False, f"Group '{group.name}' not found")
             
-            if save_result.is_valid:
-                return ValidationResult(True, sanitized_value=f"Group '{group.name}' updated successfully")
-            else:
-                return save_result
+            return ValidationResult(True, sanitized_value=f"Group '{group.name}' updated successfully")
                 
         except Exception as e:
             return ValidationResult(False, f"Failed to update group: {str(e)}")
 
-    def add_contact_to_group(self, group_name: str, contact_name: str, contact_phone: str) -> ValidationResult:
-        """Add a contact to a group with validation"""
+    def add_contact_to_group(self, group_name: str, contact_name: str, contact_phone: str,
+                             expected_version: Optional[int] = None) -> ValidationResult:
+        """Add a contact to a group with validation, optionally only if the group is at expected_version"""
         try:
-            # Load groups
-            groups = self.load_groups()
-            
-            # Find the group
-            target_group = None
-            for group in groups:
-                if group.name.lower() == group_name.lower():
-                    target_group = group
-                    break
-            
-            if not target_group:
-                return ValidationResult(False, f"Group '{group_name}' not found")
-            
-            # Add contact to group with validation
-            add_result = target_group.add_contact_by_details(contact_name, contact_phone)
-            if not add_result.is_valid:
-                return add_result
-            
-            # Save groups
-            save_result = self.save_groups(groups)
+            with self.backend.session():
+                # Find the group
+                if not self.backend.has_group(group_name):
+                    return ValidationResult(False, f"Group '{group_name}' not found")
+                
+                conflict = self._group_version_conflict(group_name, expected_version)
+                if conflict:
+                    return conflict
+                
+                # Validate the contact
+                contact, validation_result = Contact.create_validated(contact_name, contact_phone)
+                if not validation_result.is_valid:
+                    return validation_result
+                
+                # Check for duplicates within the group
+                if self.backend.group_member(group_name, contact.phone):
+                    return ValidationResult(False, f"Contact with phone number {contact.phone} already exists in group")
+                
+                if self.backend.group_member_by_name(group_name, contact.name):
+                    return ValidationResult(False, f"Contact with name '{contact.name}' already exists in group")
+                
+                conflict = self._member_conflict(contact)
+                if conflict:
+                    return conflict
+                
+                # A member not yet in the contacts table is added to it
+                created = self.backend.get_contact(contact.phone) is None
+                index_in_sync = self._search_index_in_sync()
+                self.backend.add_group_member(group_name, contact)
+                self._update_search_index(index_in_sync, added=[contact] if created else [])
             
-            if save_result.is_valid:
-                return ValidationResult(True, sanitized_value=f"Contact added to group '{group_name}' successfully")
-            else:
-                return save_result
+            return ValidationResult(True, sanitized_value=f"Contact added to group '{group_name}' successfully")
                 
         except Exception as e:
             return ValidationResult(False, f"Failed to add contact to group: {str(e)}")
 
-    def remove_contact_from_group(self, group_name: str, contact_phone: str) -> ValidationResult:
-        """Remove a contact from a group with validation"""
+    def _member_conflict(self, contact: Contact) -> Optional[ValidationResult]:
+        """
+        Group members are references into the contacts table. Adding a member
+        whose phone is already stored under a different name would silently
+        rename or shadow that contact, and one whose name belongs to another
+        phone would duplicate a contact name, so both are rejected instead.
+        """
+        existing = self.backend.get_contact(contact.phone)
+        if existing and existing.name.lower() != contact.name.lower():
+            return ValidationResult(False, f"Phone number {contact.phone} already belongs to contact '{existing.name}'")
+
+        name_owner = self.backend.find_contact_by_name(contact.name)
+        if name_owner and name_owner.phone != contact.phone:
+            return ValidationResult(False, f"Contact with name '{contact.name}' already exists")
+        return None
+
+    def remove_contact_from_group(self, group_name: str, contact_phone: str,
+                                  expected_version: Optional[int] = None) -> ValidationResult:
+        """Remove a contact from a group with validation, optionally only if the group is at expected_version"""
         try:
-            groups = self.load_groups()
-            
-            # Find the group
-            target_group = None
-            for group in groups:
-                if group.name.lower() == group_name.lower():
-                    target_group = group
-                    break
-            
-            if not target_group:
-                return ValidationResult(False, f"Group '{group_name}' not found")
-            
-            # Remove contact from group
-            remove_result = target_group.remove_contact(contact_phone)
-            if not remove_result.is_valid:
-                return remove_result
-            
-            # Save groups
-            save_result = self.save_groups(groups)
+            with self.backend.session():
+                # Find the group
+                if not self.backend.has_group(group_name):
+                    return ValidationResult(False, f"Group '{group_name}' not found")
+                
+                conflict = self._group_version_conflict(group_name, expected_version)
+                if conflict:
+                    return conflict
+                
+                # Remove contact from group
+                if not self.backend.remove_group_member(group_name, contact_phone):
+                    return ValidationResult(False, f"No contact found with phone number {contact_phone}")
             
-            if save_result.is_valid:
-                return ValidationResult(True, sanitized_value=f"Contact removed from group '{group_name}' successfully")
-            else:
-                return save_result
+            return ValidationResult(True, sanitized_value=f"Contact removed from group '{group_name}' successfully")
                 
         except Exception as e:
             return ValidationResult(False, f"Failed to remove contact from group: {str(e)}")
 
+    def _version_conflict(self, label: str, current: int, expected: Optional[int]) -> Optional[ValidationResult]:
+        """Compare-and-swap check: fail if the record changed since the caller read it"""
+        if expected is None or expected == current:
+            return None
+        return ValidationResult(
+            False,
+            f"{label} was modified by someone else (now at version {current}, expected {expected})",
+            error_code=VERSION_CONFLICT
+        )
+
+    def _contact_version_conflict(self, phone: str, expected: Optional[int]) -> Optional[ValidationResult]:
+        if expected is None:
+            return None
+        contact = self.backend.get_contact(phone)
+        if contact is None:
+            return None
+        return self._version_conflict(f"Contact {contact.name}", contact.version, expected)
+
+    def _group_version_conflict(self, group_name: str, expected: Optional[int]) -> Optional[ValidationResult]:
+        if expected is None:
+            return None
+        group = self.backend.get_group(group_name)
+        if group is None:
+            return None
+        return self._version_conflict(f"Group '{group.name}'", group.version, expected)
+
+    def data_version(self) -> str:
+        """
+        Opaque token that changes whenever contacts or groups change. It
+        names the store as well as the backend's version, so two stores
+        (tenant shards) never share a token.
+        """
+        return f"{self.store_id}.{self.backend.data_version()}"
+
     def get_group_by_name(self, name: str) -> Optional[Group]:
         """Get a group by name"""
-        groups = self.load_groups()
-        return next((g for g in groups if g.name.lower() == name.lower()), None)
+        return self.backend.get_group(name)
+
+    def get_group_contacts_page(self, group_name: str, cursor: Optional[str] = None,
+                                limit: int = 100) -> Optional[Tuple[List[Contact], Optional[str]]]:
+        """
+        One page of a group's contacts in membership order, plus an opaque
+        cursor for the next page (None on the last page). Returns None if the
+        group doesn't exist; raises ValueError for a malformed cursor.
+        """
+        return self.backend.group_members_page(group_name, cursor, limit)
+
+    def contacts_in_groups(self, group_names: List[str], operation: str = 'union') -> Optional[List[Contact]]:
+        """
+        Contacts in any of the groups ('union', each contact once), in all of
+        them ('intersection'), or in the first group and none of the others
+        ('difference'). Returns None if a group doesn't exist.
+        """
+        if operation not in GROUP_OPERATIONS:
+            raise ValueError(f"Unknown group operation '{operation}'. Use one of: {', '.join(GROUP_OPERATIONS)}")
+        if not group_names:
+            return []
+        
+        # The columnar backend works on sorted member arrays directly
+        if hasattr(self.backend, 'combine_groups'):
+            return self.backend.combine_groups(group_names, operation)
+        
+        with self.backend.session():
+            groups = [self.backend.get_group(name) for name in group_names]
+        if None in groups:
+            return None
+        
+        others = [{contact.phone for contact in group.contacts} for group in groups[1:]]
+        if operation == 'union':
+            candidates = [contact for group in groups for contact in group.contacts]
+        elif operation == 'intersection':
+            candidates = [c for c in groups[0].contacts if all(c.phone in phones for phones in others)]
+        else:
+            candidates = [c for c in groups[0].contacts if not any(c.phone in phones for phones in others)]
+        
+        unique = {}
+        for contact in candidates:
+            unique.setdefault(contact.phone, contact)
+        return list(unique.values())
 
     def get_contact_by_phone(self, phone: str) -> Optional[Contact]:
         """Get a contact by phone number"""
-        contacts = self.load_contacts()
-        return next((c for c in contacts if c.phone == phone), None)
+        return self.backend.get_contact(phone)
 
     def validate_storage_integrity(self) -> ValidationResult:
         """Validate the integrity of all stored data"""
@@ -0,0 +1,945 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: set operations and index builds fall back to pure Python
+    np = None
+
+from models.contact import Contact
+from models.group import Group, GroupSummary
+from services.journal_backend import append_journal_entry, replay_journal
+from services.storage_backends import (
+    atomic_write_buffers, file_fingerprint, load_generation, name_key, parse_group_record
+)
+from utils.validation import InputValidator
+
+# File layout: MAGIC, u32 length of a JSON header, the header, then the raw
+# bytes of each column in COLUMNS order, the packed names and each group's
+# member rows in join order. The header records the array lengths and the
+# byte order the arrays were written in. Version 1 files stored member rows
+# ascending; they are read as if the members joined in that order.
+MAGIC = b'OACT'
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+U32 = struct.Struct('<I')
+
+# Per-row columns and the sorted indexes over them, all int64 arrays
+COLUMNS = ('phones', 'versions', 'name_offsets', 'name_lengths', 'name_hashes',
+           'phone_keys', 'phone_rows', 'name_keys', 'name_rows')
+
+# Batches larger than this rebuild the indexes instead of inserting into them
+REINDEX_BATCH = 256
+
+
+def phone_number(phone: str) -> Optional[int]:
+    """An E.164 phone number as an integer ('+15551234567' -> 15551234567), or None if it isn't E.164"""
+    if not InputValidator.E164_PATTERN.match(phone):
+        return None
+    return int(phone[1:])
+
+
+def phone_string(number: int) -> str:
+    return f'+{number}'
+
+
+def name_hash(key: str) -> int:
+    """Signed 64-bit hash of a name key, stable across processes"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def _numpy_view(values: array):
+    """Zero-copy NumPy view of an int64 array; don't keep it across changes to ``values``"""
+    if not values:
+        return np.empty(0, dtype=np.int64)
+    return np.frombuffer(values, dtype=np.int64)
+
+
+def _from_numpy(values) -> array:
+    return array('q', values.astype(np.int64).tobytes())
+
+
+class ColumnGroup:
+    """
+    A group's member rows, twice: in join order for listing and paging, and
+    ascending for membership tests and set operations. Each member has a
+    join sequence number, so either copy finds the member in the other.
+    Sequence numbers start from 0 whenever the group is built (e.g. on
+    load) and grow as members join.
+    """
+    __slots__ = ('name', 'version', 'order', 'seqs', 'members', 'joined')
+
+    def __init__(self, name: str, version: int, rows: Iterable[int] = ()):
+        """rows are the member rows in join order (repeats ignored)"""
+        self.name = name
+        self.version = version
+        order = list(dict.fromkeys(rows))
+        by_row = sorted(range(len(order)), key=order.__getitem__)
+        self.order = array('q', order)                             # member rows, in join order
+        self.seqs = array('q', range(len(order)))                  # join sequence of each, ascending
+        self.members = array('q', map(order.__getitem__, by_row))  # member rows, ascending
+        self.joined = array('q', by_row)                           # join sequence of each
+
+
+class ContactTable:
+    """
+    Contacts and groups in flat int64 arrays instead of Python objects.
+
+    Row ``i`` is one contact: ``phones[i]`` is its E.164 number as an integer
+    (0 once the row is deleted) and ``versions[i]`` its version. Names are
+    UTF-8 in one packed buffer, ``name_lengths[i]`` bytes from
+    ``name_offsets[i]``. Sorted key/row arrays index live rows by phone number
+    and by a hash of the name key, so lookups are binary searches.
+
+    A group keeps its member rows in join order and as a sorted array (see
+    ColumnGroup): a membership test is a binary search, and unions,
+    intersections and differences of groups are merges of sorted arrays,
+    vectorized with NumPy when it is installed.
+
+    Deleted rows and renamed contacts leave unused space until vacuumed()
+    packs the table. Contacts and groups go in and come out as Contact and
+    Group objects, so nothing outside this class sees the arrays.
+    """
+
+    def __init__(self):
+        self.phones = array('q')
+        self.versions = array('q')
+        self.name_offsets = array('q')
+        self.name_lengths = array('q')
+        self.name_hashes = array('q')
+        self.names = bytearray()
+        self.phone_keys = array('q')    # live phone numbers, ascending
+        self.phone_rows = array('q')    # row of each phone_keys entry
+        self.name_keys = array('q')     # name hashes of live rows, ascending
+        self.name_rows = array('q')
+        self.groups: Dict[str, ColumnGroup] = {}   # group key -> group, in creation order
+        self.live = 0
+        self.unused_name_bytes = 0
+
+    def __len__(self) -> int:
+        return self.live
+
+    # ------------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_contacts(cls, contacts: Iterable[Contact], groups: Iterable[Group] = ()) -> 'ContactTable':
+        """Build a table from Contact and Group objects; group members not among ``contacts`` are dropped"""
+        unique = {}
+        for contact in contacts:
+            unique.setdefault(contact.phone, contact)
+        table = cls()
+        table.extend((c.name, c.phone, c.version or 1) for c in unique.values())
+        for group in groups:
+            rows = (table.find(c.phone) for c in group.contacts)
+            table.put_group(group.name, group.version or 1, [row for row in rows if row is not None])
+        return table
+
+    def to_contacts(self) -> List[Contact]:
+        return [self.contact_at(row) for row in self.rows()]
+
+    def to_groups(self) -> List[Group]:
+        return [self.group_at(group) for group in self.groups.values()]
+
+    def contact_at(self, row: int) -> Contact:
+        return Contact(self.name_at(row), phone_string(self.phones[row]), validate=False,
+                       version=self.versions[row])
+
+    def group_at(self, group: ColumnGroup) -> Group:
+        contacts = [self.contact_at(row) for row in group.order]
+        return Group(group.name, contacts, validate=False, version=group.version)
+
+    def name_at(self, row: int) -> str:
+        start = self.name_offsets[row]
+        return self.names[start:start + self.name_lengths[row]].decode('utf-8')
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[int]:
+        """Live rows in [start, stop), in insertion order"""
+        phones = self.phones
+        stop = len(phones) if stop is None else stop
+        return (row for row in range(start, stop) if phones[row])
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def find_number(self, number: int) -> Optional[int]:
+        i = bisect_left(self.phone_keys, number)
+        if i < len(self.phone_keys) and self.phone_keys[i] == number:
+            return self.phone_rows[i]
+        return None
+
+    def find(self, phone: str) -> Optional[int]:
+        """Row of the contact with this phone number"""
+        number = phone_number(phone)
+        return self.find_number(number) if number is not None else None
+
+    def find_by_name(self, name: str) -> Optional[int]:
+        """Row of the contact with this name, ignoring case"""
+        key = name_key(name)
+        hashed = name_hash(key)
+        i = bisect_left(self.name_keys, hashed)
+        while i < len(self.name_keys) and self.name_keys[i] == hashed:
+            row = self.name_rows[i]
+            if name_key(self.name_at(row)) == key:
+                return row
+            i += 1
+        return None
+
+    # ------------------------------------------------------------------
+    # Contacts
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _checked_number(phone: str) -> int:
+        number = phone_number(phone)
+        if number is None:
+            raise ValueError(f"'{phone}' is not an E.164 phone number")
+        return number
+
+    def _pack_name(self, name: str) -> Tuple[int, int, int]:
+        """Append a name to the packed buffer; returns (offset, length, hash)"""
+        encoded = name.encode('utf-8')
+        offset = len(self.names)
+        self.names += encoded
+        return offset, len(encoded), name_hash(name_key(name))
+
+    @staticmethod
+    def _index_add(keys: array, rows: array, key: int, row: int):
+        i = bisect_right(keys, key)
+        keys.insert(i, key)
+        rows.insert(i, row)
+
+    @staticmethod
+    def _index_remove(keys: array, rows: array, key: int, row: int):
+        i = bisect_left(keys, key)
+        while i < len(keys) and keys[i] == key:
+            if rows[i] == row:
+                del keys[i]
+                del rows[i]
+                return
+            i += 1
+
+    def _append_rows(self, numbers: list, versions: list, names: List[bytes], hashes: list):
+        """Append unindexed rows in bulk: numbers, versions, UTF-8 names and name hashes"""
+        if not numbers:
+            return
+        lengths = [len(name) for name in names]
+        self.name_offsets.extend(accumulate(lengths[:-1], initial=len(self.names)))
+        self.name_lengths.extend(lengths)
+        self.names += b''.join(names)
+        self.phones.extend(numbers)
+        self.versions.extend(versions)
+        self.name_hashes.extend(hashes)
+        self.live += len(numbers)
+
+    def append(self, name: str, phone: str, version: int = 1) -> int:
+        """Add a contact whose phone number isn't in the table yet; returns its row"""
+        self.extend([(name, phone, version)])
+        return len(self.phones) - 1
+
+    def extend(self, records: Iterable[Tuple[str, str, int]]):
+        """
+        Add (name, phone, version) records whose phone numbers aren't in the
+        table yet. Every number is checked before anything is added.
+        """
+        records = list(records)
+        numbers = [self._checked_number(phone) for _, phone, _ in records]
+        first = len(self.phones)
+        self._append_rows(numbers, [version for _, _, version in records],
+                          [name.encode('utf-8') for name, _, _ in records],
+                          [name_hash(name_key(name)) for name, _, _ in records])
+
+        if len(records) > REINDEX_BATCH:
+            self.reindex()
+            return
+        for row in range(first, len(self.phones)):
+            self._index_add(self.phone_keys, self.phone_rows, self.phones[row], row)
+            self._index_add(self.name_keys, self.name_rows, self.name_hashes[row], row)
+
+    def update(self, row: int, name: str, phone: str, version: int):
+        """Change a contact's name and phone in place; its group memberships stay"""
+        number = self._checked_number(phone)
+        if number != self.phones[row]:
+            self._index_remove(self.phone_keys, self.phone_rows, self.phones[row], row)
+            self.phones[row] = number
+            self._index_add(self.phone_keys, self.phone_rows, number, row)
+        if name != self.name_at(row):
+            self._index_remove(self.name_keys, self.name_rows, self.name_hashes[row], row)
+            self.unused_name_bytes += self.name_lengths[row]
+            self.name_offsets[row], self.name_lengths[row], self.name_hashes[row] = self._pack_name(name)
+            self._index_add(self.name_keys, self.name_rows, self.name_hashes[row], row)
+        self.versions[row] = version
+
+    def delete(self, row: int) -> List[ColumnGroup]:
+        """Delete a contact and drop it from its groups; returns the groups it left"""
+        left = [group for group in self.groups.values() if self.remove_member(group, row)]
+        self._index_remove(self.phone_keys, self.phone_rows, self.phones[row], row)
+        self._index_remove(self.name_keys, self.name_rows, self.name_hashes[row], row)
+        self.unused_name_bytes += self.name_lengths[row]
+        self.phones[row] = 0
+        self.live -= 1
+        return left
+
+    def reindex(self):
+        """Rebuild the phone and name indexes from the columns"""
+        if np is not None:
+            phones = _numpy_view(self.phones)
+            live = np.flatnonzero(phones)
+            by_phone = live[np.argsort(phones[live], kind='stable')]
+            hashes = _numpy_view(self.name_hashes)
+            by_name = live[np.argsort(hashes[live], kind='stable')]
+            self.phone_keys, self.phone_rows = _from_numpy(phones[by_phone]), _from_numpy(by_phone)
+            self.name_keys, self.name_rows = _from_numpy(hashes[by_name]), _from_numpy(by_name)
+            return
+
+        live = list(self.rows())
+        by_phone = sorted(live, key=self.phones.__getitem__)
+        by_name = sorted(live, key=self.name_hashes.__getitem__)
+        self.phone_keys = array('q', map(self.phones.__getitem__, by_phone))
+        self.phone_rows = array('q', by_phone)
+        self.name_keys = array('q', map(self.name_hashes.__getitem__, by_name))
+        self.name_rows = array('q', by_name)
+
+    # ------------------------------------------------------------------
+    # Groups
+    # ------------------------------------------------------------------
+
+    def group(self, name: str) -> Optional[ColumnGroup]:
+        return self.groups.get(name_key(name))
+
+    def put_group(self, name: str, version: int, rows: Iterable[int]) -> ColumnGroup:
+        """Create or replace a group with the given member rows (in join order, repeats ignored)"""
+        group = ColumnGroup(name, version, rows)
+        self.groups[name_key(name)] = group
+        return group
+
+    @staticmethod
+    def has_member(group: ColumnGroup, row: int) -> bool:
+        i = bisect_left(group.members, row)
+        return i < len(group.members) and group.members[i] == row
+
+    @staticmethod
+    def join_sequence(group: ColumnGroup, row: int) -> Optional[int]:
+        """Join sequence number of a member row, or None if it isn't a member"""
+        i = bisect_left(group.members, row)
+        if i < len(group.members) and group.members[i] == row:
+            return group.joined[i]
+        return None
+
+    @staticmethod
+    def add_member(group: ColumnGroup, row: int) -> bool:
+        """Add a member at the end of the join order"""
+        i = bisect_left(group.members, row)
+        if i < len(group.members) and group.members[i] == row:
+            return False
+        seq = group.seqs[-1] + 1 if group.seqs else 0
+        group.members.insert(i, row)
+        group.joined.insert(i, seq)
+        group.order.append(row)
+        group.seqs.append(seq)
+        return True
+
+    @staticmethod
+    def remove_member(group: ColumnGroup, row: int) -> bool:
+        i = bisect_left(group.members, row)
+        if i < len(group.members) and group.members[i] == row:
+            j = bisect_left(group.seqs, group.joined[i])
+            del group.members[i]
+            del group.joined[i]
+            del group.order[j]
+            del group.seqs[j]
+            return True
+        return False
+
+    def groups_of(self, row: int) -> List[ColumnGroup]:
+        return [group for group in self.groups.values() if self.has_member(group, row)]
+
+    @staticmethod
+    def combine(groups: List[ColumnGroup], operation: str) -> array:
+        """
+        Rows in any of the groups ('union'), in all of them ('intersection'),
+        or in the first and none of the others ('difference'), ascending and
+        each row once.
+        """
+        if np is not None:
+            result = _numpy_view(groups[0].members)
+            for group in groups[1:]:
+                other = _numpy_view(group.members)
+                if operation == 'union':
+                    result = np.union1d(result, other)
+                elif operation == 'intersection':
+                    result = np.intersect1d(result, other, assume_unique=True)
+                else:
+                    result = np.setdiff1d(result, other, assume_unique=True)
+            return _from_numpy(result)
+
+        result = set(groups[0].members)
+        for group in groups[1:]:
+            if operation == 'union':
+                result.update(group.members)
+            elif operation == 'intersection':
+                result.intersection_update(group.members)
+            else:
+                result.difference_update(group.members)
+        return array('q', sorted(result))
+
+    # ------------------------------------------------------------------
+    # Packing and files
+    # ------------------------------------------------------------------
+
+    def vacuumed(self) -> 'ContactTable':
+        """
+        Copy of the table without deleted rows or unused name bytes. Rows are
+        renumbered densely, in the same order.
+        """
+        if self.live == len(self.phones) and not self.unused_name_bytes:
+            return self
+
+        live = list(self.rows())
+        table = ContactTable()
+        table._append_rows(
+            [self.phones[row] for row in live],
+            [self.versions[row] for row in live],
+            [self.names[self.name_offsets[row]:self.name_offsets[row] + self.name_lengths[row]] for row in live],
+            [self.name_hashes[row] for row in live],
+        )
+        renumber = array('q', bytes(8 * len(self.phones)))
+        for new_row, row in enumerate(live):
+            renumber[row] = new_row
+        # Renumbering keeps the order, so the sorted arrays stay sorted
+        table.phone_keys = array('q', self.phone_keys)
+        table.phone_rows = array('q', map(renumber.__getitem__, self.phone_rows))
+        table.name_keys = array('q', self.name_keys)
+        table.name_rows = array('q', map(renumber.__getitem__, self.name_rows))
+        for key, group in self.groups.items():
+            table.groups[key] = ColumnGroup(group.name, group.version, map(renumber.__getitem__, group.order))
+        return table
+
+    def write(self, path: str, seq: int):
+        """Atomically write the table to ``path``, recording journal position ``seq``"""
+        groups = list(self.groups.values())
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'seq': seq,
+            'byteorder': sys.byteorder,
+            'columns': [len(getattr(self, column)) for column in COLUMNS],
+            'names': len(self.names),
+            'groups': [[group.name, group.version, len(group.order)] for group in groups],
+            'live': self.live,
+            'unused_name_bytes': self.unused_name_bytes,
+        }, separators=(',', ':')).encode('utf-8')
+
+        # Arrays are written straight from their buffers, without copies
+        buffers = [MAGIC, U32.pack(len(header)), header]
+        buffers += [getattr(self, column) for column in COLUMNS]
+        buffers.append(self.names)
+        buffers += [group.order for group in groups]
+        atomic_write_buffers(path, buffers)
+
+    @classmethod
+    def read(cls, path: str) -> Tuple['ContactTable', int]:
+        """Load a table written by write(); returns it and its journal position"""
+        table = cls()
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a contact table")
+            header = json.loads(f.read(U32.unpack(f.read(U32.size))[0]))
+            if header['version'] not in READABLE_VERSIONS:
+                raise ValueError(f"{path} has unsupported format {header['version']}")
+
+            swap = header['byteorder'] != sys.byteorder
+            def read_array(count):
+                values = array('q')
+                values.fromfile(f, count)
+                if swap:
+                    values.byteswap()
+                return values
+
+            for column, count in zip(COLUMNS, header['columns']):
+                setattr(table, column, read_array(count))
+            table.names = bytearray(f.read(header['names']))
+            for name, version, count in header['groups']:
+                table.groups[name_key(name)] = ColumnGroup(name, version, read_array(count))
+
+        table.live = header['live']
+        table.unused_name_bytes = header['unused_name_bytes']
+        return table, header['seq']
+
+
+class ColumnarStorageBackend:
+    """
+    Contacts and groups resident in a ContactTable, with a journal.
+
+    For very large contact books: a contact costs a few dozen bytes of
+    array space instead of a Python object, its strings and dict entries.
+    Startup reads the arrays straight from the table file, and changes are
+    appended to a journal, as in journal mode. Once the journal reaches
+    ``compact_threshold`` entries, a background compaction writes a vacuumed
+    table and empties it. Like the memory and journal modes, this assumes a
+    single process owns the files.
+
+    Group members are listed in the order they joined the group, as in the
+    other modes.
+    """
+
+    def __init__(self, table_file: str, journal_file: str, contacts_file: str, groups_file: str,
+                 compact_threshold: int = 1000):
+        # contacts_file/groups_file are only read to seed the first table file
+        self.table_file = table_file
+        self.journal_file = journal_file
+        self.contacts_file = contacts_file
+        self.groups_file = groups_file
+        self.compact_threshold = compact_threshold
+        self.lock = threading.RLock()
+
+        self._table: Optional[ContactTable] = None
+        self._generation = None
+        self._seq = 0
+        self._table_seq = 0
+        self._journal = None
+        self._compacting = False
+        self._compaction_thread = None
+        # Journal entries queued by the open transaction, if any
+        self._pending: Optional[list] = None
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def session(self):
+        """Hold the storage lock across several calls"""
+        with self.lock:
+            self._ensure_loaded()
+            yield self
+
+    def _ensure_loaded(self):
+        if self._table is not None:
+            return
+
+        if not os.path.exists(self.table_file):
+            self._seed_from_json()
+        self._generation = load_generation([self.table_file, self.journal_file])
+        table, self._table_seq = ContactTable.read(self.table_file)
+        self._table = table
+        self._seq = self._table_seq
+
+        def apply(entry):
+            getattr(self, f"_apply_{entry['op']}")(**entry['args'])
+
+        last_seq = replay_journal(self.journal_file, self._table_seq, apply)
+        if last_seq is not None:
+            self._seq = last_seq
+
+    def _seed_from_json(self):
+        """First start in this mode: build the table file from the JSON files"""
+        def read_list(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                return data if isinstance(data, list) else []
+            except (FileNotFoundError, ValueError):
+                return []
+
+        contacts = {}
+        for data in read_list(self.contacts_file):
+            contact = Contact.from_dict(data)
+            contacts.setdefault(contact.phone, contact)
+
+        groups = []
+        for record in read_list(self.groups_file):
+            name, members = parse_group_record(record)
+            for member in members:
+                if member.name and member.phone not in contacts:
+                    contacts[member.phone] = Contact(member.name, member.phone, validate=False)
+            groups.append(Group(name, members, validate=False, version=record.get('version') or 1))
+
+        valid = []
+        for contact in contacts.values():
+            if phone_number(contact.phone) is None:
+                print(f"Warning: Skipping contact with non-E.164 phone number {contact.phone!r}")
+            else:
+                valid.append(contact)
+        ContactTable.from_contacts(valid, groups).write(self.table_file, 0)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def list_contacts(self) -> List[Contact]:
+        with self.session():
+            return self._table.to_contacts()
+
+    def iter_contacts(self, chunk_size: int = 1000) -> Iterator[Contact]:
+        """
+        Yield contacts one at a time, decoding a chunk of rows per lock hold.
+        A compaction swaps in a new table, so rows never shift under an
+        iteration that is already running.
+        """
+        with self.session():
+            table = self._table
+        row = 0
+        while True:
+            with self.lock:
+                end = min(row + chunk_size, len(table.phones))
+                chunk = [table.contact_at(r) for r in table.rows(row, end)]
+            for contact in chunk:
+                yield contact
+            if end >= len(table.phones):
+                return
+            row = end
+
+    def list_groups(self) -> List[Group]:
+        with self.session():
+            return self._table.to_groups()
+
+    def get_contact(self, phone: str) -> Optional[Contact]:
+        with self.session():
+            row = self._table.find(phone)
+            return self._table.contact_at(row) if row is not None else None
+
+    def find_contact_by_name(self, name: str) -> Optional[Contact]:
+        with self.session():
+            row = self._table.find_by_name(name)
+            return self._table.contact_at(row) if row is not None else None
+
+    def get_group(self, name: str) -> Optional[Group]:
+        with self.session():
+            group = self._table.group(name)
+            return self._table.group_at(group) if group else None
+
+    def has_group(self, name: str) -> bool:
+        with self.session():
+            return self._table.group(name) is not None
+
+    def group_member(self, group_name: str, phone: str) -> Optional[Contact]:
+        with self.session():
+            return self._member(self._table.group(group_name), self._table.find(phone))
+
+    def group_member_by_name(self, group_name: str, contact_name: str) -> Optional[Contact]:
+        with self.session():
+            return self._member(self._table.group(group_name), self._table.find_by_name(contact_name))
+
+    def _member(self, group: Optional[ColumnGroup], row: Optional[int]) -> Optional[Contact]:
+        if group is None or row is None or not self._table.has_member(group, row):
+            return None
+        return self._table.contact_at(row)
+
+    def groups_for_contact(self, phone: str) -> List[str]:
+        with self.session():
+            row = self._table.find(phone)
+            return [group.name for group in self._table.groups_of(row)] if row is not None else []
+
+    def group_summaries(self) -> List[GroupSummary]:
+        with self.session():
+            return [GroupSummary(group.name, group.version, len(group.members))
+                    for group in self._table.groups.values()]
+
+    def group_members_page(self, group_name: str, cursor: Optional[str],
+                           limit: int) -> Optional[Tuple[List[Contact], Optional[str]]]:
+        """
+        One page of a group's members and the cursor of the next page, or None
+        if no such group. Cursors are ``<join sequence>:<phone>`` of the last
+        member returned; the phone finds the member again if the group has
+        been rebuilt (and its sequence renumbered) since. If that member has
+        left the group, the page resumes at its old sequence number.
+        """
+        with self.session():
+            table = self._table
+            group = table.group(group_name)
+            if group is None:
+                return None
+
+            start = 0
+            if cursor:
+                seq, separator, phone = cursor.partition(':')
+                if not separator or not seq.isdigit():
+                    raise ValueError('Invalid cursor')
+                seq = int(seq)
+                row = table.find(phone)
+                joined = table.join_sequence(group, row) if row is not None else None
+                if joined is not None:
+                    seq = joined
+                start = bisect_right(group.seqs, seq)
+
+            rows = group.order[start:start + limit]
+            contacts = [table.contact_at(row) for row in rows]
+            end = start + len(rows)
+            has_more = end < len(group.order)
+            next_cursor = f"{group.seqs[end - 1]}:{contacts[-1].phone}" if rows and has_more else None
+            return contacts, next_cursor
+
+    def combine_groups(self, group_names: List[str], operation: str) -> Optional[List[Contact]]:
+        """Contacts of a set operation over groups (see ContactTable.combine), or None if a group is missing"""
+        with self.session():
+            groups = [self._table.group(name) for name in group_names]
+            if None in groups:
+                return None
+            return [self._table.contact_at(row) for row in ContactTable.combine(groups, operation)]
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def _mutate(self, op: str, **args) -> bool:
+        with self.session():
+            changed = getattr(self, f'_apply_{op}')(**args)
+            if changed:
+                if self._pending is not None:
+                    self._pending.append({'op': op, 'args': args})
+                else:
+                    self._append(op, args)
+            return changed
+
+    def _append(self, op: str, args: dict):
+        """Journal a change already applied to the table (lock held)"""
+        self._seq += 1
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a')
+        append_journal_entry(self._journal, self._seq, op, args)
+
+        if self._seq - self._table_seq >= self.compact_threshold and not self._compacting:
+            self._compacting = True
+            self._compaction_thread = threading.Thread(target=self.compact, name='table-compaction', daemon=True)
+            self._compaction_thread.start()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Journal several mutations as one entry.
+
+        Inside the block each mutation updates the table at once, so later
+        calls see it; the outermost transaction appends them all as a single
+        ``transaction`` line when it exits. If the block raises, the table is
+        reloaded from its file and the journal.
+        """
+        with self.session():
+            if self._pending is not None:
+                yield self
+                return
+
+            self._pending = []
+            try:
+                yield self
+            except BaseException:
+                self._pending = None
+                self._table = None
+                raise
+
+            pending, self._pending = self._pending, None
+            if pending:
+                try:
+                    self._append('transaction', {'entries': pending})
+                except Exception:
+                    self._table = None
+                    raise
+
+    def replace_contacts(self, contacts: List[Contact]):
+        self._mutate('replace_contacts', contacts=[c.to_dict() for c in contacts])
+
+    def replace_groups(self, groups: List[Group]):
+        self._mutate('replace_groups', groups=[g.to_dict() for g in groups])
+
+    def insert_contact(self, contact: Contact):
+        self._mutate('insert_contact', name=contact.name, phone=contact.phone)
+
+    def insert_contacts(self, contacts: List[Contact]) -> int:
+        self._mutate('insert_contacts', contacts=[{'name': c.name, 'phone': c.phone} for c in contacts])
+        return len(contacts)
+
+    def update_contact(self, old_phone: str, contact: Contact) -> bool:
+        return self._mutate('update_contact', old_phone=old_phone, name=contact.name, phone=contact.phone)
+
+    def delete_contact(self, phone: str) -> bool:
+        """Delete a contact and drop it from every group that contains it"""
+        return self._mutate('delete_contact', phone=phone)
+
+    def insert_group(self, group: Group):
+        self._mutate('insert_group', group=group.to_dict())
+
+    def replace_group(self, group: Group) -> bool:
+        return self._mutate('replace_group', group=group.to_dict())
+
+    def delete_group(self, name: str) -> bool:
+        return self._mutate('delete_group', name=name)
+
+    def add_group_member(self, group_name: str, contact: Contact) -> bool:
+        return self._mutate('add_group_member', group=group_name, name=contact.name, phone=contact.phone)
+
+    def remove_group_member(self, group_name: str, phone: str) -> bool:
+        return self._mutate('remove_group_member', group=group_name, phone=phone)
+
+    # Operations on the table, shared by live calls and journal replay.
+    # Each returns True if it changed anything.
+
+    def _apply_replace_contacts(self, contacts: list) -> bool:
+        stored = {}
+        for data in contacts:
+            contact = Contact.from_dict(data)
+            contact.version = contact.version or 1
+            stored[contact.phone] = contact
+
+        old = self._table
+        table = ContactTable()
+        table.extend((c.name, c.phone, c.version) for c in stored.values())
+        # Groups lose the members that are going away
+        for key, group in old.groups.items():
+            rows = [table.find_number(old.phones[row]) for row in group.order]
+            kept = [row for row in rows if row is not None]
+            version = group.version + 1 if len(kept) != len(rows) else group.version
+            table.groups[key] = ColumnGroup(group.name, version, kept)
+        self._table = table
+        return True
+
+    def _apply_replace_groups(self, groups: list) -> bool:
+        self._table.groups.clear()
+        for record in groups:
+            self._put_group(record, version=record.get('version') or 1)
+        return True
+
+    def _apply_transaction(self, entries: list) -> bool:
+        """Re-apply the operations of a committed transaction (journal replay)"""
+        for entry in entries:
+            getattr(self, f"_apply_{entry['op']}")(**entry['args'])
+        return True
+
+    def _upsert_contact(self, name: str, phone: str) -> Optional[int]:
+        """Row of the contact with this phone, adding it if it's new and has a name"""
+        row = self._table.find(phone)
+        if row is None and name:
+            row = self._table.append(name, phone)
+        return row
+
+    def _apply_insert_contact(self, name: str, phone: str) -> bool:
+        row = self._table.find(phone)
+        if row is not None:
+            self._table.update(row, name, phone, 1)
+        else:
+            self._table.append(name, phone)
+        return True
+
+    def _apply_insert_contacts(self, contacts: list) -> bool:
+        new = {}
+        for data in contacts:
+            if self._table.find(data['phone']) is not None:
+                self._apply_insert_contact(data['name'], data['phone'])
+            else:
+                new[data['phone']] = data['name']
+        self._table.extend((name, phone, 1) for phone, name in new.items())
+        return bool(contacts)
+
+    def _apply_update_contact(self, old_phone: str, name: str, phone: str) -> bool:
+        row = self._table.find(old_phone)
+        if row is None:
+            return False
+        self._table.update(row, name, phone, self._table.versions[row] + 1)
+        return True
+
+    def _apply_delete_contact(self, phone: str) -> bool:
+        row = self._table.find(phone)
+        if row is None:
+            return False
+        for group in self._table.delete(row):
+            group.version += 1
+        return True
+
+    def _put_group(self, record: dict, version: int):
+        name, members = parse_group_record(record)
+        rows = (self._upsert_contact(member.name, member.phone) for member in members)
+        self._table.put_group(name, version, [row for row in rows if row is not None])
+
+    def _apply_insert_group(self, group: dict) -> bool:
+        existing = self._table.group(group['name'])
+        self._put_group(group, version=existing.version + 1 if existing else 1)
+        return True
+
+    def _apply_replace_group(self, group: dict) -> bool:
+        existing = self._table.group(group['name'])
+        if existing is None:
+            return False
+        self._put_group(group, version=existing.version + 1)
+        return True
+
+    def _apply_delete_group(self, name: str) -> bool:
+        return self._table.groups.pop(name_key(name), None) is not None
+
+    def _apply_add_group_member(self, group: str, name: str, phone: str) -> bool:
+        target = self._table.group(group)
+        if target is None:
+            return False
+        row = self._upsert_contact(name, phone)
+        if row is not None:
+            self._table.add_member(target, row)
+        target.version += 1
+        return True
+
+    def _apply_remove_group_member(self, group: str, phone: str) -> bool:
+        target = self._table.group(group)
+        row = self._table.find(phone)
+        if target is None or row is None or not self._table.remove_member(target, row):
+            return False
+        target.version += 1
+        return True
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def compact(self):
+        """Write a vacuumed table file and empty the journal"""
+        try:
+            with self.session():
+                table = self._table.vacuumed()
+                table.write(self.table_file, self._seq)
+                self._table = table
+                self._table_seq = self._seq
+
+                self._close_journal()
+                with open(self.journal_file, 'w') as f:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except Exception as e:
+            print(f"Warning: Table compaction failed: {e}")
+        finally:
+            self._compacting = False
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        # A compaction still running would rewrite the files after close,
+        # under a store that may already have been reopened on them
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        with self.lock:
+            self._close_journal()
+
+    def fingerprint(self) -> list:
+        """Changes whenever the stored data changes"""
+        fingerprint = file_fingerprint([self.table_file, self.journal_file])
+        if self._pending:
+            # Queued in an open transaction, not journaled yet
+            fingerprint.append(len(self._pending))
+        return fingerprint
+
+    def data_version(self) -> str:
+        """
+        The journal sequence number, which survives restarts and compaction,
+        qualified by the generation loaded (see load_generation)
+        """
+        with self.session():
+            return f"{self._generation}.{self._seq}"
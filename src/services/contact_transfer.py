@@ -0,0 +1,139 @@
+"""
+Streaming bulk import/export of contacts as CSV or NDJSON.
+
+Usage (from the src directory):
+    python -m services.contact_transfer import contacts.csv
+    python -m services.contact_transfer import contacts.csv --tenant main
+    python -m services.contact_transfer import big.csv --batch-size 200000 --processes 4
+    python -m services.contact_transfer export contacts.ndjson
+    python -m services.contact_transfer export - --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Iterable, Iterator, Optional, TextIO
+
+from models.contact import Contact
+
+TRANSFER_FORMATS = ('csv', 'ndjson')
+
+CSV_FIELDS = ['name', 'phone']
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """Pick the file format from an explicit choice or the file extension"""
+    if fmt:
+        fmt = fmt.lower()
+    else:
+        extension = os.path.splitext(path)[1].lower()
+        fmt = 'ndjson' if extension in ('.ndjson', '.jsonl') else 'csv'
+
+    if fmt not in TRANSFER_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(TRANSFER_FORMATS)}")
+    return fmt
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[dict]:
+    """Yield {"name", "phone"} records one row at a time"""
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield {'name': row.get('name'), 'phone': row.get('phone')}
+        return
+
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            print(f"Warning: Skipping malformed line {line_number}")
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def write_records(stream: TextIO, contacts: Iterable[Contact], fmt: str) -> int:
+    """Write contacts as they are produced; returns the number written"""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(CSV_FIELDS)
+        for contact in contacts:
+            writer.writerow([contact.name, contact.phone])
+            count += 1
+        return count
+
+    for contact in contacts:
+        stream.write(json.dumps({'name': contact.name, 'phone': contact.phone}) + '\n')
+        count += 1
+    return count
+
+
+def import_file(storage, path: str, fmt: Optional[str] = None, batch_size: int = 1000, processes: int = 1):
+    """Import contacts from a CSV/NDJSON file ('-' reads stdin)"""
+    fmt = detect_format(path, fmt)
+    if path == '-':
+        return storage.import_contacts(read_records(sys.stdin, fmt), batch_size=batch_size, processes=processes)
+
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        return storage.import_contacts(read_records(f, fmt), batch_size=batch_size, processes=processes)
+
+
+def export_file(storage, path: str, fmt: Optional[str] = None) -> int:
+    """Export all contacts to a CSV/NDJSON file ('-' writes stdout)"""
+    fmt = detect_format(path, fmt)
+    if path == '-':
+        return write_records(sys.stdout, storage.iter_contacts(), fmt)
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        return write_records(f, storage.iter_contacts(), fmt)
+
+
+def _run(args, storage) -> int:
+    if args.command == 'import':
+        result = import_file(storage, args.path, args.format, args.batch_size, args.processes)
+        if not result.is_valid:
+            print(result.error_message, file=sys.stderr)
+            return 1
+        print(result.sanitized_value, file=sys.stderr)
+    else:
+        count = export_file(storage, args.path, args.format)
+        print(f"Exported {count} contacts", file=sys.stderr)
+    return 0
+
+
+def main(argv=None) -> int:
+    from services.contact_storage import STORAGE_MODES, ContactStorage
+    from services.tenant_storage import TenantStorageRegistry
+
+    parser = argparse.ArgumentParser(description="Bulk import or export OnArrival contacts")
+    parser.add_argument('command', choices=['import', 'export'])
+    parser.add_argument('path', help="CSV or NDJSON file, or '-' for stdin/stdout")
+    parser.add_argument('--format', choices=TRANSFER_FORMATS, help="File format (default: from extension)")
+    parser.add_argument('--mode', choices=STORAGE_MODES, help="Storage mode (default: ONARRIVAL_STORAGE_MODE)")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Rows validated per batch")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="Validate with a process pool of this size (worth it for batches of 50k+ rows)")
+    parser.add_argument('--tenant', help="API key name whose contact shard to use")
+    args = parser.parse_args(argv)
+
+    if args.tenant:
+        registry = TenantStorageRegistry(mode=args.mode)
+        try:
+            with registry.shard(args.tenant) as storage:
+                return _run(args, storage)
+        finally:
+            registry.close()
+
+    storage = ContactStorage(mode=args.mode)
+    try:
+        return _run(args, storage)
+    finally:
+        storage.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+from typing import Optional
+
+from models.contact import Contact
+from services.storage_backends import JsonStorageBackend, atomic_write_json, file_fingerprint, load_generation
+
+
+def append_journal_entry(journal, seq: int, op: str, args: dict):
+    """Append one fsync'd ``{"seq", "op", "args"}`` line to an open journal file"""
+    journal.write(json.dumps({'seq': seq, 'op': op, 'args': args}, separators=(',', ':')) + '\n')
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
+def replay_journal(journal_file: str, after_seq: int, apply) -> Optional[int]:
+    """
+    Call ``apply(entry)`` for each journal entry with seq > after_seq.
+
+    A torn final line from a crash mid-append is cut off, so new entries
+    aren't appended after garbage. Returns the last replayed seq, or None.
+    """
+    if not os.path.exists(journal_file):
+        return None
+
+    last_seq = None
+    replayed = 0
+    good_bytes = 0
+    with open(journal_file, 'rb') as f:
+        for raw in f:
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                print(f"Warning: Discarding torn journal entry at byte {good_bytes}")
+                break
+            good_bytes += len(raw)
+
+            if entry['seq'] <= after_seq:
+                continue
+            apply(entry)
+            last_seq = entry['seq']
+            replayed += 1
+
+    if good_bytes != os.path.getsize(journal_file):
+        with open(journal_file, 'r+b') as f:
+            f.truncate(good_bytes)
+
+    if replayed:
+        print(f"Replayed {replayed} journal entries")
+    return last_seq
+
+
+class JournalStorageBackend(JsonStorageBackend):
+    """
+    Resident storage that appends each mutation to a journal file.
+
+    A write costs one appended, fsync'd line instead of a rewrite of the
+    whole contact book. On startup the working set is rebuilt from the last
+    snapshot plus any journal entries written after it. Once the journal
+    grows past ``compact_threshold`` entries, a background compaction folds it
+    into a new snapshot.
+
+    Journal lines are ``{"seq": n, "op": ..., "args": {...}}``, where ``op``
+    names one of the ``_op_*`` methods of JsonStorageBackend. The snapshot
+    records the last sequence number it contains, so replay skips entries
+    that are already folded in. A torn final line from a crash mid-append is
+    discarded.
+    """
+
+    def __init__(self, snapshot_file: str, journal_file: str, contacts_file: str, groups_file: str,
+                 compact_threshold: int = 1000):
+        # contacts_file/groups_file are only read to seed the first snapshot
+        super().__init__(contacts_file, groups_file, resident=True)
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self.compact_threshold = compact_threshold
+
+        self._seq = 0
+        self._snapshot_seq = 0
+        self._journal = None
+        self._compacting = False
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread = None
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _read_snapshot(self) -> Optional[dict]:
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+
+        self._generation = load_generation(
+            [self.snapshot_file, self.journal_file, self.contacts_file, self.groups_file]
+        )
+        snapshot = self._read_snapshot()
+        if snapshot is None:
+            # First start in journal mode: seed from the legacy JSON files
+            snapshot = {
+                'seq': 0,
+                'contacts': self._read_json_list(self.contacts_file, 'contacts'),
+                'groups': self._read_json_list(self.groups_file, 'groups'),
+            }
+
+        self._set_contacts(Contact.from_dict(c) for c in snapshot['contacts'])
+        self._set_groups(snapshot['groups'])
+        self._reindex_groups()
+        self._snapshot_seq = self._seq = snapshot['seq']
+        self._replay_journal()
+        self._loaded = True
+
+    def _replay_journal(self):
+        def apply(entry):
+            getattr(self, f"_op_{entry['op']}")(**entry['args'])
+
+        last_seq = replay_journal(self.journal_file, self._snapshot_seq, apply)
+        if last_seq is not None:
+            self._seq = last_seq
+
+    # ------------------------------------------------------------------
+    # Journaling
+    # ------------------------------------------------------------------
+
+    def _persist(self, op: str, fields: dict, changed: set):
+        self._seq += 1
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'a')
+        append_journal_entry(self._journal, self._seq, op, fields)
+
+        if self._seq - self._snapshot_seq >= self.compact_threshold and not self._compacting:
+            self._compacting = True
+            self._compaction_thread = threading.Thread(target=self.compact, name='journal-compaction', daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self):
+        """Fold the journal into a new snapshot and drop the folded entries"""
+        with self._compaction_lock:
+            try:
+                self._write_snapshot()
+            except Exception as e:
+                print(f"Warning: Journal compaction failed: {e}")
+            finally:
+                self._compacting = False
+
+    def _write_snapshot(self):
+        # Capture a consistent view under the lock; serialize it outside
+        with self.lock:
+            self._ensure_loaded()
+            seq = self._seq
+            snapshot = {
+                'seq': seq,
+                'contacts': [c.to_dict() for c in self._contact_order.values()],
+                'groups': self._group_records(),
+            }
+
+        atomic_write_json(self.snapshot_file, snapshot, separators=(',', ':'))
+
+        # Keep entries appended while the snapshot was being written
+        with self.lock:
+            self._close_journal()
+            remaining = []
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, 'r') as f:
+                    remaining = [line for line in f if json.loads(line)['seq'] > seq]
+
+            temp_file = f"{self.journal_file}.tmp"
+            with open(temp_file, 'w') as f:
+                f.writelines(remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.journal_file)
+            self._snapshot_seq = seq
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        # A compaction still running would rewrite the files after close,
+        # under a store that may already have been reopened on them
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        with self.lock:
+            self._close_journal()
+
+    def fingerprint(self) -> list:
+        return self._with_pending(file_fingerprint([self.snapshot_file, self.journal_file]))
+
+    def data_version(self) -> str:
+        """
+        The journal sequence number, which survives restarts and compaction,
+        qualified by the generation loaded (see load_generation)
+        """
+        with self.lock:
+            self._ensure_loaded()
+            return f"{self._generation}.{self._seq}"
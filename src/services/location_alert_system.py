@@ -1,30 +1,87 @@
+import os
+from contextlib import contextmanager
+from typing import List, Optional
 from models.location import Location
 from models.contact import Contact
-from services.contact_storage import ContactStorage
+from services.contact_storage import DEFAULT_DATA_DIR, ContactStorage
+from services.tenant_storage import TenantStorageRegistry
 from services.notification_service import NotificationService
+from services.call_dispatcher import create_call_dispatcher
+from services.outbox import Outbox, OutboxDispatcher
+from services.call_status import CallStatusBuffer
 from services.location_service import LocationService
 
 class LocationAlertSystem:
     def __init__(self):
         self.contact_storage = ContactStorage()
         
+        # Optional per-API-key contact books, each in its own storage shard
+        self.tenant_storage = None
+        if os.getenv('ONARRIVAL_TENANT_SHARDS', 'false').lower() == 'true':
+            self.tenant_storage = TenantStorageRegistry(
+                max_open=int(os.getenv('ONARRIVAL_MAX_OPEN_SHARDS', '32'))
+            )
+        
         # Initialize notification service without Flask/ngrok
         try:
             self.notification_service = NotificationService()
         except Exception as e:
             print(f"Error initializing notification service: {e}")
             raise
+        
+        # Places calls concurrently: on an asyncio connection pool or a thread pool
+        self.call_dispatcher = create_call_dispatcher(self.notification_service)
+        
+        # Queued sends (web app); see start_outbox()
+        self.outbox = None
+        self.outbox_dispatcher = None
             
         self.location_service = LocationService()
         
         self.locations = Location.create_default_locations()
-        self.contacts = self.contact_storage.load_contacts()
+
+    def start_outbox(self, db_path: Optional[str] = None) -> Outbox:
+        """
+        Open the durable send outbox and start draining it in the background.
+        Call status callbacks are recorded in the outbox too.
+        """
+        if self.outbox is None:
+            self.outbox = Outbox(
+                db_path or os.path.join(DEFAULT_DATA_DIR, 'outbox.sqlite3'),
+                requeue_seconds=int(os.getenv('ONARRIVAL_OUTBOX_REQUEUE_SECONDS', '5'))
+            )
+            self.notification_service.call_status_recorder = CallStatusBuffer(
+                self.outbox,
+                flush_seconds=int(os.getenv('ONARRIVAL_STATUS_FLUSH_MS', '500')) / 1000.0
+            )
+            self.outbox_dispatcher = OutboxDispatcher(
+                self.outbox,
+                self.call_dispatcher,
+                batch_size=int(os.getenv('ONARRIVAL_OUTBOX_BATCH_SIZE', '100')),
+                breaker=self.notification_service.provider_guard.breaker
+            )
+            self.outbox_dispatcher.start()
+        return self.outbox
+
+    @contextmanager
+    def tenant_contact_storage(self, tenant: Optional[str]):
+        """ContactStorage for an API tenant; the shared store unless sharding is enabled"""
+        if self.tenant_storage is None or not tenant:
+            yield self.contact_storage
+            return
+        
+        with self.tenant_storage.shard(tenant) as storage:
+            yield storage
+
+    @property
+    def contacts(self) -> List[Contact]:
+        """Current contacts, read through the storage cache so other workers' changes are visible"""
+        return self.contact_storage.load_contacts()
 
     def add_contact(self, name: str, phone_number: str) -> None:
-        contact = Contact(name, phone_number)
-        self.contacts.append(contact)
-        self.contact_storage.save_contacts(self.contacts)
+        result = self.contact_storage.add_contact(name, phone_number)
+        if not result.is_valid:
+            raise ValueError(result.error_message)
 
     def delete_contact(self, contact: Contact) -> None:
-        self.contacts = [c for c in self.contacts if c.phone != contact.phone]
         self.contact_storage.delete_contact(contact)
\ No newline at end of file
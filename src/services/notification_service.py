@@ -1,16 +1,85 @@
 from twilio.twiml.voice_response import VoiceResponse
 from twilio.rest import Client
+from twilio.request_validator import RequestValidator
+from twilio.base.exceptions import TwilioRestException
 from flask import Flask, request
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+try:
+    from aiohttp import ClientConnectorError, ClientError
+    from twilio.http.async_http_client import AsyncTwilioHttpClient
+except ImportError:  # aiohttp / aiohttp-retry not installed: no async calls
+    ClientConnectorError = ClientError = None
+    AsyncTwilioHttpClient = None
+import asyncio
 import os
+import re
 import json
+import hashlib
+import hmac
+import urllib.parse
+from typing import Optional, Tuple
 from dotenv import load_dotenv
-from utils.validation import InputValidator, SecurityValidator, ValidationResult
+from services.provider_guard import NOT_ATTEMPTED, ProviderGuard, ProviderUnavailable
+from utils.validation import (
+    InputValidator, SafeBusinessName, SafeMessage, SecurityValidator, ValidationResult
+)
 import html
 import logging
 
 # Load environment variables
 load_dotenv()
 
+# Characters below space, other than line breaks and tabs, which can upset TTS
+TTS_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+SSML_TAG = re.compile(r'<[^>]*>')
+
+# Longest text spoken in one call
+MAX_TTS_LENGTH = 1600
+
+# Call progress events Twilio reports to /voice/status
+STATUS_CALLBACK_EVENTS = ['initiated', 'ringing', 'answered', 'completed']
+
+# Fields of a status callback that are recorded
+STATUS_CALLBACK_FIELDS = ('CallStatus', 'CallDuration', 'SequenceNumber', 'ErrorCode', 'AnsweredBy')
+
+# Creating a call is a POST that is not idempotent, so it is only retried
+# when it certainly did not create a call: Twilio turned it away (rate
+# limited or unavailable), or the connection failed before the request was
+# sent. Anything else, such as a read timeout, a dropped connection or a
+# 500, may have created the call and is reported as failed instead.
+RETRYABLE_STATUSES = (429, 503)
+
+def request_not_sent(error: BaseException) -> bool:
+    """Whether a connection error happened before the request was sent"""
+    if ClientConnectorError is not None and isinstance(error, ClientConnectorError):
+        return True
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # requests wraps urllib3's MaxRetryError, whose reason is the failure
+        reason = getattr(error.args[0], 'reason', None)
+        return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+    return False
+
+def transient_provider_error(error: BaseException) -> bool:
+    """Twilio errors worth retrying: 429, 503 and connections that failed before sending"""
+    if isinstance(error, TwilioRestException):
+        return error.status in RETRYABLE_STATUSES
+    return request_not_sent(error)
+
+# Transport failures of either HTTP client, whether or not the request was sent
+TRANSPORT_ERRORS = tuple(
+    error for error in (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                        ClientError, asyncio.TimeoutError) if error is not None
+)
+
+def provider_outage_error(error: BaseException) -> bool:
+    """Errors that suggest Twilio is unhealthy; they count against the circuit breaker"""
+    if isinstance(error, TwilioRestException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, TRANSPORT_ERRORS)
+
 class NotificationService:
     def __init__(self):
         # Initialize Twilio client with validation
@@ -30,6 +99,16 @@ class NotificationService:
             self.twilio_phone = phone_validation.sanitized_value
             self.client = Client(self.account_sid, self.auth_token)
             
+            # Webhook base URL (NGROK_URL) as last validated
+            self._checked_base_url = None
+            
+            # Receives call status callbacks as record(sid, fields); see /voice/status
+            self.call_status_recorder = None
+            self.request_validator = RequestValidator(self.auth_token)
+            
+            # Retries, backoff and the circuit breaker around calls.create
+            self.provider_guard = ProviderGuard.from_env(transient_provider_error, provider_outage_error)
+            
             # Set up logging
             logging.basicConfig(level=logging.INFO)
             self.logger = logging.getLogger(__name__)
@@ -53,92 +132,164 @@ class NotificationService:
         
         # Follow-up message
         self.follow_up_message = "Thank you for listening. This was an automated notification service. If you need to reach the traveler, please call them directly."
+        
+        self._update_templates_version()
 
-    def validate_call_parameters(self, to_phone: str, message: str, business_name: str = None) -> ValidationResult:
-        """Validate parameters for making a call"""
-        # Validate phone number
-        phone_validation = InputValidator.validate_phone_number(to_phone)
-        if not phone_validation.is_valid:
-            return ValidationResult(False, f"Invalid phone number: {phone_validation.error_message}")
+    def validated_call_parameters(self, to_phone: str, message: str,
+                                  business_name: str = None) -> Tuple[Optional[tuple], ValidationResult]:
+        """
+        Validate and sanitize call parameters, returning them as
+        (E164Phone, SafeMessage, SafeBusinessName or None) and the result.
+        Arguments that already have those types are not validated again.
+        """
+        phone, phone_validation = InputValidator.e164_phone(to_phone)
+        if phone is None:
+            return None, ValidationResult(False, f"Invalid phone number: {phone_validation.error_message}")
         
-        # Validate message
-        message_validation = InputValidator.validate_message(message)
-        if not message_validation.is_valid:
-            return ValidationResult(False, f"Invalid message: {message_validation.error_message}")
+        safe_message, message_validation = InputValidator.safe_message(message)
+        if safe_message is None:
+            return None, ValidationResult(False, f"Invalid message: {message_validation.error_message}")
         
-        # Validate business name if provided
+        safe_business = None
         if business_name:
-            business_validation = InputValidator.validate_business_name(business_name)
-            if not business_validation.is_valid:
-                return ValidationResult(False, f"Invalid business name: {business_validation.error_message}")
+            safe_business, business_validation = InputValidator.safe_business_name(business_name)
+            if safe_business is None:
+                return None, ValidationResult(False, f"Invalid business name: {business_validation.error_message}")
         
-        return ValidationResult(True, sanitized_value="All parameters valid")
+        return (phone, safe_message, safe_business), ValidationResult(True, sanitized_value="All parameters valid")
+
+    def validate_call_parameters(self, to_phone: str, message: str, business_name: str = None) -> ValidationResult:
+        """Validate parameters for making a call"""
+        return self.validated_call_parameters(to_phone, message, business_name)[1]
 
     def sanitize_call_parameters(self, to_phone: str, message: str, business_name: str = None) -> tuple:
         """Sanitize call parameters and return cleaned values"""
-        phone_validation = InputValidator.validate_phone_number(to_phone)
-        message_validation = InputValidator.validate_message(message)
+        parameters, _ = self.validated_call_parameters(to_phone, message, business_name)
+        return parameters or (None, None, None)
+
+    def _webhook_base_url(self) -> Optional[str]:
+        """NGROK_URL (or the local default), validated once per distinct value"""
+        base_url = os.getenv('NGROK_URL', 'http://localhost:5000')
+        if base_url != self._checked_base_url:
+            url_validation = SecurityValidator.validate_url(base_url)
+            if not url_validation.is_valid:
+                self.logger.error(f"Invalid webhook URL: {url_validation.error_message}")
+                return None
+            self._checked_base_url = base_url
+        return base_url
+
+    def _sign_voice_parameters(self, message: str, business_name: str, include_follow_up: str) -> str:
+        """
+        Signature of the /voice parameters of one call, keyed with the Twilio
+        auth token. The webhook trusts signed parameters as already validated.
+        """
+        payload = '\0'.join([message, business_name, include_follow_up]).encode('utf-8')
+        return hmac.new(self.auth_token.encode('utf-8'), payload, hashlib.sha256).hexdigest()
+
+    def prepare_call(self, to_phone: str, message: str, business_name: str = None,
+                     include_follow_up: bool = False) -> Optional[dict]:
+        """
+        Validate a call and build the keyword arguments of calls.create(),
+        or return None (after logging why) if the call cannot be made
+        """
+        parameters, validation_result = self.validated_call_parameters(to_phone, message, business_name)
+        if parameters is None:
+            self.logger.warning(f"Call validation failed: {validation_result.error_message}")
+            return None
+        sanitized_phone, sanitized_message, sanitized_business = parameters
         
-        sanitized_phone = phone_validation.sanitized_value
-        sanitized_message = message_validation.sanitized_value
-        sanitized_business = None
+        base_url = self._webhook_base_url()
+        if base_url is None:
+            return None
         
-        if business_name:
-            business_validation = InputValidator.validate_business_name(business_name)
-            sanitized_business = business_validation.sanitized_value
+        # URL encode parameters safely
+        follow_up = "true" if include_follow_up else "false"
+        webhook_url = f"{base_url}/voice"
+        webhook_url += f"?message={urllib.parse.quote(sanitized_message)}"
+        if sanitized_business:
+            webhook_url += f"&business_name={urllib.parse.quote(sanitized_business)}"
+        webhook_url += f"&include_follow_up={follow_up}"
+        signature = self._sign_voice_parameters(sanitized_message, sanitized_business or '', follow_up)
+        webhook_url += f"&signature={signature}"
         
-        return sanitized_phone, sanitized_message, sanitized_business
+        return {
+            'to': sanitized_phone,
+            'from_': self.twilio_phone,
+            'url': webhook_url,
+            'status_callback': f"{base_url}/voice/status",
+            'status_callback_event': STATUS_CALLBACK_EVENTS,
+            'status_callback_method': 'POST',
+            'timeout': 30,
+            'record': False  # Don't record calls for privacy
+        }
 
     def make_call(self, to_phone: str, message: str, business_name: str = None, include_follow_up: bool = False) -> bool:
-        """Make a call with input validation and security checks"""
+        """
+        Make a call with input validation and security checks. An E164Phone,
+        SafeMessage or SafeBusinessName argument is used as it is.
+        """
+        return self.place_call(to_phone, message, business_name, include_follow_up) not in (None, NOT_ATTEMPTED)
+
+    def place_call(self, to_phone: str, message: str, business_name: str = None,
+                   include_follow_up: bool = False) -> Optional[str]:
+        """
+        make_call(), returning the call SID, None if the call failed, or
+        NOT_ATTEMPTED if the circuit breaker kept it from being tried
+        """
         try:
-            # Validate parameters
-            validation_result = self.validate_call_parameters(to_phone, message, business_name)
-            if not validation_result.is_valid:
-                self.logger.warning(f"Call validation failed: {validation_result.error_message}")
-                return False
-            
-            # Sanitize parameters
-            sanitized_phone, sanitized_message, sanitized_business = self.sanitize_call_parameters(
-                to_phone, message, business_name
-            )
+            call_arguments = self.prepare_call(to_phone, message, business_name, include_follow_up)
+            if call_arguments is None:
+                return None
             
-            # Create webhook URL with validation
-            base_url = os.getenv('NGROK_URL', 'http://localhost:5000')
-            
-            # URL encode parameters safely
-            import urllib.parse
-            encoded_message = urllib.parse.quote(sanitized_message)
-            encoded_business = urllib.parse.quote(sanitized_business) if sanitized_business else ""
-            encoded_follow_up = "true" if include_follow_up else "false"
+            # Make the call
+            call = self.provider_guard.call(self.client.calls.create, **call_arguments)
             
-            webhook_url = f"{base_url}/voice"
-            webhook_url += f"?message={encoded_message}"
-            if encoded_business:
-                webhook_url += f"&business_name={encoded_business}"
-            webhook_url += f"&include_follow_up={encoded_follow_up}"
+            self.logger.info(f"Call initiated: {call.sid} to {call_arguments['to']}")
+            return call.sid
             
-            # Validate webhook URL
-            url_validation = SecurityValidator.validate_url(webhook_url)
-            if not url_validation.is_valid:
-                self.logger.error(f"Invalid webhook URL: {url_validation.error_message}")
-                return False
+        except ProviderUnavailable as e:
+            self.logger.warning(f"Call to {to_phone} not attempted: {str(e)}")
+            return NOT_ATTEMPTED
+        except Exception as e:
+            self.logger.error(f"Error making call to {to_phone}: {str(e)}")
+            return None
+
+    def create_async_client(self):
+        """
+        A Twilio client whose requests share one keep-alive aiohttp session.
+        Must be called, used and closed (await client.http_client.close())
+        on one running event loop. Returns None if aiohttp is not installed.
+        """
+        if AsyncTwilioHttpClient is None:
+            return None
+        return Client(self.account_sid, self.auth_token,
+                      http_client=AsyncTwilioHttpClient(pool_connections=True))
+
+    async def make_call_async(self, async_client, to_phone: str, message: str, business_name: str = None,
+                              include_follow_up: bool = False) -> bool:
+        """make_call() through a client from create_async_client()"""
+        sid = await self.place_call_async(async_client, to_phone, message, business_name, include_follow_up)
+        return sid not in (None, NOT_ATTEMPTED)
+
+    async def place_call_async(self, async_client, to_phone: str, message: str, business_name: str = None,
+                               include_follow_up: bool = False) -> Optional[str]:
+        """place_call() through a client from create_async_client()"""
+        try:
+            call_arguments = self.prepare_call(to_phone, message, business_name, include_follow_up)
+            if call_arguments is None:
+                return None
             
-            # Make the call
-            call = self.client.calls.create(
-                to=sanitized_phone,
-                from_=self.twilio_phone,
-                url=webhook_url,
-                timeout=30,
-                record=False  # Don't record calls for privacy
-            )
+            call = await self.provider_guard.call_async(async_client.calls.create_async, **call_arguments)
             
-            self.logger.info(f"Call initiated: {call.sid} to {sanitized_phone}")
-            return True
+            self.logger.info(f"Call initiated: {call.sid} to {call_arguments['to']}")
+            return call.sid
             
+        except ProviderUnavailable as e:
+            self.logger.warning(f"Call to {to_phone} not attempted: {str(e)}")
+            return NOT_ATTEMPTED
         except Exception as e:
             self.logger.error(f"Error making call to {to_phone}: {str(e)}")
-            return False
+            return None
 
     def setup_routes(self):
         """Setup Flask routes with security validation"""
@@ -154,14 +305,24 @@ class NotificationService:
                 # Get parameters with validation
                 message = request.args.get('message', '').strip()
                 business_name = request.args.get('business_name', '').strip()
-                include_follow_up = request.args.get('include_follow_up', 'false').lower() == 'true'
+                follow_up = request.args.get('include_follow_up', 'false').lower()
+                include_follow_up = follow_up == 'true'
                 
                 # Validate message parameter
                 if not message:
                     return "Missing message parameter", 400
                 
+                # Parameters signed by make_call were validated before the call was placed
+                signature = request.args.get('signature', '')
+                if signature and hmac.compare_digest(
+                        signature, self._sign_voice_parameters(message, business_name, follow_up)):
+                    return self.generate_twiml_response(
+                        SafeMessage(message),
+                        SafeBusinessName(business_name) if business_name else None,
+                        include_follow_up
+                    )
+                
                 # Decode URL parameters safely
-                import urllib.parse
                 try:
                     decoded_message = urllib.parse.unquote(message)
                     decoded_business = urllib.parse.unquote(business_name) if business_name else None
@@ -170,22 +331,18 @@ class NotificationService:
                     return "Invalid parameters", 400
                 
                 # Validate decoded parameters
-                message_validation = InputValidator.validate_message(decoded_message)
-                if not message_validation.is_valid:
+                sanitized_message, message_validation = InputValidator.safe_message(decoded_message)
+                if sanitized_message is None:
                     self.logger.warning(f"Invalid message in webhook: {message_validation.error_message}")
                     return "Invalid message content", 400
                 
-                sanitized_message = message_validation.sanitized_value
                 sanitized_business = None
                 
                 if decoded_business:
-                    business_validation = InputValidator.validate_business_name(decoded_business)
-                    if not business_validation.is_valid:
+                    sanitized_business, business_validation = InputValidator.safe_business_name(decoded_business)
+                    if sanitized_business is None:
                         self.logger.warning(f"Invalid business name in webhook: {business_validation.error_message}")
                         # Continue without business name rather than failing
-                        sanitized_business = None
-                    else:
-                        sanitized_business = business_validation.sanitized_value
                 
                 # Generate TwiML response
                 return self.generate_twiml_response(sanitized_message, sanitized_business, include_follow_up)
@@ -197,8 +354,36 @@ class NotificationService:
                 response.say("We're sorry, there was an error processing your call. Please try again later.")
                 return str(response), 500
 
+        @self.app.route('/voice/status', methods=['POST'])
+        def voice_status():
+            """Record call progress reported by Twilio's status callback"""
+            try:
+                # Only accept callbacks signed by Twilio for the URL make_call registered
+                base_url = self._webhook_base_url()
+                signature = request.headers.get('X-Twilio-Signature', '')
+                if base_url is None or not self.request_validator.validate(
+                        f"{base_url}/voice/status", request.form.to_dict(), signature):
+                    return "Invalid signature", 403
+                
+                sid = request.form.get('CallSid', '')
+                if not sid:
+                    return "Missing CallSid", 400
+                
+                fields = {name: request.form[name] for name in STATUS_CALLBACK_FIELDS if name in request.form}
+                self.logger.info(f"Call {sid} status: {fields.get('CallStatus')}")
+                if self.call_status_recorder is not None:
+                    self.call_status_recorder.record(sid, fields)
+                return "", 204
+                
+            except Exception as e:
+                self.logger.error(f"Error in voice status webhook: {str(e)}")
+                return "Error recording status", 500
+
     def generate_twiml_response(self, message: str, business_name: str = None, include_follow_up: bool = False) -> str:
-        """Generate secure TwiML response with sanitized content"""
+        """
+        Generate secure TwiML response with sanitized content. A SafeMessage
+        and SafeBusinessName skip the escaping passes of sanitize_for_tts.
+        """
         try:
             response = VoiceResponse()
             
@@ -231,25 +416,29 @@ class NotificationService:
             return str(response)
 
     def sanitize_for_tts(self, text: str) -> str:
-        """Sanitize text for Text-to-Speech to prevent injection"""
+        """
+        Sanitize text for Text-to-Speech to prevent injection. A SafeMessage
+        or SafeBusinessName is escaped already and only has control
+        characters removed and its length capped.
+        """
         if not text:
             return ""
         
-        # HTML escape to prevent any markup injection
-        safe_text = html.escape(text, quote=False)
-        
-        # Remove or replace potentially problematic characters for TTS
-        # Remove SSML-like tags to prevent speech synthesis injection
-        import re
-        safe_text = re.sub(r'<[^>]*>', '', safe_text)
+        if isinstance(text, (SafeMessage, SafeBusinessName)):
+            safe_text = text
+        else:
+            # HTML escape to prevent any markup injection
+            safe_text = html.escape(text, quote=False)
+            
+            # Remove SSML-like tags to prevent speech synthesis injection
+            safe_text = SSML_TAG.sub('', safe_text)
         
         # Remove control characters that might affect TTS
-        safe_text = ''.join(char for char in safe_text if ord(char) >= 32 or char in '\n\r\t')
+        safe_text = TTS_CONTROL_CHARS.sub('', safe_text)
         
         # Limit length to prevent extremely long speeches
-        max_length = 1600  # Reasonable limit for phone calls
-        if len(safe_text) > max_length:
-            safe_text = safe_text[:max_length] + "..."
+        if len(safe_text) > MAX_TTS_LENGTH:
+            safe_text = safe_text[:MAX_TTS_LENGTH] + "..."
         
         return safe_text.strip()
 
@@ -257,6 +446,14 @@ class NotificationService:
         """Get available script templates"""
         return self.script_templates.copy()
     
+    def _update_templates_version(self):
+        """
+        Recompute the template registry version after any change. It is a
+        digest of the templates, so workers with the same templates agree on it.
+        """
+        content = json.dumps([self.script_templates, self.follow_up_message], sort_keys=True)
+        self.templates_version = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+    
     def get_full_script_templates(self) -> dict:
         """Get full script templates with follow-up messages"""
         templates = {}
@@ -300,6 +497,7 @@ class NotificationService:
         
         # Add template
         self.script_templates[name] = validation_result.sanitized_value
+        self._update_templates_version()
         return ValidationResult(True, sanitized_value=f"Template '{name}' added successfully")
     
     def test_connection(self) -> ValidationResult:
@@ -0,0 +1,390 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+from services.provider_guard import HALF_OPEN, NOT_ATTEMPTED, OPEN
+from utils.validation import E164Phone, SafeBusinessName, SafeMessage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    tenant TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_recipients (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    message TEXT,
+    business_name TEXT,
+    include_follow_up INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    error TEXT,
+    claimed_by TEXT,
+    claimed_at REAL,
+    call_sid TEXT,
+    not_before REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_recipients_job ON job_recipients(job_id, id);
+CREATE INDEX IF NOT EXISTS idx_job_recipients_status ON job_recipients(status, id);
+CREATE TABLE IF NOT EXISTS call_status (
+    sid TEXT PRIMARY KEY,
+    status TEXT,
+    duration INTEGER,
+    sequence INTEGER NOT NULL DEFAULT -1,
+    error_code TEXT,
+    answered_by TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Recipient states. A recipient is 'sending' while a dispatcher holds it;
+# one whose dispatcher died is sent again once its lease runs out.
+PENDING, SENDING, SENT, FAILED = 'pending', 'sending', 'sent', 'failed'
+
+DEFAULT_LEASE_SECONDS = 300
+# How long a call the circuit breaker turned away waits before it is claimed again
+DEFAULT_REQUEUE_SECONDS = 5
+
+
+def _int_or_none(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class Outbox:
+    """
+    Durable queue of outbound calls, stored in SQLite.
+
+    A send request is written as one job with a row per recipient and
+    acknowledged straight away; an OutboxDispatcher places the calls later
+    and records each recipient's outcome. The database runs in WAL mode and
+    claims are atomic, so every worker process can run a dispatcher over
+    the same outbox without calling anyone twice.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 requeue_seconds: int = DEFAULT_REQUEUE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.requeue_seconds = requeue_seconds
+        self.lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        with self.lock:
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    self._conn.execute(statement)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(job_recipients)")]
+            if 'call_sid' not in columns:
+                # Outboxes created before call status was tracked
+                self._conn.execute("ALTER TABLE job_recipients ADD COLUMN call_sid TEXT")
+            if 'not_before' not in columns:
+                self._conn.execute("ALTER TABLE job_recipients ADD COLUMN not_before REAL")
+
+        # Set whenever this process enqueues, to wake its dispatcher early
+        self.work_available = threading.Event()
+
+    def close(self):
+        with self.lock:
+            self._conn.close()
+
+    def enqueue(self, kind: str, recipients: Sequence[dict], tenant: Optional[str] = None) -> str:
+        """
+        Store a job and return its ID. Each recipient is a dict with name,
+        phone, message, business_name and include_follow_up; a recipient
+        with an 'error' is recorded as failed and never called.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        rows = [
+            (job_id, recipient['name'], recipient['phone'], recipient.get('message'),
+             recipient.get('business_name'), int(bool(recipient.get('include_follow_up'))),
+             FAILED if recipient.get('error') else PENDING, recipient.get('error'), now)
+            for recipient in recipients
+        ]
+        with self.lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, tenant, created_at) VALUES (?, ?, ?, ?)",
+                    (job_id, kind, tenant, now)
+                )
+                self._conn.executemany(
+                    "INSERT INTO job_recipients (job_id, name, phone, message, business_name, "
+                    "include_follow_up, status, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.work_available.set()
+        return job_id
+
+    def claim(self, limit: int) -> List[dict]:
+        """
+        Take up to limit pending recipients (and ones whose lease ran out),
+        oldest first, skipping requeued ones that are not due yet. Returns
+        the calls to make, with their validated values typed again so
+        make_call does not re-validate them.
+        """
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self.lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE job_recipients SET status = ?, claimed_by = ?, claimed_at = ?, updated_at = ? "
+                    "WHERE id IN (SELECT id FROM job_recipients "
+                    "WHERE (status = ? AND (not_before IS NULL OR not_before <= ?)) "
+                    "OR (status = ? AND claimed_at < ?) ORDER BY id LIMIT ?)",
+                    (SENDING, token, now, now, PENDING, now, SENDING, now - self.lease_seconds, limit)
+                )
+                rows = self._conn.execute(
+                    "SELECT id, name, phone, message, business_name, include_follow_up "
+                    "FROM job_recipients WHERE claimed_by = ? AND status = ? ORDER BY id",
+                    (token, SENDING)
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        # Only values that passed InputValidator are ever enqueued
+        return [
+            {
+                'id': row[0],
+                'claimed_by': token,
+                'name': row[1],
+                'to_phone': E164Phone(row[2]),
+                'message': SafeMessage(row[3]),
+                'business_name': SafeBusinessName(row[4]) if row[4] else None,
+                'include_follow_up': bool(row[5]),
+            }
+            for row in rows
+        ]
+
+    def renew(self, calls: Sequence[dict]) -> None:
+        """Extend the lease on claimed calls that are still being placed"""
+        now = time.time()
+        with self.lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE job_recipients SET claimed_at = ? WHERE id = ? AND claimed_by = ? AND status = ?",
+                    [(now, call['id'], call['claimed_by'], SENDING) for call in calls]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def complete(self, results: Sequence[tuple]) -> None:
+        """
+        Record (recipient id, call SID or None, error) for claimed
+        recipients. A recipient whose call was NOT_ATTEMPTED goes back to
+        pending, unclaimed, and is not claimed again for requeue_seconds.
+        """
+        now = time.time()
+        finished = [
+            (SENT if sid else FAILED, sid, error, now, recipient_id)
+            for recipient_id, sid, error in results if sid != NOT_ATTEMPTED
+        ]
+        requeued = [
+            (PENDING, now + self.requeue_seconds, now, recipient_id)
+            for recipient_id, sid, _ in results if sid == NOT_ATTEMPTED
+        ]
+        with self.lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE job_recipients SET status = ?, call_sid = ?, error = ?, claimed_by = NULL, updated_at = ? "
+                    "WHERE id = ?",
+                    finished
+                )
+                self._conn.executemany(
+                    "UPDATE job_recipients SET status = ?, claimed_by = NULL, claimed_at = NULL, not_before = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    requeued
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def record_call_statuses(self, statuses: Dict[str, dict]) -> None:
+        """
+        Store Twilio status callback fields, keyed by call SID, in one
+        transaction. A callback older (by SequenceNumber) than the one
+        already stored for its call is ignored.
+        """
+        now = time.time()
+        rows = [
+            (sid, fields.get('CallStatus'), _int_or_none(fields.get('CallDuration')),
+             _int_or_none(fields.get('SequenceNumber'), -1), fields.get('ErrorCode'), fields.get('AnsweredBy'), now)
+            for sid, fields in statuses.items()
+        ]
+        with self.lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO call_status (sid, status, duration, sequence, error_code, answered_by, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(sid) DO UPDATE SET status = excluded.status, "
+                    "duration = COALESCE(excluded.duration, call_status.duration), sequence = excluded.sequence, "
+                    "error_code = COALESCE(excluded.error_code, call_status.error_code), "
+                    "answered_by = COALESCE(excluded.answered_by, call_status.answered_by), "
+                    "updated_at = excluded.updated_at "
+                    "WHERE excluded.sequence >= call_status.sequence",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_job(self, job_id: str, tenant: Optional[str] = None) -> Optional[dict]:
+        """A job with per-recipient status, or None if it does not exist (for tenant)"""
+        with self.lock:
+            job = self._conn.execute(
+                "SELECT id, kind, tenant, created_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if job is None or (tenant is not None and job[2] != tenant):
+                return None
+            recipients = self._conn.execute(
+                "SELECT r.name, r.phone, r.status, r.error, r.updated_at, r.call_sid, c.status, c.duration "
+                "FROM job_recipients r LEFT JOIN call_status c ON c.sid = r.call_sid "
+                "WHERE r.job_id = ? ORDER BY r.id",
+                (job_id,)
+            ).fetchall()
+
+        counts = {state: 0 for state in (PENDING, SENDING, SENT, FAILED)}
+        for recipient in recipients:
+            counts[recipient[2]] += 1
+        if counts[PENDING] + counts[SENDING] == 0:
+            status = 'completed'
+        elif counts[SENDING] + counts[SENT] == 0:
+            status = 'queued'
+        else:
+            status = 'in_progress'
+
+        return {
+            'id': job[0],
+            'kind': job[1],
+            'created_at': job[3],
+            'status': status,
+            'total': len(recipients),
+            'counts': counts,
+            'recipients': [
+                {'name': name, 'phone': phone, 'status': state, 'error': error, 'updated_at': updated_at,
+                 'call_sid': call_sid, 'call_status': call_status, 'call_duration': call_duration}
+                for name, phone, state, error, updated_at, call_sid, call_status, call_duration in recipients
+            ],
+        }
+
+
+class OutboxDispatcher:
+    """
+    Background thread that drains an Outbox through a call dispatcher.
+
+    It claims up to batch_size recipients at a time and places their calls
+    concurrently. When the outbox is empty it waits for a local enqueue, or
+    poll_seconds for jobs enqueued by other processes. While the provider's
+    circuit breaker is open, recipients are left queued instead of being
+    claimed; while it is half-open, one recipient at a time is claimed for
+    the trial call. Calls the breaker still turns away go back to the queue.
+    The lease on a batch is renewed while its calls are being placed, so a
+    slow provider never lets another dispatcher claim and call them again.
+    """
+
+    def __init__(self, outbox: Outbox, call_dispatcher, batch_size: int = 100, poll_seconds: float = 1.0,
+                 breaker=None):
+        self.outbox = outbox
+        self.call_dispatcher = call_dispatcher
+        self.breaker = breaker
+        self.batch_size = max(1, batch_size)
+        self.poll_seconds = poll_seconds
+
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='outbox-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Finish the current batch and stop"""
+        self._stopping.set()
+        self.outbox.work_available.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            limit = self.batch_size
+            if self.breaker is not None:
+                state = self.breaker.current_state()
+                if state == OPEN:
+                    self._stopping.wait(self.poll_seconds)
+                    continue
+                if state == HALF_OPEN:
+                    limit = 1
+            try:
+                drained = self.drain_once(limit)
+            except Exception as e:
+                print(f"Error dispatching outbox: {e}")
+                drained = 0
+            if not drained:
+                self.outbox.work_available.wait(self.poll_seconds)
+                self.outbox.work_available.clear()
+
+    def drain_once(self, limit: Optional[int] = None) -> int:
+        """
+        Send one batch of up to limit (default batch_size) recipients;
+        returns the number handled, not counting those queued again
+        """
+        calls = self.outbox.claim(limit or self.batch_size)
+        if not calls:
+            return 0
+
+        placed = threading.Event()
+        lease_keeper = threading.Thread(target=self._keep_lease, args=(calls, placed),
+                                        name='outbox-lease', daemon=True)
+        lease_keeper.start()
+        try:
+            sids = self.call_dispatcher.send_calls([
+                {key: call[key] for key in ('to_phone', 'message', 'business_name', 'include_follow_up')}
+                for call in calls
+            ])
+        finally:
+            placed.set()
+            lease_keeper.join()
+
+        self.outbox.complete([
+            (call['id'], sid, None if sid else f"Failed to send alert to {call['name']}")
+            for call, sid in zip(calls, sids)
+        ])
+        return sum(1 for sid in sids if sid != NOT_ATTEMPTED)
+
+    def _keep_lease(self, calls: List[dict], placed: threading.Event) -> None:
+        """Renew the lease on a batch every third of the lease until its calls are placed"""
+        while not placed.wait(self.outbox.lease_seconds / 3):
+            try:
+                self.outbox.renew(calls)
+            except Exception as e:
+                print(f"Error renewing outbox lease: {e}")
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+# Circuit breaker states
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+# Returned instead of a call SID when the breaker kept a call from being
+# attempted at all, so it can be queued again rather than failed
+NOT_ATTEMPTED = 'not_attempted'
+
+
+class ProviderUnavailable(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker for one provider.
+
+    After failure_threshold consecutive transient failures the breaker
+    opens and calls fail fast for reset_seconds, so callers do not queue up
+    behind a provider that is down. Then one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+        # Counters since start, for metrics()
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _check_reset(self) -> None:
+        """Go half-open once the breaker has been open for reset_seconds (lock held)"""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = HALF_OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now"""
+        with self._lock:
+            self._check_reset()
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def current_state(self) -> str:
+        """
+        CLOSED, OPEN (rejecting calls) or HALF_OPEN (due for a trial call,
+        which only one caller gets)
+        """
+        with self._lock:
+            self._check_reset()
+            return self.state
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            self.state = CLOSED
+
+    def record_failure(self) -> None:
+        """A transient provider failure (errors caused by the request itself do not count)"""
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """End a call that neither succeeded nor failed transiently"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def metrics(self) -> dict:
+        with self._lock:
+            self._check_reset()
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_seconds': self.reset_seconds,
+                'open_for_seconds': round(time.monotonic() - self.opened_at, 3) if self.state == OPEN else 0,
+                'successes': self.successes,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'times_opened': self.times_opened,
+            }
+
+
+class ProviderGuard:
+    """
+    Wraps provider calls with retries and a circuit breaker.
+
+    A call that fails with an error is_transient() accepts is retried up to
+    max_attempts in total, sleeping between attempts with capped
+    exponential backoff and full jitter: a random delay between 0 and
+    min(max_delay, base_delay * 2 ** retry). Other errors are raised at
+    once. Failures that is_outage() accepts (by default the transient ones)
+    count against the breaker, so errors that are unsafe to retry can still
+    open it.
+    """
+
+    def __init__(self, is_transient: Callable[[BaseException], bool], breaker: Optional[CircuitBreaker] = None,
+                 max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 5.0,
+                 is_outage: Optional[Callable[[BaseException], bool]] = None):
+        self.is_transient = is_transient
+        self.is_outage = is_outage or is_transient
+        self.breaker = breaker or CircuitBreaker()
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, is_transient: Callable[[BaseException], bool],
+                 is_outage: Optional[Callable[[BaseException], bool]] = None) -> 'ProviderGuard':
+        """A guard configured from the ONARRIVAL_PROVIDER_* / ONARRIVAL_BREAKER_* variables"""
+        breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('ONARRIVAL_BREAKER_FAILURES', '5')),
+            reset_seconds=float(os.getenv('ONARRIVAL_BREAKER_RESET_SECONDS', '30'))
+        )
+        return cls(
+            is_transient,
+            breaker,
+            max_attempts=int(os.getenv('ONARRIVAL_PROVIDER_MAX_ATTEMPTS', '3')),
+            base_delay=int(os.getenv('ONARRIVAL_PROVIDER_BACKOFF_MS', '200')) / 1000.0,
+            max_delay=int(os.getenv('ONARRIVAL_PROVIDER_MAX_BACKOFF_MS', '5000')) / 1000.0,
+            is_outage=is_outage
+        )
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay before the given retry (0 for the first retry)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+    def _before_attempt(self) -> None:
+        if not self.breaker.allow():
+            raise ProviderUnavailable("Provider circuit breaker is open")
+
+    def _after_failure(self, error: BaseException, attempt: int) -> bool:
+        """Record a failed attempt; True if it should be retried"""
+        transient = self.is_transient(error)
+        if transient or self.is_outage(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+        if not transient or attempt + 1 >= self.max_attempts:
+            return False
+        with self._lock:
+            self.retries += 1
+        return True
+
+    def call(self, function: Callable, *args, **kwargs):
+        """function(*args, **kwargs) with retries, on the calling thread"""
+        for attempt in range(self.max_attempts):
+            self._before_attempt()
+            try:
+                result = function(*args, **kwargs)
+            except Exception as e:
+                if not self._after_failure(e, attempt):
+                    raise
+                time.sleep(self.backoff(attempt))
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def call_async(self, function: Callable, *args, **kwargs):
+        """await function(*args, **kwargs) with retries"""
+        for attempt in range(self.max_attempts):
+            self._before_attempt()
+            try:
+                result = await function(*args, **kwargs)
+            except Exception as e:
+                if not self._after_failure(e, attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                continue
+            self.breaker.record_success()
+            return result
+
+    def metrics(self) -> dict:
+        metrics = self.breaker.metrics()
+        metrics['retries'] = self.retries
+        metrics['max_attempts'] = self.max_attempts
+        return metrics
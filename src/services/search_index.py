@@ -0,0 +1,95 @@
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+from models.contact import Contact
+
+# Characters people type in phone numbers that aren't digits
+PHONE_PUNCTUATION = re.compile(r'[\s+().-]')
+
+# Prefix of name entries vs phone entries, so the two never match each other
+NAME_KEY = 'n:'
+PHONE_KEY = 'p:'
+
+
+def normalize_name(text: str) -> str:
+    return ' '.join(text.casefold().split())
+
+
+def _name_keys(name: str) -> List[str]:
+    """
+    The full name and every suffix starting at a word boundary, so that
+    "ann l" finds "Mary Ann Lee" as well as "Ann Lowe".
+    """
+    words = normalize_name(name).split(' ')
+    return [NAME_KEY + ' '.join(words[i:]) for i in range(len(words))]
+
+
+def _contact_keys(contact: Contact) -> List[str]:
+    return _name_keys(contact.name) + [PHONE_KEY + contact.phone.lstrip('+')]
+
+
+class ContactSearchIndex:
+    """
+    Prefix index over contact names and phone digits, for typeahead.
+
+    Keys live in one sorted list of (key, phone) pairs, so a prefix query is
+    a binary search followed by a scan over the matching run. Conceptually
+    this is a trie flattened into sorted order; it supports the same prefix
+    walks at a fraction of the memory of one dict per character. Adding or
+    removing a contact touches only its own few keys.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[str, str]] = []
+        self._contacts: Dict[str, Contact] = {}
+
+    def __len__(self) -> int:
+        return len(self._contacts)
+
+    def rebuild(self, contacts: Iterable[Contact]):
+        self._contacts = {contact.phone: contact for contact in contacts}
+        self._entries = sorted(
+            (key, phone) for phone, contact in self._contacts.items() for key in _contact_keys(contact)
+        )
+
+    def add(self, contact: Contact):
+        self.remove(contact.phone)
+        self._contacts[contact.phone] = contact
+        for key in _contact_keys(contact):
+            insort(self._entries, (key, contact.phone))
+
+    def remove(self, phone: str):
+        contact = self._contacts.pop(phone, None)
+        if contact is None:
+            return
+        for key in _contact_keys(contact):
+            i = bisect_left(self._entries, (key, phone))
+            if i < len(self._entries) and self._entries[i] == (key, phone):
+                del self._entries[i]
+
+    def search(self, query: str, limit: int = 20) -> List[Contact]:
+        """
+        Contacts whose name (or a word in it) starts with ``query``, or whose
+        phone number starts with it when the query is all digits.
+        """
+        digits = PHONE_PUNCTUATION.sub('', query)
+        if digits.isdigit():
+            prefix = PHONE_KEY + digits
+        else:
+            prefix = NAME_KEY + normalize_name(query)
+            if prefix == NAME_KEY:
+                return []
+
+        results = []
+        seen = set()
+        i = bisect_left(self._entries, (prefix, ''))
+        while i < len(self._entries) and len(results) < limit:
+            key, phone = self._entries[i]
+            if not key.startswith(prefix):
+                break
+            if phone not in seen:
+                seen.add(phone)
+                results.append(self._contacts[phone])
+            i += 1
+        return results
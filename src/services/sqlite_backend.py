@@ -0,0 +1,506 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from models.contact import Contact
+from models.group import Group, GroupSummary
+from services.storage_backends import name_key, parse_group_record
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contacts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    phone TEXT NOT NULL UNIQUE,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_contacts_name_key ON contacts(name_key);
+CREATE TABLE IF NOT EXISTS contact_groups (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL UNIQUE,
+    version INTEGER NOT NULL DEFAULT 1,
+    member_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS group_members (
+    id INTEGER PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES contact_groups(id) ON DELETE CASCADE,
+    contact_id INTEGER NOT NULL REFERENCES contacts(id) ON DELETE CASCADE,
+    UNIQUE (group_id, contact_id)
+);
+CREATE INDEX IF NOT EXISTS idx_group_members_contact ON group_members(contact_id);
+CREATE INDEX IF NOT EXISTS idx_group_members_group ON group_members(group_id, id);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', '0');
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', lower(hex(randomblob(4))));
+"""
+
+# Bump meta.data_version on any change to the data, including changes made by
+# other tools, so readers can tell cheaply whether anything changed
+DATA_VERSION_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version AFTER {event} ON {table} "
+    f"BEGIN UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'data_version'; END"
+    for table in ('contacts', 'contact_groups', 'group_members')
+    for event in ('INSERT', 'UPDATE', 'DELETE')
+]
+
+# A group's version covers its membership, including members removed by a
+# cascading contact delete
+MEMBERSHIP_VERSION_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS group_members_{event.lower()}_group_version AFTER {event} ON group_members "
+    f"BEGIN UPDATE contact_groups SET version = version + 1 WHERE id = {row}.group_id; END"
+    for event, row in (('INSERT', 'NEW'), ('DELETE', 'OLD'))
+]
+
+# Precomputed member counts, so group summaries never scan memberships
+MEMBER_COUNT_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS group_members_{event.lower()}_member_count AFTER {event} ON group_members "
+    f"BEGIN UPDATE contact_groups SET member_count = member_count {sign} 1 WHERE id = {row}.group_id; END"
+    for event, sign, row in (('INSERT', '+', 'NEW'), ('DELETE', '-', 'OLD'))
+]
+
+
+class SqliteStorageBackend:
+    """
+    Stores contacts, groups and group memberships in SQLite.
+
+    Memberships reference rows in the contacts table, so renaming a contact is
+    visible in every group and deleting one cascades to its memberships.
+
+    Every mutation is a single indexed statement or one short transaction, so
+    the cost of a change no longer depends on the size of the contact book.
+    The database runs in WAL mode so readers in other workers are never blocked
+    by a writer.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self._session_depth = 0
+
+        # One connection per storage instance, serialized by self.lock
+        self._conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._init_schema()
+
+    def _init_schema(self):
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(group_members)")]
+        legacy_members = 'phone' in columns
+
+        with self.session():
+            if legacy_members:
+                # Early databases stored a copy of each member's name and phone
+                self._conn.execute("ALTER TABLE group_members RENAME TO group_members_v1")
+            for statement in SCHEMA.split(';'):
+                if statement.strip():
+                    self._conn.execute(statement)
+            for table in ('contacts', 'contact_groups'):
+                # Databases created before records carried versions
+                table_columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")]
+                if 'version' not in table_columns:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            group_columns = [row[1] for row in self._conn.execute("PRAGMA table_info(contact_groups)")]
+            if 'member_count' not in group_columns:
+                # Databases created before counts were kept
+                self._conn.execute("ALTER TABLE contact_groups ADD COLUMN member_count INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute(
+                    "UPDATE contact_groups SET member_count = "
+                    "(SELECT COUNT(*) FROM group_members WHERE group_id = contact_groups.id)"
+                )
+            for trigger in DATA_VERSION_TRIGGERS + MEMBERSHIP_VERSION_TRIGGERS + MEMBER_COUNT_TRIGGERS:
+                self._conn.execute(trigger)
+            if legacy_members:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO contacts (name, name_key, phone) "
+                    "SELECT name, name_key, phone FROM group_members_v1 ORDER BY id"
+                )
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO group_members (group_id, contact_id) "
+                    "SELECT m.group_id, c.id FROM group_members_v1 m "
+                    "JOIN contacts c ON c.phone = m.phone ORDER BY m.id"
+                )
+                self._conn.execute("DROP TABLE group_members_v1")
+
+    def close(self):
+        with self.lock:
+            self._conn.close()
+
+    def fingerprint(self) -> list:
+        """Changes whenever the stored data changes"""
+        return [int(self.get_meta('data_version') or 0)]
+
+    def data_version(self) -> str:
+        """
+        meta.data_version, bumped by triggers on every change, qualified by
+        the database's generation (set when it is created), so a recreated
+        database never repeats an old version
+        """
+        return f"{self.get_meta('generation')}.{self.fingerprint()[0]}"
+
+    @contextmanager
+    def session(self):
+        """
+        Hold the storage lock and an IMMEDIATE transaction across several calls,
+        so a check-then-write sequence is atomic across processes too.
+        """
+        with self.lock:
+            outermost = self._session_depth == 0
+            if outermost:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._session_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._session_depth -= 1
+                if outermost:
+                    self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._session_depth -= 1
+                if outermost:
+                    self._conn.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # Metadata
+    # ------------------------------------------------------------------
+
+    def transaction(self):
+        """Several mutations in one database transaction; a session already is one"""
+        return self.session()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def is_empty(self) -> bool:
+        with self.lock:
+            contacts = self._conn.execute("SELECT 1 FROM contacts LIMIT 1").fetchone()
+            groups = self._conn.execute("SELECT 1 FROM contact_groups LIMIT 1").fetchone()
+            return contacts is None and groups is None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _group_id(self, name: str) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT id FROM contact_groups WHERE name_key = ?", (name_key(name),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _group_contacts(self, group_id: int) -> List[Contact]:
+        rows = self._conn.execute(
+            "SELECT c.name, c.phone, c.version FROM group_members m JOIN contacts c ON c.id = m.contact_id "
+            "WHERE m.group_id = ? ORDER BY m.id",
+            (group_id,)
+        )
+        return [_contact(row) for row in rows]
+
+    def list_contacts(self) -> List[Contact]:
+        with self.lock:
+            rows = self._conn.execute("SELECT name, phone, version FROM contacts ORDER BY id")
+            return [_contact(row) for row in rows]
+
+    def iter_contacts(self, batch_size: int = 500) -> Iterator[Contact]:
+        """Yield contacts in id order, fetching one keyset page at a time"""
+        last_id = 0
+        while True:
+            with self.lock:
+                rows = self._conn.execute(
+                    "SELECT id, name, phone, version FROM contacts WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _contact(row[1:])
+            last_id = rows[-1][0]
+
+    def list_groups(self) -> List[Group]:
+        with self.lock:
+            groups = {}
+            rows = self._conn.execute("SELECT id, name, version FROM contact_groups ORDER BY id")
+            for group_id, name, version in rows:
+                groups[group_id] = Group(name, validate=False, version=version)
+            rows = self._conn.execute(
+                "SELECT m.group_id, c.name, c.phone, c.version FROM group_members m "
+                "JOIN contacts c ON c.id = m.contact_id ORDER BY m.id"
+            )
+            for row in rows:
+                groups[row[0]].contacts.append(_contact(row[1:]))
+            return list(groups.values())
+
+    def get_contact(self, phone: str) -> Optional[Contact]:
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT name, phone, version FROM contacts WHERE phone = ?", (phone,)
+            ).fetchone()
+            return _contact(row) if row else None
+
+    def find_contact_by_name(self, name: str) -> Optional[Contact]:
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT name, phone, version FROM contacts WHERE name_key = ? LIMIT 1", (name_key(name),)
+            ).fetchone()
+            return _contact(row) if row else None
+
+    def get_group(self, name: str) -> Optional[Group]:
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT id, name, version FROM contact_groups WHERE name_key = ?", (name_key(name),)
+            ).fetchone()
+            if not row:
+                return None
+            return Group(row[1], self._group_contacts(row[0]), validate=False, version=row[2])
+
+    def has_group(self, name: str) -> bool:
+        with self.lock:
+            return self._group_id(name) is not None
+
+    def group_member(self, group_name: str, phone: str) -> Optional[Contact]:
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT c.name, c.phone, c.version FROM group_members m "
+                "JOIN contact_groups g ON g.id = m.group_id "
+                "JOIN contacts c ON c.id = m.contact_id "
+                "WHERE g.name_key = ? AND c.phone = ?",
+                (name_key(group_name), phone)
+            ).fetchone()
+            return _contact(row) if row else None
+
+    def group_member_by_name(self, group_name: str, contact_name: str) -> Optional[Contact]:
+        with self.lock:
+            row = self._conn.execute(
+                "SELECT c.name, c.phone, c.version FROM group_members m "
+                "JOIN contact_groups g ON g.id = m.group_id "
+                "JOIN contacts c ON c.id = m.contact_id "
+                "WHERE g.name_key = ? AND c.name_key = ? LIMIT 1",
+                (name_key(group_name), name_key(contact_name))
+            ).fetchone()
+            return _contact(row) if row else None
+
+    def groups_for_contact(self, phone: str) -> List[str]:
+        """Names of the groups a contact belongs to"""
+        with self.lock:
+            rows = self._conn.execute(
+                "SELECT g.name FROM group_members m "
+                "JOIN contact_groups g ON g.id = m.group_id "
+                "JOIN contacts c ON c.id = m.contact_id "
+                "WHERE c.phone = ? ORDER BY g.id",
+                (phone,)
+            )
+            return [name for (name,) in rows]
+
+    def group_summaries(self) -> List[GroupSummary]:
+        with self.lock:
+            rows = self._conn.execute("SELECT name, version, member_count FROM contact_groups ORDER BY id")
+            return [GroupSummary(*row) for row in rows]
+
+    def group_members_page(self, group_name: str, cursor: Optional[str],
+                           limit: int) -> Optional[Tuple[List[Contact], Optional[str]]]:
+        """
+        One page of a group's members and the cursor of the next page, or None
+        if no such group. The cursor is the membership row id, so pages stay
+        stable while members are added or removed.
+        """
+        if cursor and not cursor.isdigit():
+            raise ValueError('Invalid cursor')
+        with self.lock:
+            group_id = self._group_id(group_name)
+            if group_id is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT m.id, c.name, c.phone, c.version FROM group_members m "
+                "JOIN contacts c ON c.id = m.contact_id "
+                "WHERE m.group_id = ? AND m.id > ? ORDER BY m.id LIMIT ?",
+                (group_id, int(cursor or 0), limit + 1)
+            ).fetchall()
+        next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+        return [_contact(row[1:]) for row in rows[:limit]], next_cursor
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def _upsert_contacts(self, contacts: List[Contact]):
+        """Insert contacts whose phone isn't stored yet; existing rows are kept"""
+        self._conn.executemany(
+            "INSERT INTO contacts (name, name_key, phone) VALUES (?, ?, ?) ON CONFLICT(phone) DO NOTHING",
+            [(c.name, name_key(c.name), c.phone) for c in contacts if c.name]
+        )
+
+    def _insert_members(self, group_id: int, contacts: List[Contact]):
+        self._upsert_contacts(contacts)
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO group_members (group_id, contact_id) "
+            "SELECT ?, id FROM contacts WHERE phone = ?",
+            [(group_id, c.phone) for c in contacts]
+        )
+
+    def _insert_group_rows(self, group: Group):
+        cursor = self._conn.execute(
+            "INSERT INTO contact_groups (name, name_key) VALUES (?, ?)",
+            (group.name, name_key(group.name))
+        )
+        self._insert_members(cursor.lastrowid, group.contacts)
+
+    def replace_contacts(self, contacts: List[Contact]):
+        # Upsert by phone rather than delete-and-reinsert, so memberships of
+        # contacts that are kept survive; memberships of dropped ones cascade
+        with self.session():
+            self._conn.executemany(
+                "INSERT INTO contacts (name, name_key, phone) VALUES (?, ?, ?) "
+                "ON CONFLICT(phone) DO UPDATE SET name = excluded.name, name_key = excluded.name_key, "
+                "version = version + (name != excluded.name)",
+                [(c.name, name_key(c.name), c.phone) for c in contacts]
+            )
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS kept_phones (phone TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM kept_phones")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO kept_phones (phone) VALUES (?)", [(c.phone,) for c in contacts]
+            )
+            self._conn.execute("DELETE FROM contacts WHERE phone NOT IN (SELECT phone FROM kept_phones)")
+
+    def replace_groups(self, groups: List[Group]):
+        with self.session():
+            self._conn.execute("DELETE FROM contact_groups")
+            for group in groups:
+                self._insert_group_rows(group)
+
+    def insert_contact(self, contact: Contact):
+        with self.lock:
+            self._conn.execute(
+                "INSERT INTO contacts (name, name_key, phone) VALUES (?, ?, ?)",
+                (contact.name, name_key(contact.name), contact.phone)
+            )
+
+    def insert_contacts(self, contacts: List[Contact]) -> int:
+        """Insert many contacts in one transaction"""
+        with self.session():
+            cursor = self._conn.executemany(
+                "INSERT INTO contacts (name, name_key, phone) VALUES (?, ?, ?)",
+                [(c.name, name_key(c.name), c.phone) for c in contacts]
+            )
+            return cursor.rowcount
+
+    def update_contact(self, old_phone: str, contact: Contact) -> bool:
+        # Groups reference the row, so they see the new name/phone as well
+        with self.lock:
+            cursor = self._conn.execute(
+                "UPDATE contacts SET name = ?, name_key = ?, phone = ?, version = version + 1 WHERE phone = ?",
+                (contact.name, name_key(contact.name), contact.phone, old_phone)
+            )
+            return cursor.rowcount > 0
+
+    def delete_contact(self, phone: str) -> bool:
+        """Delete a contact; its group memberships are removed by cascade"""
+        with self.lock:
+            cursor = self._conn.execute("DELETE FROM contacts WHERE phone = ?", (phone,))
+            return cursor.rowcount > 0
+
+    def insert_group(self, group: Group):
+        with self.session():
+            self._insert_group_rows(group)
+
+    def replace_group(self, group: Group) -> bool:
+        with self.session():
+            group_id = self._group_id(group.name)
+            if group_id is None:
+                return False
+            self._conn.execute(
+                "UPDATE contact_groups SET name = ?, version = version + 1 WHERE id = ?", (group.name, group_id)
+            )
+            self._conn.execute("DELETE FROM group_members WHERE group_id = ?", (group_id,))
+            self._insert_members(group_id, group.contacts)
+            return True
+
+    def delete_group(self, name: str) -> bool:
+        with self.lock:
+            cursor = self._conn.execute(
+                "DELETE FROM contact_groups WHERE name_key = ?", (name_key(name),)
+            )
+            return cursor.rowcount > 0
+
+    def add_group_member(self, group_name: str, contact: Contact) -> bool:
+        with self.session():
+            group_id = self._group_id(group_name)
+            if group_id is None:
+                return False
+            self._insert_members(group_id, [contact])
+            return True
+
+    def remove_group_member(self, group_name: str, phone: str) -> bool:
+        with self.lock:
+            cursor = self._conn.execute(
+                "DELETE FROM group_members "
+                "WHERE group_id = (SELECT id FROM contact_groups WHERE name_key = ?) "
+                "AND contact_id = (SELECT id FROM contacts WHERE phone = ?)",
+                (name_key(group_name), phone)
+            )
+            return cursor.rowcount > 0
+
+
+def _contact(row) -> Contact:
+    """Contact from a (name, phone, version) row"""
+    return Contact(row[0], row[1], validate=False, version=row[2])
+
+
+def _unique(items, key) -> list:
+    seen = set()
+    unique = []
+    for item in items:
+        item_key = key(item)
+        if item_key not in seen:
+            seen.add(item_key)
+            unique.append(item)
+    return unique
+
+
+def migrate_json_to_sqlite(contacts_file: str, groups_file: str, backend: SqliteStorageBackend) -> str:
+    """
+    One-shot import of the legacy contacts.json/groups.json files into SQLite.
+
+    Runs in a single transaction and records the migration in the meta table,
+    so calling it again is a no-op.
+    """
+    if backend.get_meta('migrated_from_json'):
+        return "Already migrated"
+
+    def read_list(path):
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    contacts = [Contact.from_dict(c) for c in read_list(contacts_file)]
+    groups = [Group(*parse_group_record(g), validate=False) for g in read_list(groups_file)]
+
+    # The JSON files never enforced uniqueness on disk; keep the first occurrence
+    unique_contacts = _unique(contacts, lambda c: c.phone)
+    unique_groups = _unique(groups, lambda g: name_key(g.name))
+    for group in unique_groups:
+        group.contacts = _unique(group.contacts, lambda c: c.phone)
+
+    with backend.session():
+        backend.replace_contacts(unique_contacts)
+        backend.replace_groups(unique_groups)
+        backend.set_meta('migrated_from_json', '1')
+
+    return f"Migrated {len(unique_contacts)} contacts and {len(unique_groups)} groups"
@@ -0,0 +1,789 @@
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process file locks
+    fcntl = None
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from models.contact import Contact
+from models.group import Group, GroupSummary
+
+
+# Collections touched by a mutation
+CONTACTS = 'contacts'
+GROUPS = 'groups'
+
+
+def name_key(name: str) -> str:
+    """Normalize a contact or group name for case-insensitive lookups"""
+    return name.casefold()
+
+
+def stat_stamp(st: os.stat_result) -> tuple:
+    """Cheap change detector for a file: (mtime_ns, size, inode)"""
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def file_fingerprint(paths: List[str]) -> list:
+    """Stamps of several files, with None for files that don't exist"""
+    fingerprint = []
+    for path in paths:
+        try:
+            fingerprint.append(list(stat_stamp(os.stat(path))))
+        except FileNotFoundError:
+            fingerprint.append(None)
+    return fingerprint
+
+
+def load_generation(paths: List[str]) -> str:
+    """
+    Generation of a resident store, taken when it loads its files.
+
+    Derived from the files' stamps, so processes that load the same data
+    agree on it, and it changes once the files have been rewritten. A store
+    without any files yet gets a random one. Paired with the store's change
+    counter it gives data versions that no other run of the store repeats.
+    """
+    fingerprint = file_fingerprint(paths)
+    if all(stamp is None for stamp in fingerprint):
+        return os.urandom(4).hex()
+    return hashlib.sha1(json.dumps(fingerprint).encode()).hexdigest()[:8]
+
+
+def _atomic_write(path: str, mode: str, write) -> tuple:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+            stamp = stat_stamp(os.fstat(f.fileno()))
+        os.replace(temp_path, path)
+        return stamp
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def atomic_write_json(path: str, data, **dump_kwargs) -> tuple:
+    """
+    Write JSON to a temp file in the same directory, fsync it and rename it
+    over ``path``, so concurrent readers see either the old or the new file,
+    never a truncated one.
+
+    Returns the stamp of the written file. It is taken before the rename, so
+    it can't describe a newer file written by another process.
+    """
+    return _atomic_write(path, 'w', lambda f: json.dump(data, f, **dump_kwargs))
+
+
+def atomic_write_bytes(path: str, data: bytes) -> tuple:
+    """Binary counterpart of atomic_write_json"""
+    return _atomic_write(path, 'wb', lambda f: f.write(data))
+
+
+def atomic_write_buffers(path: str, buffers: list) -> tuple:
+    """Like atomic_write_bytes, for data split across several buffers (bytes, arrays) written in turn"""
+    def write(f):
+        for buffer in buffers:
+            f.write(buffer)
+    return _atomic_write(path, 'wb', write)
+
+
+def copy_contact(contact: Contact) -> Contact:
+    """Detached copy of a stored contact, so callers can't mutate the store"""
+    return Contact(contact.name, contact.phone, validate=False, version=contact.version)
+
+
+def parse_group_record(data: dict) -> Tuple[str, List[Contact]]:
+    """
+    Read a stored group record.
+
+    Current records list member phone numbers under ``members``; the contacts
+    themselves live in the contacts table. Legacy records embed full contact
+    copies under ``contacts``. Returns the group name and its members, with
+    names only for embedded contacts.
+    """
+    if 'members' in data:
+        return data['name'], [Contact('', phone, validate=False) for phone in data['members']]
+    return data['name'], [Contact.from_dict(c) for c in data.get('contacts', [])]
+
+
+def page_members(phones: List[str], cursor: Optional[str], limit: int) -> Tuple[List[str], Optional[str]]:
+    """
+    Slice an ordered member list for cursor pagination.
+
+    Cursors have the form ``<index>:<phone>`` of the last member returned.
+    If members were added or removed before it since, the page resumes after
+    that phone wherever it now is. Raises ValueError for a malformed cursor.
+    """
+    start = 0
+    if cursor:
+        index, separator, phone = cursor.partition(':')
+        if not separator or not index.isdigit():
+            raise ValueError('Invalid cursor')
+        start = int(index) + 1
+        if start > len(phones) or phones[start - 1] != phone:
+            try:
+                start = phones.index(phone) + 1
+            except ValueError:
+                # That member has since left the group; keep the position
+                start = min(start, len(phones))
+
+    page = phones[start:start + limit]
+    end = start + len(page)
+    next_cursor = f"{end - 1}:{page[-1]}" if page and end < len(phones) else None
+    return page, next_cursor
+
+
+class JsonStorageBackend:
+    """
+    Persists contacts and groups as JSON files.
+
+    The working set is held in dictionaries indexed by E.164 phone number and
+    casefolded name, so lookups are O(1) once the data is loaded.
+
+    With ``resident=False`` the files may be changed by other processes (e.g.
+    other gunicorn workers). Before each operation the store compares each
+    file's (mtime_ns, size, inode) stamp with the one it last parsed, and
+    re-parses only a file that actually changed. With ``resident=True`` this
+    process owns the files: the data stays in memory and the files are only
+    touched when a mutation is written through.
+
+    Files are replaced atomically. A resident store can also group-commit:
+    with ``commit_window`` > 0 seconds, mutations within the window are
+    collapsed into a single fsync'd write per file. Changes made inside the
+    window are lost if the process dies before it closes.
+    """
+
+    def __init__(self, contacts_file: str, groups_file: str, resident: bool = False,
+                 commit_window: float = 0.0):
+        self.contacts_file = contacts_file
+        self.groups_file = groups_file
+        self.resident = resident
+        self.lock = threading.RLock()
+
+        # Group commit needs the resident working set to hold pending changes
+        self.commit_window = commit_window if resident else 0.0
+        self._dirty = set()
+        self._flush_timer = None
+        if self.commit_window > 0:
+            atexit.register(self.flush)
+
+        self._loaded = False
+        self._session_depth = 0
+        self._stamps: Dict[str, tuple] = {}              # path -> stamp of the parsed file
+        # Resident data version: the generation loaded and mutation count
+        self._generation = None
+        self._mutations = 0
+        # (op, fields, changed) queued by the open transaction, if any
+        self._pending: Optional[list] = None
+        # Primary state. Every contact has an internal id that survives a
+        # change of phone number; groups hold references (ids) into the
+        # contacts table rather than copies of the contacts, so renumbering a
+        # contact touches neither the order of the book nor any group.
+        self._contact_order: Dict[int, Contact] = {}     # id -> contact, in stored order
+        self._groups: Dict[str, str] = {}                # group key -> group name
+        self._members: Dict[str, Dict[int, None]] = {}   # group key -> ordered set of contact ids
+        self._group_versions: Dict[str, int] = {}        # group key -> version
+        self._next_contact_id = 0
+
+        # Derived indexes
+        self._contacts: Dict[str, Contact] = {}          # phone -> contact
+        self._contact_ids: Dict[str, int] = {}           # phone -> id
+        self._contact_names: Dict[str, str] = {}         # name key -> phone
+        self._memberships: Dict[str, Set[str]] = {}      # phone -> group keys
+        self._member_names: Dict[str, Dict[str, str]] = {}  # group key -> contact name key -> phone
+
+    # ------------------------------------------------------------------
+    # Loading and persistence
+    # ------------------------------------------------------------------
+
+    def _read_json_list(self, path: str, label: str) -> list:
+        return self._read_json_file(path, label)[0]
+
+    def _read_json_file(self, path: str, label: str) -> tuple:
+        """Read a JSON list along with the stamp of the file it came from"""
+        try:
+            with open(path, 'r') as f:
+                stamp = stat_stamp(os.fstat(f.fileno()))
+                return json.load(f), stamp
+        except FileNotFoundError:
+            return [], None
+        except Exception as e:
+            print(f"Error loading {label}: {e}")
+            return [], None
+
+    def _file_changed(self, path: str) -> bool:
+        try:
+            stamp = stat_stamp(os.stat(path))
+        except FileNotFoundError:
+            stamp = None
+        return stamp is None or stamp != self._stamps.get(path)
+
+    @contextmanager
+    def session(self):
+        """
+        Hold the storage lock across several calls.
+
+        Non-resident stores revalidate against the files at most once per
+        outermost session, so a check-then-write sequence sees one consistent
+        snapshot. They also hold an exclusive lock on ``<contacts file>.lock``
+        for the session, so a check-then-write (e.g. a version compare before
+        an update) is atomic across worker processes as well.
+        """
+        with self.lock:
+            self._session_depth += 1
+            lock_file = None
+            try:
+                if self._session_depth == 1 and not self.resident and fcntl is not None:
+                    lock_file = open(f"{self.contacts_file}.lock", 'a')
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                yield self
+            finally:
+                self._session_depth -= 1
+                if self._session_depth == 0 and not self.resident:
+                    self._loaded = False
+                if lock_file is not None:
+                    lock_file.close()
+
+    def _ensure_loaded(self):
+        """Make sure the in-memory working set reflects the data on disk"""
+        if self._loaded:
+            return
+        if self.resident:
+            self._generation = load_generation([self.contacts_file, self.groups_file])
+        reloaded = legacy_groups = False
+        if self._file_changed(self.contacts_file):
+            contacts, self._stamps[self.contacts_file] = self._read_json_file(self.contacts_file, 'contacts')
+            self._set_contacts(Contact.from_dict(c) for c in contacts)
+            reloaded = True
+        if self._file_changed(self.groups_file):
+            groups, self._stamps[self.groups_file] = self._read_json_file(self.groups_file, 'groups')
+            self._set_groups(groups)
+            legacy_groups = any('members' not in record for record in groups)
+            reloaded = True
+        if reloaded:
+            self._reindex_groups()
+        if reloaded and legacy_groups:
+            # Legacy groups embedded contact copies; store them as references
+            print("Converting groups to contact references")
+            self._write_contacts()
+            self._write_groups()
+        self._loaded = True
+
+    def _set_contacts(self, contacts):
+        # Phones already known keep their ids, so group references stay valid
+        known_ids = self._contact_ids
+        self._contacts = {}
+        self._contact_ids = {}
+        self._contact_order = {}
+        self._contact_names = {}
+        for contact in contacts:
+            contact.version = contact.version or 1
+            contact_id = self._contact_ids.get(contact.phone)
+            if contact_id is None:
+                contact_id = known_ids.get(contact.phone)
+            if contact_id is None:
+                contact_id = self._new_contact_id()
+            self._contacts[contact.phone] = contact
+            self._contact_ids[contact.phone] = contact_id
+            self._contact_order[contact_id] = contact
+            self._contact_names[name_key(contact.name)] = contact.phone
+
+    def _new_contact_id(self) -> int:
+        self._next_contact_id += 1
+        return self._next_contact_id
+
+    def _add_contact(self, contact: Contact):
+        contact_id = self._new_contact_id()
+        self._contacts[contact.phone] = contact
+        self._contact_ids[contact.phone] = contact_id
+        self._contact_order[contact_id] = contact
+
+    def _member_phones(self, key: str) -> List[str]:
+        return [self._contact_order[contact_id].phone for contact_id in self._members[key]]
+
+    def _set_groups(self, records: list) -> bool:
+        """
+        Replace all groups from stored or serialized group records.
+
+        Members not yet in the contacts table are added to it. Returns True if
+        that happened, i.e. the contacts table changed too.
+        """
+        self._groups = {}
+        self._members = {}
+        self._group_versions = {}
+        contacts_added = False
+        for record in records:
+            name, members = parse_group_record(record)
+            key = name_key(name)
+            self._groups[key] = name
+            self._members[key] = {}
+            self._group_versions[key] = record.get('version') or 1
+            dangling = False
+            for member in members:
+                contacts_added |= self._upsert_contact(member.name, member.phone)
+                if member.phone in self._contact_ids:
+                    self._members[key][self._contact_ids[member.phone]] = None
+                else:
+                    # A reference to a contact that no longer exists is dropped
+                    dangling = True
+            if dangling:
+                self._group_versions[key] += 1
+        return contacts_added
+
+    def _upsert_contact(self, name: str, phone: str) -> bool:
+        """Add a contact unless its phone is already stored; True if added"""
+        if phone in self._contacts or not name:
+            return False
+        self._add_contact(Contact(name, phone, validate=False, version=1))
+        self._contact_names.setdefault(name_key(name), phone)
+        return True
+
+    def _reindex_groups(self):
+        """Rebuild the membership indexes, dropping references to missing contacts"""
+        self._memberships = {}
+        self._member_names = {}
+        for key, members in self._members.items():
+            dangling = [contact_id for contact_id in members if contact_id not in self._contact_order]
+            for contact_id in dangling:
+                del members[contact_id]
+            if dangling:
+                self._group_versions[key] += 1
+            self._member_names[key] = {}
+            for phone in self._member_phones(key):
+                self._index_member(key, phone)
+
+    def _index_member(self, key: str, phone: str):
+        self._memberships.setdefault(phone, set()).add(key)
+        self._member_names[key][name_key(self._contacts[phone].name)] = phone
+
+    def _unindex_member(self, key: str, phone: str):
+        groups = self._memberships.get(phone)
+        if groups is not None:
+            groups.discard(key)
+            if not groups:
+                del self._memberships[phone]
+        names = self._member_names[key]
+        contact_key = name_key(self._contacts[phone].name)
+        if names.get(contact_key) == phone:
+            del names[contact_key]
+
+    def _materialize_group(self, key: str) -> Group:
+        contacts = [copy_contact(self._contact_order[contact_id]) for contact_id in self._members[key]]
+        return Group(self._groups[key], contacts, validate=False, version=self._group_versions[key])
+
+    def _group_records(self) -> list:
+        return [
+            {"name": name, "members": self._member_phones(key), "version": self._group_versions[key]}
+            for key, name in self._groups.items()
+        ]
+
+    def _write_contacts(self):
+        data = [contact.to_dict() for contact in self._contact_order.values()]
+        self._stamps[self.contacts_file] = atomic_write_json(self.contacts_file, data, indent=2)
+
+    def _write_groups(self):
+        self._stamps[self.groups_file] = atomic_write_json(self.groups_file, self._group_records(), indent=2)
+
+    def _write(self, changed: set):
+        if CONTACTS in changed:
+            self._write_contacts()
+        if GROUPS in changed:
+            self._write_groups()
+
+    def flush(self):
+        """Write any group-committed changes that are still pending"""
+        with self.lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            dirty, self._dirty = self._dirty, set()
+            try:
+                self._write(dirty)
+            except Exception as e:
+                # Keep the changes pending so the next flush retries them
+                self._dirty |= dirty
+                print(f"Error flushing storage: {e}")
+
+    def close(self):
+        self.flush()
+        if self.commit_window > 0:
+            # Otherwise the exit hook keeps a closed store alive until exit
+            atexit.unregister(self.flush)
+
+    def fingerprint(self) -> list:
+        """Changes whenever the stored data changes"""
+        return self._with_pending(file_fingerprint([self.contacts_file, self.groups_file]))
+
+    def _with_pending(self, fingerprint: list) -> list:
+        """Changes queued in an open transaction aren't in the files yet"""
+        if self._pending:
+            fingerprint.append(len(self._pending))
+        return fingerprint
+
+    def data_version(self) -> str:
+        """
+        Token that changes whenever the data changes, cheap enough to check
+        on every request (e.g. for ETags).
+
+        Shared files are versioned by their stamps, so every worker derives
+        the same token from the same data without reading it. A resident
+        store owns its files and counts its own mutations instead, which also
+        covers changes still waiting in a group-commit window, on top of the
+        generation of the files it loaded.
+        """
+        if self.resident:
+            with self.session():
+                self._ensure_loaded()
+                return f"{self._generation}.{self._mutations}"
+        return hashlib.sha1(json.dumps(self.fingerprint()).encode()).hexdigest()[:16]
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def list_contacts(self) -> List[Contact]:
+        with self.session():
+            self._ensure_loaded()
+            return [copy_contact(c) for c in self._contact_order.values()]
+
+    def iter_contacts(self) -> Iterator[Contact]:
+        """Yield contacts one at a time without copying the whole book"""
+        with self.session():
+            self._ensure_loaded()
+            # References only; each contact is copied as it is yielded
+            contacts = tuple(self._contact_order.values())
+        for contact in contacts:
+            yield copy_contact(contact)
+
+    def list_groups(self) -> List[Group]:
+        with self.session():
+            self._ensure_loaded()
+            return [self._materialize_group(key) for key in self._groups]
+
+    def get_contact(self, phone: str) -> Optional[Contact]:
+        with self.session():
+            self._ensure_loaded()
+            contact = self._contacts.get(phone)
+            return copy_contact(contact) if contact else None
+
+    def find_contact_by_name(self, name: str) -> Optional[Contact]:
+        with self.session():
+            self._ensure_loaded()
+            phone = self._contact_names.get(name_key(name))
+            return copy_contact(self._contacts[phone]) if phone else None
+
+    def get_group(self, name: str) -> Optional[Group]:
+        with self.session():
+            self._ensure_loaded()
+            key = name_key(name)
+            return self._materialize_group(key) if key in self._groups else None
+
+    def has_group(self, name: str) -> bool:
+        with self.session():
+            self._ensure_loaded()
+            return name_key(name) in self._groups
+
+    def group_member(self, group_name: str, phone: str) -> Optional[Contact]:
+        with self.session():
+            self._ensure_loaded()
+            if self._contact_ids.get(phone) not in self._members.get(name_key(group_name), {}):
+                return None
+            return copy_contact(self._contacts[phone])
+
+    def group_member_by_name(self, group_name: str, contact_name: str) -> Optional[Contact]:
+        with self.session():
+            self._ensure_loaded()
+            phone = self._member_names.get(name_key(group_name), {}).get(name_key(contact_name))
+            return copy_contact(self._contacts[phone]) if phone else None
+
+    def groups_for_contact(self, phone: str) -> List[str]:
+        """Names of the groups a contact belongs to (reverse membership index)"""
+        with self.session():
+            self._ensure_loaded()
+            return [self._groups[key] for key in self._memberships.get(phone, ())]
+
+    def group_summaries(self) -> List[GroupSummary]:
+        with self.session():
+            self._ensure_loaded()
+            return [
+                GroupSummary(name, self._group_versions[key], len(self._members[key]))
+                for key, name in self._groups.items()
+            ]
+
+    def group_members_page(self, group_name: str, cursor: Optional[str],
+                           limit: int) -> Optional[Tuple[List[Contact], Optional[str]]]:
+        """One page of a group's members and the cursor of the next page, or None if no such group"""
+        with self.session():
+            self._ensure_loaded()
+            key = name_key(group_name)
+            if key not in self._members:
+                return None
+            phones, next_cursor = page_members(self._member_phones(key), cursor, limit)
+            return [copy_contact(self._contacts[phone]) for phone in phones], next_cursor
+
+    # ------------------------------------------------------------------
+    # Mutations
+    #
+    # Every mutation is a named operation with JSON-serializable arguments.
+    # _mutate applies it to the working set via the matching _op_* method and
+    # then hands it to _persist, which by default rewrites the affected files
+    # (immediately, or at the end of the group-commit window).
+    # ------------------------------------------------------------------
+
+    def _mutate(self, op: str, **fields) -> bool:
+        with self.session():
+            self._ensure_loaded()
+            changed = getattr(self, f'_op_{op}')(**fields)
+            if changed:
+                self._mutations += 1
+                if self._pending is not None:
+                    self._pending.append((op, fields, changed))
+                    return True
+                try:
+                    self._persist(op, fields, changed)
+                except Exception:
+                    self._discard_working_set()
+                    raise
+            return bool(changed)
+
+    def _discard_working_set(self):
+        """The working set is ahead of storage; reload it on next use"""
+        self._stamps.clear()
+        self._loaded = False
+
+    @contextmanager
+    def transaction(self):
+        """
+        Persist several mutations together.
+
+        Inside the block each mutation updates the working set at once, so
+        later calls see it, but nothing is written until the outermost
+        transaction exits; then the queued changes are persisted as one
+        ``transaction`` operation. If the block raises, they are discarded
+        and the working set is reloaded from storage.
+        """
+        with self.session():
+            if self._pending is not None:
+                yield self
+                return
+
+            self._ensure_loaded()
+            # Start from storage that holds everything committed so far
+            self.flush()
+            self._pending = []
+            try:
+                yield self
+            except BaseException:
+                self._pending = None
+                self._discard_working_set()
+                raise
+
+            pending, self._pending = self._pending, None
+            if not pending:
+                return
+            changed = set().union(*(changes for _, _, changes in pending))
+            entries = [{'op': op, 'args': fields} for op, fields, _ in pending]
+            try:
+                self._persist('transaction', {'entries': entries}, changed)
+            except Exception:
+                self._discard_working_set()
+                raise
+
+    def _persist(self, op: str, fields: dict, changed: set):
+        if self.commit_window <= 0:
+            self._write(changed)
+            return
+
+        self._dirty |= changed
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.commit_window, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def replace_contacts(self, contacts: List[Contact]):
+        self._mutate('replace_contacts', contacts=[c.to_dict() for c in contacts])
+
+    def replace_groups(self, groups: List[Group]):
+        self._mutate('replace_groups', groups=[g.to_dict() for g in groups])
+
+    def insert_contact(self, contact: Contact):
+        self._mutate('insert_contact', name=contact.name, phone=contact.phone)
+
+    def insert_contacts(self, contacts: List[Contact]) -> int:
+        """Insert many contacts with a single write"""
+        self._mutate('insert_contacts', contacts=[c.to_dict() for c in contacts])
+        return len(contacts)
+
+    def update_contact(self, old_phone: str, contact: Contact) -> bool:
+        return self._mutate('update_contact', old_phone=old_phone, name=contact.name, phone=contact.phone)
+
+    def delete_contact(self, phone: str) -> bool:
+        """Delete a contact and drop it from every group that contains it"""
+        return self._mutate('delete_contact', phone=phone)
+
+    def insert_group(self, group: Group):
+        self._mutate('insert_group', group=group.to_dict())
+
+    def replace_group(self, group: Group) -> bool:
+        return self._mutate('replace_group', group=group.to_dict())
+
+    def delete_group(self, name: str) -> bool:
+        return self._mutate('delete_group', name=name)
+
+    def add_group_member(self, group_name: str, contact: Contact) -> bool:
+        return self._mutate('add_group_member', group=group_name, name=contact.name, phone=contact.phone)
+
+    def remove_group_member(self, group_name: str, phone: str) -> bool:
+        return self._mutate('remove_group_member', group=group_name, phone=phone)
+
+    # Operations on the working set. Each returns the set of collections it
+    # changed, or an empty set when it was a no-op.
+
+    def _op_replace_contacts(self, contacts: list) -> set:
+        self._set_contacts(Contact.from_dict(c) for c in contacts)
+        dangling = any(phone not in self._contacts for phone in self._memberships)
+        self._reindex_groups()
+        return {CONTACTS, GROUPS} if dangling else {CONTACTS}
+
+    def _op_replace_groups(self, groups: list) -> set:
+        contacts_added = self._set_groups(groups)
+        self._reindex_groups()
+        return {GROUPS, CONTACTS} if contacts_added else {GROUPS}
+
+    def _op_insert_contact(self, name: str, phone: str) -> set:
+        self._add_contact(Contact(name, phone, validate=False, version=1))
+        self._contact_names[name_key(name)] = phone
+        return {CONTACTS}
+
+    def _op_insert_contacts(self, contacts: list) -> set:
+        for data in contacts:
+            self._op_insert_contact(data['name'], data['phone'])
+        return {CONTACTS} if contacts else set()
+
+    def _op_update_contact(self, old_phone: str, name: str, phone: str) -> set:
+        existing = self._contacts.get(old_phone)
+        if existing is None:
+            return set()
+
+        # Only the groups containing this contact need their indexes touched
+        group_keys = list(self._memberships.get(old_phone, ()))
+        for key in group_keys:
+            self._unindex_member(key, old_phone)
+        if self._contact_names.get(name_key(existing.name)) == old_phone:
+            del self._contact_names[name_key(existing.name)]
+
+        existing.name = name
+        existing.version += 1
+        changed = {CONTACTS}
+        if phone != old_phone:
+            # The id (and with it the contact's position on disk and in its
+            # groups) stays; only the phone indexes are re-keyed
+            existing.phone = phone
+            self._contacts[phone] = self._contacts.pop(old_phone)
+            self._contact_ids[phone] = self._contact_ids.pop(old_phone)
+            if group_keys:
+                changed.add(GROUPS)
+
+        self._contact_names[name_key(name)] = phone
+        for key in group_keys:
+            self._index_member(key, phone)
+        return changed
+
+    def _op_delete_contact(self, phone: str) -> set:
+        if phone not in self._contacts:
+            return set()
+
+        changed = {CONTACTS}
+        contact_id = self._contact_ids.pop(phone)
+        for key in list(self._memberships.get(phone, ())):
+            self._unindex_member(key, phone)
+            del self._members[key][contact_id]
+            self._group_versions[key] += 1
+            changed.add(GROUPS)
+
+        contact = self._contacts.pop(phone)
+        del self._contact_order[contact_id]
+        if self._contact_names.get(name_key(contact.name)) == phone:
+            del self._contact_names[name_key(contact.name)]
+        return changed
+
+    def _put_group(self, group: dict) -> set:
+        name, members = parse_group_record(group)
+        key = name_key(name)
+        if key in self._members:
+            for phone in self._member_phones(key):
+                self._unindex_member(key, phone)
+
+        changed = {GROUPS}
+        self._groups[key] = name
+        self._members[key] = {}
+        self._group_versions[key] = self._group_versions.get(key, 0) + 1
+        self._member_names[key] = {}
+        for member in members:
+            if self._upsert_contact(member.name, member.phone):
+                changed.add(CONTACTS)
+            if member.phone in self._contacts:
+                self._members[key][self._contact_ids[member.phone]] = None
+                self._index_member(key, member.phone)
+        return changed
+
+    def _op_insert_group(self, group: dict) -> set:
+        return self._put_group(group)
+
+    def _op_replace_group(self, group: dict) -> set:
+        if name_key(group['name']) not in self._groups:
+            return set()
+        return self._put_group(group)
+
+    def _op_delete_group(self, name: str) -> set:
+        key = name_key(name)
+        if key not in self._groups:
+            return set()
+        for phone in self._member_phones(key):
+            self._unindex_member(key, phone)
+        del self._groups[key]
+        del self._members[key]
+        del self._member_names[key]
+        del self._group_versions[key]
+        return {GROUPS}
+
+    def _op_add_group_member(self, group: str, name: str, phone: str) -> set:
+        key = name_key(group)
+        if key not in self._groups:
+            return set()
+        changed = {GROUPS}
+        if self._upsert_contact(name, phone):
+            changed.add(CONTACTS)
+        self._members[key][self._contact_ids[phone]] = None
+        self._index_member(key, phone)
+        self._group_versions[key] += 1
+        return changed
+
+    def _op_remove_group_member(self, group: str, phone: str) -> set:
+        key = name_key(group)
+        contact_id = self._contact_ids.get(phone)
+        if contact_id not in self._members.get(key, {}):
+            return set()
+        self._unindex_member(key, phone)
+        del self._members[key][contact_id]
+        self._group_versions[key] += 1
+        return {GROUPS}
+
+    def _op_transaction(self, entries: list) -> set:
+        """Re-apply the operations of a committed transaction (journal replay)"""
+        changed = set()
+        for entry in entries:
+            changed |= getattr(self, f"_op_{entry['op']}")(**entry['args'])
+        return changed
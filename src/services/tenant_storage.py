@@ -0,0 +1,156 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from services.contact_storage import DEFAULT_DATA_DIR, ContactStorage
+
+SAFE_TENANT_PATTERN = re.compile(r'^[a-z0-9_-]{1,64}$')
+
+
+def tenant_directory_name(tenant: str) -> str:
+    """Map a tenant name to a safe directory name"""
+    name = tenant.lower()
+    if SAFE_TENANT_PATTERN.match(name):
+        return name
+    # Anything else (path separators, unicode, ...) gets a stable hashed name
+    return 'tenant-' + hashlib.sha256(tenant.encode('utf-8')).hexdigest()[:16]
+
+
+class _Shard:
+    def __init__(self, tenant: str, storage: ContactStorage):
+        self.tenant = tenant
+        self.storage = storage
+        self.users = 0
+        self.evicted = False
+        self.closed = threading.Event()
+
+
+class TenantStorageRegistry:
+    """
+    One ContactStorage shard per tenant, each in its own data directory.
+
+    Every shard has its own backend and lock, so a long import for one
+    tenant never blocks another tenant's reads or alerts. Open shards are
+    kept in a bounded LRU. An evicted shard is closed once the last request
+    using it has finished, and the tenant's directory is not opened again
+    until that close (its final flush and any compaction) is done.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None, max_open: int = 32, mode: Optional[str] = None):
+        self.base_dir = base_dir or os.path.join(DEFAULT_DATA_DIR, 'tenants')
+        self.max_open = max(1, max_open)
+        self.mode = mode
+
+        self._shards: 'OrderedDict[str, _Shard]' = OrderedDict()
+        # Evicted shards still in use; reused rather than opened twice
+        self._draining: Dict[str, _Shard] = {}
+        # Evicted shards still being closed; reopening their directory waits
+        self._closing: Dict[str, _Shard] = {}
+        self._lock = threading.Lock()
+        # Serializes opening a given tenant's shard without blocking other tenants
+        self._open_locks: Dict[str, threading.Lock] = {}
+
+    @contextmanager
+    def shard(self, tenant: str):
+        """Check out a tenant's ContactStorage for the duration of a request"""
+        # Key by directory so names that map to the same shard share it
+        entry = self._acquire(tenant_directory_name(tenant))
+        try:
+            yield entry.storage
+        finally:
+            self._release(entry)
+
+    def _acquire(self, tenant: str) -> _Shard:
+        with self._lock:
+            entry = self._lookup(tenant)
+            open_lock = self._open_locks.setdefault(tenant, threading.Lock())
+
+        if entry is None:
+            with open_lock:
+                with self._lock:
+                    entry = self._lookup(tenant)
+                    closing = self._closing.get(tenant)
+
+                if entry is None:
+                    if closing is not None:
+                        closing.closed.wait()
+                    # Opening a shard may touch disk; only this tenant waits for it
+                    storage = ContactStorage(
+                        mode=self.mode,
+                        data_dir=os.path.join(self.base_dir, tenant)
+                    )
+                    with self._lock:
+                        entry = _Shard(tenant, storage)
+                        entry.users = 1
+                        self._shards[tenant] = entry
+
+        with self._lock:
+            idle = self._evict()
+        for victim in idle:
+            self._close(victim)
+        return entry
+
+    def _lookup(self, tenant: str) -> Optional[_Shard]:
+        """Find an open shard and mark it most recently used (registry lock held)"""
+        entry = self._shards.get(tenant)
+        if entry:
+            self._shards.move_to_end(tenant)
+        else:
+            entry = self._draining.pop(tenant, None)
+            if entry is None:
+                return None
+            entry.evicted = False
+            self._shards[tenant] = entry
+        entry.users += 1
+        return entry
+
+    def _evict(self) -> list:
+        """Drop least recently used shards over the limit (registry lock held)"""
+        idle = []
+        while len(self._shards) > self.max_open:
+            _, victim = self._shards.popitem(last=False)
+            victim.evicted = True
+            if victim.users == 0:
+                self._closing[victim.tenant] = victim
+                idle.append(victim)
+            else:
+                self._draining[victim.tenant] = victim
+        return idle
+
+    def _release(self, entry: _Shard):
+        with self._lock:
+            entry.users -= 1
+            close_now = entry.evicted and entry.users == 0
+            if close_now:
+                self._draining.pop(entry.tenant, None)
+                self._closing[entry.tenant] = entry
+        if close_now:
+            self._close(entry)
+
+    def _close(self, entry: _Shard):
+        """Close an evicted shard and let waiting opens of its directory proceed"""
+        try:
+            entry.storage.close()
+        finally:
+            with self._lock:
+                if self._closing.get(entry.tenant) is entry:
+                    del self._closing[entry.tenant]
+            entry.closed.set()
+
+    def open_tenants(self) -> list:
+        """Shard directories currently open, least recently used first"""
+        with self._lock:
+            return list(self._shards)
+
+    def close(self):
+        """Close every open shard"""
+        with self._lock:
+            shards = list(self._shards.values()) + list(self._draining.values())
+            self._shards.clear()
+            self._draining.clear()
+        for entry in shards:
+            entry.storage.close()
@@ -0,0 +1,33 @@
+from typing import Optional
+
+
+def version_etag(version) -> str:
+    """ETag header value for a stored record or data version"""
+    return f'"{version}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value already names this ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(','))
+
+
+def parse_if_match(if_match: str) -> Optional[int]:
+    """
+    Record version named by an If-Match header value.
+
+    Returns None when the header is absent or '*' (no precondition);
+    raises ValueError when it isn't a version ETag issued by this API.
+    """
+    if_match = (if_match or '').strip()
+    if not if_match or if_match == '*':
+        return None
+
+    tag = if_match[2:] if if_match.startswith('W/') else if_match
+    tag = tag.strip('"')
+    if not tag.isdigit():
+        raise ValueError('Invalid If-Match header')
+    return int(tag)
@@ -1,14 +1,36 @@
+import os
 import re
 import html
-from typing import Tuple, Optional
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import Iterable, List, Tuple, Optional
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(frozen=True)
 class ValidationResult:
-    """Result of a validation operation"""
+    """Result of a validation operation (immutable, so cached results can be shared)"""
     is_valid: bool
     error_message: Optional[str] = None
     sanitized_value: Optional[str] = None
+    error_code: Optional[str] = None  # Machine-readable failure reason, if any
+
+# Values that have already been through InputValidator. They are plain
+# strings everywhere else; code that receives one can skip validating and
+# sanitizing it again.
+
+class E164Phone(str):
+    """A phone number validated and normalized to E.164"""
+    __slots__ = ()
+
+class SafeMessage(str):
+    """Message text that passed validate_message: checked, HTML-escaped, whitespace-normalized"""
+    __slots__ = ()
+
+class SafeBusinessName(str):
+    """A business name that passed validate_business_name"""
+    __slots__ = ()
 
 class InputValidator:
     """Comprehensive input validation and sanitization"""
@@ -16,10 +38,29 @@ class InputValidator:
     # Phone number patterns for different formats
     E164_PATTERN = re.compile(r'^\+[1-9]\d{1,14}$')
     US_PHONE_PATTERN = re.compile(r'^(\+1|1)?[-.\s]?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})$')
+    NON_PHONE_CHARS = re.compile(r'[^\d+]')
+    
+    # The two common formats in one pass: E.164 as is (group 1), or a US
+    # number in any punctuation (groups 2-4)
+    COMMON_PHONE_PATTERN = re.compile(
+        r'^(?:(\+[1-9]\d{1,14})|(?:\+1|1)?[-.\s]?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4}))$'
+    )
     
     # Name validation patterns
     NAME_PATTERN = re.compile(r'^[a-zA-Z\s\-\'\.]{1,50}$')
     BUSINESS_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9\s\-\'\.&,]{1,100}$')
+    GROUP_NAME_PATTERN = re.compile(r'^[a-zA-Z0-9\s\-_]{1,50}$')
+    
+    # Potentially harmful message content, as one alternation so a message
+    # is scanned once rather than once per pattern
+    SUSPICIOUS_PATTERN = re.compile('|'.join([
+        r'<script.*?>.*?</script>',  # Script tags
+        r'javascript:',              # JavaScript URLs
+        r'vbscript:',               # VBScript URLs
+        r'onload\s*=',              # Event handlers
+        r'onerror\s*=',
+    ]), re.IGNORECASE)
+    WHITESPACE = re.compile(r'\s+')
     
     # Message length limits
     MAX_MESSAGE_LENGTH = 1600  # SMS limit
@@ -31,36 +72,47 @@ class InputValidator:
         """
         Validate and normalize phone number to E.164 format
         Supports US and international formats
+        
+        Results are memoized per raw input in a bounded LRU cache (see
+        phone_cache_info), so a number that is checked on every call is only
+        parsed once per process.
         """
+        return _validate_phone_number_cached(phone)
+    
+    @classmethod
+    def phone_cache_info(cls) -> dict:
+        """Hit/miss counters and size of the phone validation cache"""
+        info = _validate_phone_number_cached.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
+    
+    @classmethod
+    def clear_phone_cache(cls):
+        """Empty the phone validation cache and reset its counters"""
+        _validate_phone_number_cached.cache_clear()
+    
+    @classmethod
+    def _normalize_phone_number(cls, phone: str) -> ValidationResult:
+        """Uncached body of validate_phone_number"""
         if not phone:
             return ValidationResult(False, "Phone number is required")
         
+        stripped = phone.strip()
+        
+        # Already E.164, or a US number (which gets the +1 country code)
+        common = cls.COMMON_PHONE_PATTERN.match(stripped)
+        if common:
+            return ValidationResult(True, sanitized_value=common.group(1) or f"+1{''.join(common.group(2, 3, 4))}")
+        
         # Remove all non-digit characters except +
-        cleaned = re.sub(r'[^\d+]', '', phone.strip())
+        cleaned = cls.NON_PHONE_CHARS.sub('', stripped)
         
         if not cleaned:
             return ValidationResult(False, "Invalid phone number format")
         
-        # Check if already in E.164 format
+        # Check if in E.164 format once punctuation is removed
         if cls.E164_PATTERN.match(cleaned):
             return ValidationResult(True, sanitized_value=cleaned)
         
-        # Try to parse as US number
-        us_match = cls.US_PHONE_PATTERN.match(phone.strip())
-        if us_match:
-            # Extract digits and format as E.164
-            digits = re.sub(r'[^\d]', '', phone)
-            if len(digits) == 10:
-                # Add US country code
-                e164_number = f"+1{digits}"
-            elif len(digits) == 11 and digits.startswith('1'):
-                # Already has country code
-                e164_number = f"+{digits}"
-            else:
-                return ValidationResult(False, "Invalid US phone number format")
-            
-            return ValidationResult(True, sanitized_value=e164_number)
-        
         # If starts with + but doesn't match E.164, it might be invalid
         if cleaned.startswith('+'):
             return ValidationResult(False, "Invalid international phone number format")
@@ -124,22 +176,13 @@ class InputValidator:
             return ValidationResult(False, f"Message must be {cls.MAX_MESSAGE_LENGTH} characters or less")
         
         # Check for potentially harmful content
-        suspicious_patterns = [
-            r'<script.*?>.*?</script>',  # Script tags
-            r'javascript:',              # JavaScript URLs
-            r'vbscript:',               # VBScript URLs
-            r'onload\s*=',              # Event handlers
-            r'onerror\s*=',
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, message, re.IGNORECASE):
-                return ValidationResult(False, "Message contains potentially harmful content")
+        if cls.SUSPICIOUS_PATTERN.search(message):
+            return ValidationResult(False, "Message contains potentially harmful content")
         
         # Sanitize: escape HTML and normalize whitespace
         sanitized = html.escape(message)
         # Normalize line breaks and spaces
-        sanitized = re.sub(r'\s+', ' ', sanitized.replace('\n', ' ').replace('\r', ''))
+        sanitized = cls.WHITESPACE.sub(' ', sanitized.replace('\n', ' ').replace('\r', ''))
         
         return ValidationResult(True, sanitized_value=sanitized)
     
@@ -154,7 +197,7 @@ class InputValidator:
         if len(name) > 50:
             return ValidationResult(False, "Group name must be 50 characters or less")
         
-        if not re.match(r'^[a-zA-Z0-9\s\-_]{1,50}$', name):
+        if not cls.GROUP_NAME_PATTERN.match(name):
             return ValidationResult(False, "Group name can only contain letters, numbers, spaces, hyphens, and underscores")
         
         # Sanitize
@@ -173,10 +216,105 @@ class InputValidator:
             return ValidationResult(False, "Timer must be between 1 and 120 minutes")
         
         return ValidationResult(True, sanitized_value=str(minutes))
+    
+    @classmethod
+    def e164_phone(cls, phone: str) -> Tuple[Optional[E164Phone], ValidationResult]:
+        """Validate a phone number once; an E164Phone is returned as it is"""
+        if isinstance(phone, E164Phone):
+            return phone, ValidationResult(True, sanitized_value=phone)
+        result = cls.validate_phone_number(phone)
+        return (E164Phone(result.sanitized_value) if result.is_valid else None), result
+    
+    @classmethod
+    def safe_message(cls, message: str) -> Tuple[Optional[SafeMessage], ValidationResult]:
+        """Validate and sanitize a message once; a SafeMessage is returned as it is"""
+        if isinstance(message, SafeMessage):
+            return message, ValidationResult(True, sanitized_value=message)
+        result = cls.validate_message(message)
+        return (SafeMessage(result.sanitized_value) if result.is_valid else None), result
+    
+    @classmethod
+    def safe_business_name(cls, name: str) -> Tuple[Optional[SafeBusinessName], ValidationResult]:
+        """Validate and sanitize a business name once; a SafeBusinessName is returned as it is"""
+        if isinstance(name, SafeBusinessName):
+            return name, ValidationResult(True, sanitized_value=name)
+        result = cls.validate_business_name(name)
+        return (SafeBusinessName(result.sanitized_value) if result.is_valid else None), result
+    
+    @classmethod
+    def personalize_message(cls, message: SafeMessage, name: str) -> Tuple[Optional[SafeMessage], ValidationResult]:
+        """
+        Put a stored (already sanitized) contact name in place of the ()
+        placeholder of a SafeMessage. Both parts are escaped already, so only
+        the combined length and content are checked again.
+        """
+        text = message.replace('()', name)
+        if len(text) > cls.MAX_MESSAGE_LENGTH:
+            return None, ValidationResult(False, f"Message must be {cls.MAX_MESSAGE_LENGTH} characters or less")
+        if cls.SUSPICIOUS_PATTERN.search(text):
+            return None, ValidationResult(False, "Message contains potentially harmful content")
+        return SafeMessage(text), ValidationResult(True, sanitized_value=text)
+    
+    @classmethod
+    def validate_many(cls, kind: str, values: Iterable[str], processes: int = 1) -> List[ValidationResult]:
+        """
+        Validate many values of one kind ('phone', 'contact_name',
+        'business_name', 'message' or 'group_name'). Results are in input order.
+        
+        With processes > 1, inputs of at least PARALLEL_MIN_VALUES values are
+        split across a process pool. That only pays off for very large inputs
+        such as bulk imports, since the pool has to start and every value and
+        result is pickled.
+        """
+        if kind not in BATCH_VALIDATORS:
+            raise ValueError(f"Unknown validation kind '{kind}'. Use one of: {', '.join(BATCH_VALIDATORS)}")
+        
+        # Values parsed from JSON or CSV need not be strings (e.g. a phone
+        # number stored as an integer)
+        values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+        if processes > 1 and len(values) >= PARALLEL_MIN_VALUES:
+            # A few chunks per worker, so one slow chunk doesn't hold up the rest
+            size = -(-len(values) // (processes * 4))
+            chunks = [values[i:i + size] for i in range(0, len(values), size)]
+            results = []
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                for chunk_results in pool.map(_validate_chunk, repeat(kind), chunks):
+                    results.extend(chunk_results)
+            return results
+        
+        validate = getattr(cls, BATCH_VALIDATORS[kind])
+        return [validate(value) for value in values]
+
+# validate_many() kinds and the validator each one runs. Phone numbers skip
+# the cache: a bulk import is mostly one-off numbers that would only evict
+# the hot ones.
+BATCH_VALIDATORS = {
+    'phone': '_normalize_phone_number',
+    'contact_name': 'validate_contact_name',
+    'business_name': 'validate_business_name',
+    'message': 'validate_message',
+    'group_name': 'validate_group_name',
+}
+
+# Inputs smaller than this are validated in-process even if a pool is requested
+PARALLEL_MIN_VALUES = 50000
+
+# Distinct raw phone inputs whose validation results are kept
+PHONE_CACHE_SIZE = int(os.getenv('ONARRIVAL_PHONE_CACHE_SIZE', '10000'))
+
+@lru_cache(maxsize=PHONE_CACHE_SIZE)
+def _validate_phone_number_cached(phone: str) -> ValidationResult:
+    return InputValidator._normalize_phone_number(phone)
+
+def _validate_chunk(kind: str, values: List[str]) -> List[ValidationResult]:
+    """Process-pool worker for validate_many"""
+    return InputValidator.validate_many(kind, values)
 
 class SecurityValidator:
     """Additional security validations"""
     
+    URL_SCHEMES = ('http', 'https')
+    
     # Rate limiting tracking (simple in-memory for now)
     _rate_limits = {}
     
@@ -208,6 +346,21 @@ class SecurityValidator:
         cls._rate_limits[identifier].append(current_time)
         return True
     
+    @classmethod
+    def validate_url(cls, url: str) -> ValidationResult:
+        """Validate an absolute http(s) URL, such as a webhook base URL"""
+        if not url or not isinstance(url, str):
+            return ValidationResult(False, "URL is required")
+        
+        if any(char.isspace() or ord(char) < 32 for char in url):
+            return ValidationResult(False, "URL contains whitespace or control characters")
+        
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in cls.URL_SCHEMES or not parsed.netloc:
+            return ValidationResult(False, f"URL must be an absolute {' or '.join(cls.URL_SCHEMES)} URL")
+        
+        return ValidationResult(True, sanitized_value=url)
+    
     @classmethod
     def validate_request_size(cls, data: dict, max_size_kb: int = 50) -> ValidationResult:
         """Validate request payload size"""
@@ -1,11 +1,16 @@
 from flask import Flask, request, jsonify, render_template, send_from_directory, session
 from flask_cors import CORS
 import os
+import base64
 import secrets
 import argparse
 from src.services.location_alert_system import LocationAlertSystem
+from models.contact import Contact
+from models.group import Group
+from services.contact_storage import VERSION_CONFLICT
 from utils.validation import InputValidator, SecurityValidator, ValidationResult
 from utils.auth import require_api_key, rate_limit, auth_manager, generate_csrf_token
+from utils.etags import version_etag, etag_matches, parse_if_match
 
 # Get directory paths
 template_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
@@ -14,6 +19,9 @@ static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
 # Initialize the location alert system
 alert_system = LocationAlertSystem()
 
+# Sends are queued in a durable outbox and placed by a background dispatcher
+alert_system.start_outbox()
+
 # Get the Flask app from the notification service and configure it properly
 app = alert_system.notification_service.app
 app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(32))
@@ -154,8 +162,8 @@ def send_leisure_alert():
             }), 400
         
         # Validate message
-        message_validation = InputValidator.validate_message(message)
-        if not message_validation.is_valid:
+        sanitized_message, message_validation = InputValidator.safe_message(message)
+        if sanitized_message is None:
             return jsonify({
                 'success': False,
                 'error': f'Invalid message: {message_validation.error_message}'
@@ -163,11 +171,10 @@ def send_leisure_alert():
         
         # Use sanitized values
         sanitized_group = group_validation.sanitized_value
-        sanitized_message = message_validation.sanitized_value
         
         # Load and validate group exists
-        groups = alert_system.contact_storage.load_groups()
-        group = next((g for g in groups if g.name == sanitized_group), None)
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            group = contact_storage.get_group_by_name(sanitized_group)
         
         if not group:
             return jsonify({
@@ -181,42 +188,39 @@ def send_leisure_alert():
                 'error': f'Group "{sanitized_group}" has no contacts'
             }), 400
         
-        # Send alerts to all contacts in group
-        success_count = 0
+        # Queue a call to every contact in the group, with the placeholder replaced by their name
+        recipients = []
         error_messages = []
-        
         for contact in group.contacts:
-            try:
-                # Replace placeholder with contact name in message
-                personalized_message = sanitized_message.replace('()', contact.name)
-                result = alert_system.notification_service.make_call(
-                    contact.phone,
-                    personalized_message,
-                    include_follow_up=True
-                )
-                if result:
-                    success_count += 1
-                else:
-                    error_messages.append(f"Failed to send alert to {contact.name}")
-            except Exception as e:
-                error_messages.append(f"Error sending to {contact.name}: {str(e)}")
-        
-        if success_count == 0:
+            personalized_message, personalize_validation = InputValidator.personalize_message(
+                sanitized_message, contact.name
+            )
+            recipient = {'name': contact.name, 'phone': contact.phone, 'message': personalized_message,
+                         'include_follow_up': True}
+            if personalized_message is None:
+                recipient['error'] = f"Invalid message for {contact.name}: {personalize_validation.error_message}"
+                error_messages.append(recipient['error'])
+            recipients.append(recipient)
+        
+        if len(error_messages) == len(recipients):
             return jsonify({
                 'success': False,
                 'error': 'Failed to send any alerts',
                 'details': error_messages
-            }), 500
+            }), 400
+        
+        job_id = alert_system.outbox.enqueue('leisure', recipients, tenant=request.api_key_info['name'])
         
         response_data = {
             'success': True,
-            'message': f'Alerts sent to {success_count} of {len(group.contacts)} contacts'
+            'message': f'Alerts queued for {len(recipients) - len(error_messages)} of {len(recipients)} contacts',
+            **job_reference(job_id)
         }
         
         if error_messages:
             response_data['warnings'] = error_messages
             
-        return jsonify(response_data)
+        return jsonify(response_data), 202
     
     except Exception as e:
         print(f"Error in send_leisure_alert: {str(e)}")
@@ -260,24 +264,24 @@ def send_business_alert():
         timer_minutes = data.get('timer_minutes')
         
         # Validate business name
-        business_validation = InputValidator.validate_business_name(business_name)
-        if not business_validation.is_valid:
+        sanitized_business, business_validation = InputValidator.safe_business_name(business_name)
+        if sanitized_business is None:
             return jsonify({
                 'success': False,
                 'error': f'Invalid business name: {business_validation.error_message}'
             }), 400
         
         # Validate phone number
-        phone_validation = InputValidator.validate_phone_number(phone)
-        if not phone_validation.is_valid:
+        sanitized_phone, phone_validation = InputValidator.e164_phone(phone)
+        if sanitized_phone is None:
             return jsonify({
                 'success': False,
                 'error': f'Invalid phone number: {phone_validation.error_message}'
             }), 400
         
         # Validate message
-        message_validation = InputValidator.validate_message(message)
-        if not message_validation.is_valid:
+        sanitized_message, message_validation = InputValidator.safe_message(message)
+        if sanitized_message is None:
             return jsonify({
                 'success': False,
                 'error': f'Invalid message: {message_validation.error_message}'
@@ -306,34 +310,25 @@ def send_business_alert():
                     'error': f'Invalid timer: {timer_validation.error_message}'
                 }), 400
         
-        # Use sanitized values
-        sanitized_business = business_validation.sanitized_value
-        sanitized_phone = phone_validation.sanitized_value
-        sanitized_message = message_validation.sanitized_value
-        
         # TODO: Implement timer functionality for web app if needed
-        # For now, send alert immediately
+        # For now, queue the alert immediately
         try:
-            result = alert_system.notification_service.make_call(
-                sanitized_phone,
-                sanitized_message,
-                business_name=sanitized_business,
-                include_follow_up=True
-            )
+            job_id = alert_system.outbox.enqueue('business', [{
+                'name': sanitized_business,
+                'phone': sanitized_phone,
+                'message': sanitized_message,
+                'business_name': sanitized_business,
+                'include_follow_up': True
+            }], tenant=request.api_key_info['name'])
             
-            if result:
-                return jsonify({
-                    'success': True,
-                    'message': f'Alert sent successfully to {sanitized_business}'
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'Failed to send alert'
-                }), 500
+            return jsonify({
+                'success': True,
+                'message': f'Alert to {sanitized_business} queued',
+                **job_reference(job_id)
+            }), 202
                 
         except Exception as e:
-            print(f"Error sending business alert: {str(e)}")
+            print(f"Error queueing business alert: {str(e)}")
             return jsonify({
                 'success': False,
                 'error': 'Failed to send alert'
@@ -346,11 +341,38 @@ def send_business_alert():
             'error': 'Internal server error'
         }), 500
 
+def job_reference(job_id: str) -> dict:
+    """Fields of a 202 response that point at the queued job"""
+    return {'job_id': job_id, 'status_url': f'/api/jobs/{job_id}'}
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@require_api_key(permission='send_alerts')
+@rate_limit(max_requests=1000, window_seconds=3600)
+def get_job(job_id):
+    """Progress of a queued send, with the status of every recipient"""
+    try:
+        job = alert_system.outbox.get_job(job_id, tenant=request.api_key_info['name'])
+        
+        if not job:
+            return jsonify({
+                'success': False,
+                'error': f'Job {job_id} not found'
+            }), 404
+        
+        return jsonify({'success': True, 'job': job})
+    
+    except Exception as e:
+        print(f"Error in get_job: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
 @app.route('/api/groups', methods=['GET'])
 @require_api_key(permission='manage_contacts')
 @rate_limit(max_requests=100, window_seconds=3600)
 def get_groups():
-    """Get all groups with validation"""
+    """Get all groups with validation; ?summary=1 returns only names and contact counts"""
     try:
         if not alert_system:
             return jsonify({
@@ -358,25 +380,25 @@ def get_groups():
                 'error': 'Alert system not available'
             }), 503
         
-        groups = alert_system.contact_storage.load_groups()
-        groups_data = []
-        
-        for group in groups:
-            groups_data.append({
-                'name': group.name,
-                'contacts': [
-                    {
-                        'name': contact.name,
-                        'phone': contact.phone
-                    }
-                    for contact in group.contacts
+        summary = request.args.get('summary', '').lower() in ('1', 'true', 'yes')
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            # The summary and full listings are different representations
+            etag = version_etag(f"groups-{'summary' if summary else 'full'}-{contact_storage.data_version()}")
+            if client_has_current(etag):
+                return not_modified_response(etag)
+            
+            if summary:
+                groups_data = [
+                    {'name': name, 'version': version, 'contact_count': contact_count}
+                    for name, version, contact_count in contact_storage.load_group_summaries()
                 ]
-            })
+            else:
+                groups_data = [serialize_group(group) for group in contact_storage.load_groups()]
         
-        return jsonify({
+        return etagged_response({
             'success': True,
             'groups': groups_data
-        })
+        }, etag)
     
     except Exception as e:
         print(f"Error in get_groups: {str(e)}")
@@ -385,6 +407,422 @@ def get_groups():
             'error': 'Internal server error'
         }), 500
 
+class BatchRejected(Exception):
+    """Raised inside a storage transaction to discard it"""
+    def __init__(self, result: ValidationResult):
+        super().__init__(result.error_message)
+        self.result = result
+
+@app.route('/api/groups', methods=['POST'])
+@require_api_key(permission='manage_groups')
+@rate_limit(max_requests=100, window_seconds=3600)
+def create_group():
+    """Create a group with its initial contacts in one all-or-nothing write"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('name'), str) or not isinstance(data.get('contacts', []), list):
+            return jsonify({
+                'success': False,
+                'error': 'JSON data with a group name and an optional contacts list required'
+            }), 400
+        
+        new_group, validation_result = Group.create_validated(data['name'])
+        if not validation_result.is_valid:
+            return jsonify({'success': False, 'error': validation_result.error_message}), 400
+        group_name = new_group.name
+        
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            try:
+                with contact_storage.transaction():
+                    result = contact_storage.add_group(group_name)
+                    if not result.is_valid:
+                        raise BatchRejected(result)
+                    
+                    for item in data.get('contacts', []):
+                        if not isinstance(item, dict):
+                            raise BatchRejected(ValidationResult(False, 'Invalid contact entry'))
+                        result = contact_storage.add_contact_to_group(
+                            group_name, item.get('name', ''), item.get('phone', '')
+                        )
+                        if not result.is_valid:
+                            raise BatchRejected(result)
+            except BatchRejected as e:
+                return mutation_failed_response(e.result)
+            
+            group = contact_storage.get_group_by_name(group_name)
+        
+        return versioned_response({'success': True, 'group': serialize_group(group)}, group.version, 201)
+    
+    except Exception as e:
+        print(f"Error in create_group: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+def client_has_current(etag: str) -> bool:
+    """Whether the request's If-None-Match already names this ETag"""
+    return etag_matches(request.headers.get('If-None-Match', ''), etag)
+
+def not_modified_response(etag: str):
+    response = app.response_class(status=304)
+    response.headers['ETag'] = etag
+    return response
+
+def etagged_response(payload: dict, etag: str):
+    response = jsonify(payload)
+    response.headers['ETag'] = etag
+    return response
+
+def expected_version_from_request():
+    """Version the client last saw, from an If-Match header (see parse_if_match)"""
+    return parse_if_match(request.headers.get('If-Match', ''))
+
+def serialize_group(group):
+    return {
+        'name': group.name,
+        'version': group.version,
+        'contacts': [
+            {
+                'name': contact.name,
+                'phone': contact.phone
+            }
+            for contact in group.contacts
+        ]
+    }
+
+def serialize_contact(contact):
+    return {
+        'name': contact.name,
+        'phone': contact.phone,
+        'version': contact.version
+    }
+
+def versioned_response(payload: dict, version: int, status: int = 200):
+    response = jsonify(payload)
+    response.headers['ETag'] = version_etag(version)
+    return response, status
+
+def mutation_failed_response(result: ValidationResult):
+    """409 for a lost compare-and-swap, 400 for anything else"""
+    status = 409 if result.error_code == VERSION_CONFLICT else 400
+    return jsonify({
+        'success': False,
+        'error': result.error_message
+    }), status
+
+@app.route('/api/groups/<group_name>', methods=['GET'])
+@require_api_key(permission='manage_contacts')
+@rate_limit(max_requests=100, window_seconds=3600)
+def get_group(group_name):
+    """Get one group; the ETag header carries its version"""
+    try:
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            group = contact_storage.get_group_by_name(group_name)
+        
+        if not group:
+            return jsonify({
+                'success': False,
+                'error': f'Group "{group_name}" not found'
+            }), 404
+        
+        return versioned_response({'success': True, 'group': serialize_group(group)}, group.version)
+    
+    except Exception as e:
+        print(f"Error in get_group: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+def encode_cursor(cursor):
+    """Make a storage page cursor opaque and URL-safe"""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token: str) -> str:
+    """Inverse of encode_cursor; raises ValueError for tokens it didn't issue"""
+    try:
+        return base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+@app.route('/api/groups/<group_name>/contacts', methods=['GET'])
+@require_api_key(permission='manage_contacts')
+@rate_limit(max_requests=1000, window_seconds=3600)
+def get_group_contacts(group_name):
+    """One page of a group's contacts: ?limit=<n>&cursor=<next_cursor from the previous page>"""
+    try:
+        try:
+            limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+            token = request.args.get('cursor')
+            cursor = decode_cursor(token) if token else None
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid limit or cursor'
+            }), 400
+        
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            try:
+                page = contact_storage.get_group_contacts_page(group_name, cursor, limit)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid cursor'
+                }), 400
+        
+        if page is None:
+            return jsonify({
+                'success': False,
+                'error': f'Group "{group_name}" not found'
+            }), 404
+        
+        contacts, next_cursor = page
+        return jsonify({
+            'success': True,
+            'contacts': [serialize_contact(contact) for contact in contacts],
+            'next_cursor': encode_cursor(next_cursor)
+        })
+    
+    except Exception as e:
+        print(f"Error in get_group_contacts: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@app.route('/api/groups/<group_name>', methods=['PUT'])
+@require_api_key(permission='manage_groups')
+@rate_limit(max_requests=100, window_seconds=3600)
+def update_group(group_name):
+    """Replace a group's contacts; send If-Match to fail with 409 if someone else changed it first"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('contacts'), list):
+            return jsonify({
+                'success': False,
+                'error': 'JSON data with a contacts list required'
+            }), 400
+        
+        try:
+            expected_version = expected_version_from_request()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        contacts = []
+        for item in data['contacts']:
+            if not isinstance(item, dict):
+                return jsonify({'success': False, 'error': 'Invalid contact entry'}), 400
+            contact, validation_result = Contact.create_validated(item.get('name', ''), item.get('phone', ''))
+            if not validation_result.is_valid:
+                return jsonify({'success': False, 'error': validation_result.error_message}), 400
+            contacts.append(contact)
+        
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            existing = contact_storage.get_group_by_name(group_name)
+            if not existing:
+                return jsonify({
+                    'success': False,
+                    'error': f'Group "{group_name}" not found'
+                }), 404
+            
+            result = contact_storage.update_group(
+                Group(existing.name, contacts, validate=False),
+                expected_version=expected_version
+            )
+            if not result.is_valid:
+                return mutation_failed_response(result)
+            
+            group = contact_storage.get_group_by_name(existing.name)
+        
+        return versioned_response({'success': True, 'group': serialize_group(group)}, group.version)
+    
+    except Exception as e:
+        print(f"Error in update_group: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@app.route('/api/groups/<group_name>', methods=['DELETE'])
+@require_api_key(permission='manage_groups')
+@rate_limit(max_requests=100, window_seconds=3600)
+def delete_group(group_name):
+    """Delete a group, optionally guarded by If-Match"""
+    try:
+        try:
+            expected_version = expected_version_from_request()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            if not contact_storage.get_group_by_name(group_name):
+                return jsonify({
+                    'success': False,
+                    'error': f'Group "{group_name}" not found'
+                }), 404
+            
+            result = contact_storage.delete_group(group_name, expected_version=expected_version)
+        
+        if not result.is_valid:
+            return mutation_failed_response(result)
+        
+        return jsonify({'success': True, 'message': result.sanitized_value})
+    
+    except Exception as e:
+        print(f"Error in delete_group: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+def find_contact_for_request(contact_storage, phone: str):
+    phone_result = InputValidator.validate_phone_number(phone)
+    if not phone_result.is_valid:
+        return None
+    return contact_storage.get_contact_by_phone(phone_result.sanitized_value)
+
+@app.route('/api/contacts/search', methods=['GET'])
+@require_api_key(permission='manage_contacts')
+@rate_limit(max_requests=1000, window_seconds=3600)
+def search_contacts():
+    """Typeahead search by name or phone prefix: ?q=<text>&limit=<n>"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query or len(query) > 100:
+            return jsonify({
+                'success': False,
+                'error': 'Query parameter q must be 1-100 characters'
+            }), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'limit must be a number'
+            }), 400
+        
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            contacts = contact_storage.search(query, limit)
+        
+        return jsonify({
+            'success': True,
+            'contacts': [serialize_contact(contact) for contact in contacts]
+        })
+    
+    except Exception as e:
+        print(f"Error in search_contacts: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@app.route('/api/contacts/<phone>', methods=['GET'])
+@require_api_key(permission='manage_contacts')
+@rate_limit(max_requests=100, window_seconds=3600)
+def get_contact(phone):
+    """Get one contact; the ETag header carries its version"""
+    try:
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            contact = find_contact_for_request(contact_storage, phone)
+        
+        if not contact:
+            return jsonify({
+                'success': False,
+                'error': f'Contact {phone} not found'
+            }), 404
+        
+        return versioned_response({'success': True, 'contact': serialize_contact(contact)}, contact.version)
+    
+    except Exception as e:
+        print(f"Error in get_contact: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@app.route('/api/contacts/<phone>', methods=['PUT'])
+@require_api_key(permission='manage_contacts')
+@rate_limit(max_requests=100, window_seconds=3600)
+def update_contact(phone):
+    """Rename or renumber a contact; send If-Match to fail with 409 if someone else changed it first"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'JSON data required'
+            }), 400
+        
+        try:
+            expected_version = expected_version_from_request()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            contact = find_contact_for_request(contact_storage, phone)
+            if not contact:
+                return jsonify({
+                    'success': False,
+                    'error': f'Contact {phone} not found'
+                }), 404
+            
+            result = contact_storage.update_contact(
+                contact.phone,
+                data.get('name', contact.name),
+                data.get('phone', contact.phone),
+                expected_version=expected_version
+            )
+            if not result.is_valid:
+                return mutation_failed_response(result)
+            
+            updated = find_contact_for_request(contact_storage, data.get('phone', contact.phone))
+        
+        return versioned_response({'success': True, 'contact': serialize_contact(updated)}, updated.version)
+    
+    except Exception as e:
+        print(f"Error in update_contact: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+@app.route('/api/contacts/<phone>', methods=['DELETE'])
+@require_api_key(permission='manage_contacts')
+@rate_limit(max_requests=100, window_seconds=3600)
+def delete_contact(phone):
+    """Delete a contact (and its group memberships), optionally guarded by If-Match"""
+    try:
+        try:
+            expected_version = expected_version_from_request()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        with alert_system.tenant_contact_storage(request.api_key_info['name']) as contact_storage:
+            contact = find_contact_for_request(contact_storage, phone)
+            if not contact:
+                return jsonify({
+                    'success': False,
+                    'error': f'Contact {phone} not found'
+                }), 404
+            
+            result = contact_storage.delete_contact(contact, expected_version=expected_version)
+        
+        if not result.is_valid:
+            return mutation_failed_response(result)
+        
+        return jsonify({'success': True, 'message': result.sanitized_value})
+    
+    except Exception as e:
+        print(f"Error in delete_contact: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
 @app.route('/api/scripts', methods=['GET'])
 @require_api_key()
 @rate_limit(max_requests=100, window_seconds=3600)
@@ -397,12 +835,17 @@ def get_scripts():
                 'error': 'Alert system not available'
             }), 503
         
-        scripts = alert_system.notification_service.get_full_script_templates()
+        notification_service = alert_system.notification_service
+        etag = version_etag(f"scripts-{notification_service.templates_version}")
+        if client_has_current(etag):
+            return not_modified_response(etag)
         
-        return jsonify({
+        scripts = notification_service.get_full_script_templates()
+        
+        return etagged_response({
             'success': True,
             'scripts': scripts
-        })
+        }, etag)
     
     except Exception as e:
         print(f"Error in get_scripts: {str(e)}")
@@ -411,6 +854,27 @@ def get_scripts():
             'error': 'Internal server error'
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+@require_api_key()
+@rate_limit(max_requests=1000, window_seconds=3600)
+def get_metrics():
+    """Per-process metrics: the provider circuit breaker and retries, and the phone validation cache"""
+    try:
+        return jsonify({
+            'success': True,
+            'metrics': {
+                'provider': alert_system.notification_service.provider_guard.metrics(),
+                'phone_cache': InputValidator.phone_cache_info()
+            }
+        })
+    
+    except Exception as e:
+        print(f"Error in get_metrics: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -461,8 +925,12 @@ if __name__ == '__main__':
     print("   - POST /api/auth - Get session token")
     print("   - POST /api/send_business - Send business alert")
     print("   - POST /api/send_leisure - Send leisure alert")
+    print("   - GET /api/jobs/<id> - Progress of a queued alert")
     print("   - GET /api/groups - Get contact groups")
+    print("   - GET/PUT/DELETE /api/groups/<name> - Read or change a group (ETag/If-Match)")
+    print("   - GET/PUT/DELETE /api/contacts/<phone> - Read or change a contact (ETag/If-Match)")
     print("   - GET /api/scripts - Get message templates")
+    print("   - GET /api/metrics - Circuit breaker and cache metrics")
     print("\n🔒 Security Features Enabled:")
     print("   - Input validation and sanitization")
     print("   - API key authentication")
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+# The application imports its packages (models, services, utils) from src
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services.contact_storage import STORAGE_MODES, ContactStorage
+
+
+@pytest.fixture(autouse=True)
+def sync_startup_validation(monkeypatch):
+    # Background validation would race the test's own writes
+    monkeypatch.setenv('ONARRIVAL_STARTUP_VALIDATION', 'sync')
+
+
+@pytest.fixture(params=STORAGE_MODES)
+def mode(request):
+    return request.param
+
+
+@pytest.fixture
+def open_storage(tmp_path, mode):
+    """Open a ContactStorage of the current mode on the test's data directory; closed afterwards"""
+    opened = []
+
+    def open_storage():
+        storage = ContactStorage(mode=mode, data_dir=str(tmp_path))
+        opened.append(storage)
+        return storage
+
+    yield open_storage
+    for storage in opened:
+        storage.close()
@@ -0,0 +1,88 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('twilio')
+
+# web_app imports the alert system as src.services.location_alert_system
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import web_app
+
+API_KEY = 'test-conditional-requests'
+
+
+@pytest.fixture
+def client(open_storage, monkeypatch):
+    storage = open_storage()
+    storage.add_group('Family')
+    storage.add_contact_to_group('Family', 'Ann', '+15550000001')
+    monkeypatch.setattr(web_app.alert_system, 'contact_storage', storage)
+    monkeypatch.setattr(web_app.alert_system, 'tenant_storage', None)
+    monkeypatch.setitem(web_app.auth_manager.api_keys, API_KEY, {
+        'name': 'tests',
+        'permissions': ['send_alerts', 'manage_contacts', 'manage_groups'],
+        'rate_limit': 100000,
+    })
+    web_app.app.config['TESTING'] = True
+    with web_app.app.test_client() as client:
+        client.environ_base['HTTP_X_API_KEY'] = API_KEY
+        yield client
+
+
+def group_body(*contacts):
+    return {'contacts': [{'name': name, 'phone': phone} for name, phone in contacts]}
+
+
+def test_if_none_match_returns_304_until_data_changes(client):
+    response = client.get('/api/groups')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    response = client.get('/api/groups', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+    # The summary listing is a different representation
+    assert client.get('/api/groups?summary=1', headers={'If-None-Match': etag}).status_code == 200
+
+    client.put('/api/groups/Family', json=group_body(('Bob', '+15550000002')))
+    response = client.get('/api/groups', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_stale_if_match_on_put_returns_409(client):
+    etag = client.get('/api/groups/Family').headers['ETag']
+
+    response = client.put('/api/groups/Family', json=group_body(('Bob', '+15550000002')),
+                          headers={'If-Match': etag})
+    assert response.status_code == 200
+    current = response.headers['ETag']
+    assert current != etag
+
+    response = client.put('/api/groups/Family', json=group_body(('Cat', '+15550000003')),
+                          headers={'If-Match': etag})
+    assert response.status_code == 409
+    group = client.get('/api/groups/Family').get_json()['group']
+    assert [c['name'] for c in group['contacts']] == ['Bob']
+
+
+def test_stale_if_match_on_delete_returns_409(client):
+    etag = client.get('/api/groups/Family').headers['ETag']
+    client.put('/api/groups/Family', json=group_body(('Bob', '+15550000002')))
+
+    assert client.delete('/api/groups/Family', headers={'If-Match': etag}).status_code == 409
+    assert client.get('/api/groups/Family').status_code == 200
+
+    current = client.get('/api/groups/Family').headers['ETag']
+    assert client.delete('/api/groups/Family', headers={'If-Match': current}).status_code == 200
+    assert client.get('/api/groups/Family').status_code == 404
+
+
+def test_malformed_if_match_is_rejected(client):
+    response = client.put('/api/groups/Family', json=group_body(('Bob', '+15550000002')),
+                          headers={'If-Match': '"not-a-version"'})
+    assert response.status_code == 400
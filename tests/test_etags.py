@@ -0,0 +1,72 @@
+import pytest
+
+from models.group import Group
+from services.contact_storage import VERSION_CONFLICT, ContactStorage
+from utils.etags import etag_matches, parse_if_match, version_etag
+
+
+def groups_etag(storage):
+    # As GET /api/groups computes it
+    return version_etag(f"groups-full-{storage.data_version()}")
+
+
+def test_if_none_match():
+    etag = version_etag('groups-full-ab12cd34.7')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('', etag)
+    assert not etag_matches(version_etag('groups-full-ab12cd34.8'), etag)
+
+
+@pytest.mark.parametrize('header, version', [('"3"', 3), ('W/"3"', 3), (' "12" ', 12), ('', None), ('*', None)])
+def test_if_match_names_a_version(header, version):
+    assert parse_if_match(header) == version
+
+
+@pytest.mark.parametrize('header', ['"abc"', '"-1"', '"3", "4"'])
+def test_if_match_rejects_other_tags(header):
+    with pytest.raises(ValueError):
+        parse_if_match(header)
+
+
+def test_groups_etag_changes_only_with_the_data(open_storage):
+    storage = open_storage()
+    storage.add_group('Family')
+    etag = groups_etag(storage)
+
+    # Reads leave it alone, so a repeated If-None-Match gets 304
+    storage.load_groups()
+    storage.search('fam')
+    assert etag_matches(etag, groups_etag(storage))
+
+    storage.add_contact_to_group('Family', 'Alice Smith', '+14155550101')
+    assert not etag_matches(etag, groups_etag(storage))
+
+
+def test_groups_etags_differ_between_stores(tmp_path, mode):
+    stores = [ContactStorage(mode=mode, data_dir=str(tmp_path / name)) for name in ('acme', 'globex')]
+    try:
+        for storage in stores:
+            storage.add_group('Family')
+        assert groups_etag(stores[0]) != groups_etag(stores[1])
+    finally:
+        for storage in stores:
+            storage.close()
+
+
+def test_stale_if_match_is_a_version_conflict(open_storage):
+    storage = open_storage()
+    storage.add_group('Family')
+    stale = version_etag(storage.get_group_by_name('Family').version)
+    storage.add_contact_to_group('Family', 'Alice Smith', '+14155550101')
+    current = version_etag(storage.get_group_by_name('Family').version)
+
+    # web_app answers VERSION_CONFLICT with 409 Conflict
+    replacement = Group('Family', validate=False)
+    result = storage.update_group(replacement, expected_version=parse_if_match(stale))
+    assert result.error_code == VERSION_CONFLICT
+    assert storage.delete_group('Family', expected_version=parse_if_match(stale)).error_code == VERSION_CONFLICT
+    assert [c.name for c in storage.get_group_by_name('Family').contacts] == ['Alice Smith']
+
+    assert storage.delete_group('Family', expected_version=parse_if_match(current)).is_valid
@@ -0,0 +1,43 @@
+import gc
+import json
+import time
+import weakref
+
+from services.contact_storage import ContactStorage
+
+
+def stored_names(path):
+    with open(path) as f:
+        return [c['name'] for c in json.load(f)]
+
+
+def test_window_collapses_writes_until_flush(tmp_path, monkeypatch):
+    monkeypatch.setenv('ONARRIVAL_GROUP_COMMIT_MS', '60000')
+    storage = ContactStorage(mode='memory', data_dir=str(tmp_path))
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_contact('Bob Jones', '+14155550102')
+    contacts_file = storage.backend.contacts_file
+    assert stored_names(contacts_file) == []
+
+    storage.flush()
+    assert stored_names(contacts_file) == ['Alice Smith', 'Bob Jones']
+    storage.close()
+
+
+def test_closed_store_is_released(tmp_path, monkeypatch):
+    monkeypatch.setenv('ONARRIVAL_GROUP_COMMIT_MS', '60000')
+    storage = ContactStorage(mode='memory', data_dir=str(tmp_path))
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_contact('Bob Jones', '+14155550102')
+    contacts_file = storage.backend.contacts_file
+    backend = weakref.ref(storage.backend)
+    storage.close()
+    assert stored_names(contacts_file) == ['Alice Smith', 'Bob Jones']
+
+    del storage
+    deadline = time.monotonic() + 5
+    while backend() is not None and time.monotonic() < deadline:
+        # The cancelled flush timer thread lets go of it as it exits
+        gc.collect()
+        time.sleep(0.01)
+    assert backend() is None
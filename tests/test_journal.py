@@ -0,0 +1,185 @@
+import threading
+import time
+
+import pytest
+
+JOURNAL_MODES = ('journal', 'binary', 'columnar')
+
+
+@pytest.fixture(params=JOURNAL_MODES)
+def mode(request):
+    return request.param
+
+
+def contact_rows(storage):
+    return [(c.name, c.phone, c.version) for c in storage.load_contacts()]
+
+
+def journal_lines(path):
+    with open(path, 'rb') as f:
+        return f.read().splitlines()
+
+
+def test_torn_tail_is_discarded(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_contact('Bob Jones', '+14155550102')
+    journal_file = storage.backend.journal_file
+    storage.close()
+
+    # A crash in the middle of appending the third entry
+    with open(journal_file, 'a') as f:
+        f.write('{"seq":3,"op":"insert_contact","args":{"name":"Carol')
+
+    reopened = open_storage()
+    assert [c.name for c in reopened.load_contacts()] == ['Alice Smith', 'Bob Jones']
+    with open(journal_file, 'rb') as f:
+        assert f.read().endswith(b'\n')
+    assert len(journal_lines(journal_file)) == 2
+
+    # New entries go after the last whole one
+    reopened.add_contact('Carol White', '+14155550103')
+    reopened.close()
+    assert [c.name for c in open_storage().load_contacts()] == ['Alice Smith', 'Bob Jones', 'Carol White']
+
+
+def test_compaction_folds_journal_into_snapshot(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_group('Family')
+    storage.add_contact_to_group('Family', 'Alice Smith', '+14155550101')
+    storage.backend.compact()
+    assert journal_lines(storage.backend.journal_file) == []
+
+    storage.update_contact('+14155550101', 'Alice Jones', '+14155550111')
+    before = (contact_rows(storage), storage.data_version())
+    storage.close()
+
+    reopened = open_storage()
+    assert (contact_rows(reopened), reopened.data_version().rsplit('.', 1)[1]) == \
+        (before[0], before[1].rsplit('.', 1)[1])
+    assert [c.phone for c in reopened.get_group_by_name('Family').contacts] == ['+14155550111']
+
+
+def test_entries_already_in_snapshot_are_not_replayed(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.update_contact('+14155550101', 'Alice Jones', '+14155550101')
+    journal_file = storage.backend.journal_file
+    with open(journal_file, 'rb') as f:
+        journal = f.read()
+    storage.backend.compact()
+    storage.close()
+
+    # A crash after writing the snapshot but before emptying the journal
+    with open(journal_file, 'wb') as f:
+        f.write(journal)
+
+    assert contact_rows(open_storage()) == [('Alice Jones', '+14155550101', 2)]
+
+
+def test_compaction_starts_at_threshold(open_storage, monkeypatch):
+    monkeypatch.setenv('ONARRIVAL_JOURNAL_COMPACT_THRESHOLD', '5')
+    storage = open_storage()
+    phones = [f'+1415555{i:04d}' for i in range(12)]
+    for i, phone in enumerate(phones):
+        storage.add_contact(f'Person {chr(65 + i)}', phone)
+
+    deadline = time.monotonic() + 10
+    while storage.backend._compacting and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(journal_lines(storage.backend.journal_file)) < len(phones)
+    storage.close()
+
+    assert [c.phone for c in open_storage().load_contacts()] == phones
+
+
+def test_readded_records_are_listed_last(open_storage):
+    storage = open_storage()
+    for name, phone in [('Alice Smith', '+14155550101'), ('Bob Jones', '+14155550102'),
+                        ('Carol White', '+14155550103')]:
+        storage.add_contact(name, phone)
+    storage.add_group('Family')
+    storage.add_group('Work')
+    storage.backend.compact()
+
+    storage.delete_contact(storage.get_contact_by_phone('+14155550101'))
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.delete_group('Family')
+    storage.add_group('Family')
+    # A renumbered contact keeps its place when it is renamed afterwards
+    storage.update_contact('+14155550102', 'Bob Jones', '+14155550112')
+    storage.update_contact('+14155550112', 'Bob Brown', '+14155550112')
+
+    expected = (['Bob Brown', 'Carol White', 'Alice Smith'], ['Work', 'Family'])
+
+    def listing(storage):
+        return [c.name for c in storage.load_contacts()], [g.name for g in storage.load_groups()]
+
+    assert listing(storage) == expected
+    assert [s.name for s in storage.load_group_summaries()] == expected[1]
+    storage.backend.compact()
+    assert listing(storage) == expected
+    storage.close()
+    assert listing(open_storage()) == expected
+
+
+@pytest.mark.parametrize('mode', ['binary'])
+def test_writes_proceed_while_snapshot_is_encoded(open_storage, monkeypatch):
+    from services import binary_snapshot
+
+    encoding, release = threading.Event(), threading.Event()
+    encode_snapshot = binary_snapshot.encode_snapshot
+
+    def slow_encode(*args):
+        encoding.set()
+        release.wait(10)
+        return encode_snapshot(*args)
+
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    monkeypatch.setattr(binary_snapshot, 'encode_snapshot', slow_encode)
+    compaction = threading.Thread(target=storage.backend.compact)
+    compaction.start()
+    assert encoding.wait(10)
+
+    def write():
+        storage.add_contact('Bob Jones', '+14155550102')
+        storage.update_contact('+14155550101', 'Alice Jones', '+14155550101')
+
+    # Not blocked by the compaction in progress
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer.join(5)
+    finished = not writer.is_alive()
+    release.set()
+    writer.join()
+    compaction.join()
+    assert finished
+
+    expected = [('Alice Jones', '+14155550101', 2), ('Bob Jones', '+14155550102', 1)]
+    assert contact_rows(storage) == expected
+    assert len(journal_lines(storage.backend.journal_file)) == 2
+    storage.close()
+    assert contact_rows(open_storage()) == expected
+
+
+def test_close_waits_for_compaction(open_storage, monkeypatch):
+    monkeypatch.setenv('ONARRIVAL_JOURNAL_COMPACT_THRESHOLD', '1')
+    storage = open_storage()
+    backend = storage.backend
+    compact = backend.compact
+
+    def slow_compact():
+        time.sleep(0.2)
+        compact()
+
+    monkeypatch.setattr(backend, 'compact', slow_compact)
+    storage.add_contact('Alice Smith', '+14155550101')
+    assert backend._compacting
+    storage.close()
+
+    # Nothing touches the files once close returns
+    assert not backend._compacting
+    assert journal_lines(backend.journal_file) == []
+    assert [c.name for c in open_storage().load_contacts()] == ['Alice Smith']
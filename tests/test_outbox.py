@@ -0,0 +1,226 @@
+import gc
+import threading
+import time
+import weakref
+
+import pytest
+
+from services.call_status import CallStatusBuffer
+from services.outbox import FAILED, PENDING, SENDING, SENT, Outbox, OutboxDispatcher
+from services.provider_guard import NOT_ATTEMPTED, CircuitBreaker
+
+
+def recipients(count, error_at=None):
+    return [
+        {'name': f'Person {i}', 'phone': f'+1415555{i:04d}', 'message': f'Hello {i}',
+         'business_name': 'Cafe', 'include_follow_up': True, 'error': 'Invalid phone' if i == error_at else None}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'))
+    yield outbox
+    outbox.close()
+
+
+class FakeDispatcher:
+    """send_calls() stand-in returning a scripted result per phone (a SID by default)"""
+
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.batches = []
+
+    def send_calls(self, calls):
+        self.batches.append([call['to_phone'] for call in calls])
+        return [self.results.get(call['to_phone'], f"CA{call['to_phone'][-4:]}") for call in calls]
+
+
+def test_enqueue_and_claim(outbox):
+    job_id = outbox.enqueue('business', recipients(3, error_at=1), tenant='acme')
+    job = outbox.get_job(job_id, tenant='acme')
+    assert job['status'] == 'queued'
+    assert job['counts'] == {PENDING: 2, SENDING: 0, SENT: 0, FAILED: 1}
+    assert outbox.get_job(job_id, tenant='other') is None
+
+    claimed = outbox.claim(10)
+    assert [call['to_phone'] for call in claimed] == ['+14155550000', '+14155550002']
+    assert claimed[0]['message'] == 'Hello 0' and claimed[0]['include_follow_up'] is True
+    # Claimed recipients are not handed out again while their lease runs
+    assert outbox.claim(10) == []
+    assert outbox.get_job(job_id)['status'] == 'in_progress'
+
+
+def test_claim_respects_limit_and_order(outbox):
+    outbox.enqueue('group', recipients(5))
+    first = outbox.claim(2)
+    second = outbox.claim(2)
+    assert [c['name'] for c in first + second] == ['Person 0', 'Person 1', 'Person 2', 'Person 3']
+
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'), lease_seconds=0.05)
+    try:
+        job_id = outbox.enqueue('group', recipients(2))
+        first = outbox.claim(10)
+        assert len(first) == 2 and outbox.claim(10) == []
+
+        # The dispatcher holding them died: once the lease runs out they are claimed again
+        time.sleep(0.1)
+        again = outbox.claim(10)
+        assert [c['id'] for c in again] == [c['id'] for c in first]
+
+        outbox.complete([(call['id'], 'CA1', None) for call in again])
+        assert outbox.get_job(job_id)['status'] == 'completed'
+    finally:
+        outbox.close()
+
+
+def test_complete_records_outcomes(outbox):
+    job_id = outbox.enqueue('group', recipients(3))
+    claimed = outbox.claim(10)
+    outbox.complete([
+        (claimed[0]['id'], 'CA100', None),
+        (claimed[1]['id'], None, 'Failed to send alert to Person 1'),
+        (claimed[2]['id'], NOT_ATTEMPTED, None),
+    ])
+
+    job = outbox.get_job(job_id)
+    assert [(r['status'], r['call_sid']) for r in job['recipients']] == \
+        [(SENT, 'CA100'), (FAILED, None), (PENDING, None)]
+    assert job['status'] == 'in_progress'
+    # The call the breaker held back is queued again, but not handed out at once
+    assert outbox.claim(10) == []
+
+
+def test_requeued_call_waits_before_it_is_claimed_again(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'), requeue_seconds=0.1)
+    try:
+        outbox.enqueue('group', recipients(2))
+        first, second = outbox.claim(10)
+        outbox.complete([(first['id'], NOT_ATTEMPTED, None), (second['id'], NOT_ATTEMPTED, None)])
+        assert outbox.claim(10) == []
+
+        time.sleep(0.15)
+        assert [c['id'] for c in outbox.claim(10)] == [first['id'], second['id']]
+    finally:
+        outbox.close()
+
+
+def test_lease_is_renewed_while_calls_are_placed(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'), lease_seconds=0.1)
+    try:
+        job_id = outbox.enqueue('group', recipients(2))
+        calling, stalled = threading.Event(), threading.Event()
+
+        class SlowDispatcher(FakeDispatcher):
+            def send_calls(self, calls):
+                calling.set()
+                # A slow provider: well past the lease
+                stalled.wait(0.5)
+                return super().send_calls(calls)
+
+        calls = SlowDispatcher()
+        drain = threading.Thread(target=OutboxDispatcher(outbox, calls).drain_once)
+        drain.start()
+        assert calling.wait(5)
+
+        reclaimed = []
+        deadline = time.monotonic() + 0.4
+        while time.monotonic() < deadline:
+            reclaimed += outbox.claim(10)
+            time.sleep(0.02)
+        stalled.set()
+        drain.join()
+
+        assert reclaimed == []
+        assert outbox.get_job(job_id)['counts'][SENT] == 2
+    finally:
+        outbox.close()
+
+
+def test_call_statuses_keep_the_latest_event(outbox):
+    job_id = outbox.enqueue('group', recipients(1))
+    call = outbox.claim(1)[0]
+    outbox.complete([(call['id'], 'CA1', None)])
+    outbox.record_call_statuses({'CA1': {'CallStatus': 'completed', 'CallDuration': '12', 'SequenceNumber': '3'}})
+    outbox.record_call_statuses({'CA1': {'CallStatus': 'ringing', 'SequenceNumber': '1'}})
+
+    recipient = outbox.get_job(job_id)['recipients'][0]
+    assert (recipient['call_status'], recipient['call_duration']) == ('completed', 12)
+
+
+def test_status_buffer_flushes_on_close_and_is_released(outbox):
+    job_id = outbox.enqueue('group', recipients(1))
+    call = outbox.claim(1)[0]
+    outbox.complete([(call['id'], 'CA1', None)])
+
+    buffer = CallStatusBuffer(outbox, flush_seconds=60)
+    buffer.record('CA1', {'CallStatus': 'ringing', 'SequenceNumber': '1'})
+    buffer.record('CA1', {'CallStatus': 'completed', 'CallDuration': '7', 'SequenceNumber': '2'})
+    assert outbox.get_job(job_id)['recipients'][0]['call_status'] is None
+
+    released = weakref.ref(buffer)
+    buffer.close()
+    assert outbox.get_job(job_id)['recipients'][0]['call_status'] == 'completed'
+
+    del buffer
+    deadline = time.monotonic() + 5
+    while released() is not None and time.monotonic() < deadline:
+        # The cancelled flush timer thread lets go of it as it exits
+        gc.collect()
+        time.sleep(0.01)
+    assert released() is None
+
+
+def test_dispatcher_drains_batches(outbox):
+    job_id = outbox.enqueue('group', recipients(5))
+    calls = FakeDispatcher({'+14155550003': None})
+    dispatcher = OutboxDispatcher(outbox, calls, batch_size=2)
+
+    handled = []
+    while True:
+        drained = dispatcher.drain_once()
+        if not drained:
+            break
+        handled.append(drained)
+    assert handled == [2, 2, 1]
+    assert outbox.get_job(job_id)['counts'] == {PENDING: 0, SENDING: 0, SENT: 4, FAILED: 1}
+
+
+def test_dispatcher_requeues_calls_the_breaker_rejects(outbox):
+    job_id = outbox.enqueue('group', recipients(3))
+    calls = FakeDispatcher({phone: NOT_ATTEMPTED for phone in ('+14155550001', '+14155550002')})
+    dispatcher = OutboxDispatcher(outbox, calls, batch_size=10)
+
+    assert dispatcher.drain_once() == 1
+    assert outbox.get_job(job_id)['counts'] == {PENDING: 2, SENDING: 0, SENT: 1, FAILED: 0}
+
+
+def test_dispatcher_waits_while_breaker_is_open_and_trials_one(outbox):
+    job_id = outbox.enqueue('group', recipients(4))
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.2)
+    breaker.record_failure()
+    calls = FakeDispatcher()
+    dispatcher = OutboxDispatcher(outbox, calls, batch_size=10, poll_seconds=0.02, breaker=breaker)
+
+    dispatcher.start()
+    try:
+        time.sleep(0.1)
+        assert calls.batches == []
+        assert outbox.get_job(job_id)['counts'][PENDING] == 4
+
+        # Half-open: one recipient goes first; the fake call doesn't touch the
+        # breaker, so close it as a successful trial would
+        deadline = time.monotonic() + 5
+        while not calls.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        breaker.record_success()
+        while outbox.get_job(job_id)['status'] != 'completed' and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        dispatcher.stop()
+
+    assert calls.batches[0] == ['+14155550000']
+    assert outbox.get_job(job_id)['counts'][SENT] == 4
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from services.provider_guard import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ProviderGuard, ProviderUnavailable
+
+
+class ProviderError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def retryable(error):
+    return isinstance(error, ProviderError) and error.status in (429, 503)
+
+
+def outage(error):
+    return isinstance(error, ProviderError) and (error.status == 429 or error.status >= 500)
+
+
+class Provider:
+    """Fails with the given statuses in turn, then succeeds"""
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.attempts = 0
+
+    def create(self):
+        self.attempts += 1
+        if self.statuses:
+            raise ProviderError(self.statuses.pop(0))
+        return 'CA1'
+
+
+def guard(failure_threshold=3, reset_seconds=0.1, max_attempts=3):
+    return ProviderGuard(retryable, CircuitBreaker(failure_threshold, reset_seconds), max_attempts=max_attempts,
+                         base_delay=0, max_delay=0, is_outage=outage)
+
+
+def test_breaker_closed_open_half_open_closed():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.1)
+    assert breaker.current_state() == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.current_state() == CLOSED
+    breaker.record_failure()
+    assert breaker.current_state() == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.12)
+    assert breaker.current_state() == HALF_OPEN
+    # Only one trial call at a time
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.current_state() == CLOSED
+    assert breaker.metrics()['times_opened'] == 1
+
+
+def test_failed_trial_opens_breaker_again():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.1)
+    breaker.record_failure()
+    breaker.record_failure()
+    time.sleep(0.12)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.current_state() == OPEN
+    assert breaker.metrics()['times_opened'] == 2
+
+
+def test_released_trial_lets_next_call_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.07)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.current_state() == HALF_OPEN and breaker.allow()
+
+
+def test_retryable_errors_are_retried():
+    provider = Provider(429, 503)
+    provider_guard = guard()
+    assert provider_guard.call(provider.create) == 'CA1'
+    assert provider.attempts == 3
+    assert provider_guard.metrics()['retries'] == 2
+    assert provider_guard.breaker.current_state() == CLOSED
+
+
+@pytest.mark.parametrize('status', [500, 502, 400])
+def test_other_errors_are_not_retried(status):
+    provider = Provider(status)
+    provider_guard = guard()
+    with pytest.raises(ProviderError):
+        provider_guard.call(provider.create)
+    assert provider.attempts == 1
+    # Server errors still count towards opening the breaker
+    assert provider_guard.breaker.consecutive_failures == (1 if status >= 500 else 0)
+
+
+def test_open_breaker_fails_fast_until_reset():
+    provider_guard = guard(failure_threshold=2, reset_seconds=0.1, max_attempts=1)
+    for _ in range(2):
+        with pytest.raises(ProviderError):
+            provider_guard.call(Provider(500).create)
+
+    provider = Provider()
+    with pytest.raises(ProviderUnavailable):
+        provider_guard.call(provider.create)
+    assert provider.attempts == 0
+
+    time.sleep(0.12)
+    assert provider_guard.call(provider.create) == 'CA1'
+    assert provider_guard.breaker.current_state() == CLOSED
+
+
+def test_async_calls_share_the_policy():
+    provider = Provider(503)
+    provider_guard = guard()
+
+    async def create():
+        return provider.create()
+
+    assert asyncio.run(provider_guard.call_async(create)) == 'CA1'
+    assert provider.attempts == 2
+
+
+def test_backoff_is_capped_full_jitter():
+    provider_guard = ProviderGuard(retryable, max_attempts=5, base_delay=0.2, max_delay=1.0)
+    for retry in range(6):
+        cap = min(1.0, 0.2 * 2 ** retry)
+        assert all(0 <= provider_guard.backoff(retry) <= cap for _ in range(50))
@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+import pytest
+
+
+def names(contacts):
+    return [c.name for c in contacts]
+
+
+def test_prefix_search_follows_changes(open_storage):
+    storage = open_storage()
+    storage.add_contact('Mary Ann Lee', '+14155550101')
+    storage.add_contact('Ann Lowe', '+14155550102')
+    storage.add_contact('Bob Jones', '+14165550103')
+    assert sorted(names(storage.search('ann l'))) == ['Ann Lowe', 'Mary Ann Lee']
+    assert names(storage.search('1416')) == ['Bob Jones']
+
+    # Kept up to date by this storage's own changes
+    storage.update_contact('+14155550102', 'Annie Lowe', '+14155550102')
+    storage.delete_contact(storage.get_contact_by_phone('+14155550101'))
+    storage.add_contact('Anna Bell', '+14155550104')
+    assert sorted(names(storage.search('ann'))) == ['Anna Bell', 'Annie Lowe']
+
+
+@pytest.mark.parametrize('mode', ['sqlite'])
+def test_search_does_not_wait_for_writers(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+
+    # Another process holds the database write lock
+    writer = sqlite3.connect(storage.backend.db_path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        assert names(storage.search('ali')) == ['Alice Smith']
+        assert time.monotonic() - started < 1
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
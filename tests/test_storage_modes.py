@@ -0,0 +1,229 @@
+import random
+
+import pytest
+
+from models.contact import Contact
+from models.group import Group
+from services.contact_storage import STORAGE_MODES, ContactStorage
+
+
+def contact_rows(storage):
+    return [(c.name, c.phone, c.version) for c in storage.load_contacts()]
+
+
+def group_rows(storage):
+    return [(g.name, g.version, [c.phone for c in g.contacts]) for g in storage.load_groups()]
+
+
+def exercise(storage):
+    """A fixed sequence of changes; returns every result and the final data"""
+    results = [
+        storage.add_contact('Alice Smith', '+14155550101'),
+        storage.add_contact('Bob Jones', '(415) 555-0102'),
+        storage.add_contact('Carol White', '+14155550103'),
+        storage.add_contact('Alice Smith', '+14155550199'),
+        storage.add_contact('Dave Brown', '+14155550101'),
+        storage.add_group('Family'),
+        storage.add_group('Family'),
+        storage.add_contact_to_group('Family', 'Carol White', '+14155550103'),
+        storage.add_contact_to_group('Family', 'Alice Smith', '+14155550101'),
+        storage.add_contact_to_group('Family', 'Erin Green', '+14155550105'),
+        storage.update_contact('+14155550101', 'Alice Jones', '+14155550111'),
+        storage.delete_contact(storage.get_contact_by_phone('+14155550103')),
+        storage.remove_contact_from_group('Family', '+14155550105'),
+    ]
+    return [(r.is_valid, r.error_code) for r in results], contact_rows(storage), group_rows(storage)
+
+
+def test_crud(open_storage):
+    storage = open_storage()
+    assert storage.add_contact('Alice Smith', '+14155550101').is_valid
+    assert storage.add_contact('Bob Jones', '4155550102').is_valid
+    assert not storage.add_contact('alice smith', '+14155550109').is_valid
+    assert not storage.add_contact('Carol White', '+14155550101').is_valid
+
+    assert storage.get_contact_by_phone('+14155550102').name == 'Bob Jones'
+
+    assert storage.update_contact('+14155550101', 'Alice Jones', '+14155550111').is_valid
+    assert storage.get_contact_by_phone('+14155550101') is None
+    renamed = storage.get_contact_by_phone('+14155550111')
+    assert (renamed.name, renamed.version) == ('Alice Jones', 2)
+
+    assert storage.delete_contact(renamed).is_valid
+    assert not storage.delete_contact(renamed).is_valid
+    assert contact_rows(storage) == [('Bob Jones', '+14155550102', 1)]
+
+
+def test_group_members_follow_contacts(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_group('Family')
+    for name, phone in [('Carol White', '+14155550103'), ('Alice Smith', '+14155550101'),
+                        ('Bob Jones', '+14155550102')]:
+        assert storage.add_contact_to_group('Family', name, phone).is_valid
+    assert not storage.add_contact_to_group('Family', 'Bob Jones', '+14155550102').is_valid
+    # A member's phone already belongs to another contact
+    assert not storage.add_contact_to_group('Family', 'Someone Else', '+14155550101').is_valid
+
+    # Members are new contacts too, and listed in the order they joined
+    assert storage.get_contact_by_phone('+14155550103').name == 'Carol White'
+    assert [c.name for c in storage.get_group_by_name('Family').contacts] == \
+        ['Carol White', 'Alice Smith', 'Bob Jones']
+
+    storage.update_contact('+14155550101', 'Alice Jones', '+14155550111')
+    storage.delete_contact(storage.get_contact_by_phone('+14155550103'))
+    assert [(c.name, c.phone) for c in storage.get_group_by_name('Family').contacts] == \
+        [('Alice Jones', '+14155550111'), ('Bob Jones', '+14155550102')]
+    assert storage.load_group_summaries()[0].contact_count == 2
+
+
+def test_data_persists_across_reopen(open_storage):
+    storage = open_storage()
+    _, contacts, groups = exercise(storage)
+    storage.close()
+
+    reopened = open_storage()
+    assert contact_rows(reopened) == contacts
+    assert group_rows(reopened) == groups
+
+
+def test_modes_give_identical_results(tmp_path):
+    outcomes = {}
+    for mode in STORAGE_MODES:
+        storage = ContactStorage(mode=mode, data_dir=str(tmp_path / mode))
+        try:
+            outcomes[mode] = exercise(storage)
+        finally:
+            storage.close()
+
+    expected = outcomes['json']
+    for mode in STORAGE_MODES:
+        assert outcomes[mode] == expected, mode
+
+
+@pytest.mark.parametrize('limit', [1, 2, 5])
+def test_group_pages_cover_members_in_order(open_storage, limit):
+    storage = open_storage()
+    storage.add_group('Team')
+    phones = [f'+1415555{i:04d}' for i in (7, 3, 9, 1, 5)]
+    for i, phone in enumerate(phones):
+        storage.add_contact_to_group('Team', f'Member {chr(65 + i)}', phone)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = storage.get_group_contacts_page('Team', cursor, limit)
+        seen += [c.phone for c in page]
+        if cursor is None:
+            break
+    assert seen == phones
+
+
+@pytest.mark.parametrize('deleted', ['+14155550101', '+14155550102'])
+def test_member_names_stay_unique(open_storage, deleted):
+    storage = open_storage()
+    storage.add_contact('Ann Lee', '+14155550101')
+    storage.add_group('Family')
+    storage.add_group('Work')
+    # The name belongs to another contact, in no group or in this one
+    assert not storage.add_contact_to_group('Family', 'ann lee', '+14155550102').is_valid
+    assert storage.add_contact_to_group('Work', 'Eve Park', '+14155550103').is_valid
+    assert not storage.add_contact_to_group('Work', 'Eve Park', '+14155550104').is_valid
+    assert not storage.add_contact_to_group('Family', 'Eve Park', '+14155550104').is_valid
+    assert not storage.update_group(Group('Family', [Contact('Ann Lee', '+14155550102')])).is_valid
+    # Joining under the stored name and phone is still fine
+    assert storage.add_contact_to_group('Family', 'Ann Lee', '+14155550101').is_valid
+
+    assert storage.add_contact('Bob Ray', '+14155550102').is_valid
+    storage.delete_contact(storage.get_contact_by_phone(deleted))
+    assert not storage.add_contact('Bob Ray' if deleted == '+14155550101' else 'Ann Lee', '+14155550109').is_valid
+    assert len(storage.load_contacts()) == 2
+
+
+def random_operations(seed, count=40):
+    rng = random.Random(seed)
+    names = ['Ann Lee', 'Bob Ray', 'Cat Fox', 'Dan Roe', 'Eve Park']
+    phones = [f'+1415555010{i}' for i in range(6)]
+    return [(rng.choice(['add', 'add', 'update', 'delete', 'group', 'join', 'join', 'leave', 'ungroup']),
+             rng.choice(names), rng.choice(phones), rng.choice(phones), rng.choice(['Family', 'Work']))
+            for _ in range(count)]
+
+
+def replay(storage, operations):
+    results = []
+    for op, name, phone, new_phone, group in operations:
+        if op == 'add':
+            result = storage.add_contact(name, phone)
+        elif op == 'update':
+            result = storage.update_contact(phone, name, new_phone)
+        elif op == 'delete':
+            result = storage.delete_contact(Contact(name, phone, validate=False))
+        elif op == 'group':
+            result = storage.add_group(group)
+        elif op == 'join':
+            result = storage.add_contact_to_group(group, name, phone)
+        elif op == 'leave':
+            result = storage.remove_contact_from_group(group, phone)
+        else:
+            result = storage.delete_group(group)
+        results.append(result.is_valid)
+    return results, contact_rows(storage), group_rows(storage)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_random_operations_agree_across_modes(tmp_path, monkeypatch, seed):
+    # Compact often, so listings are also compared after records move into snapshots
+    monkeypatch.setenv('ONARRIVAL_JOURNAL_COMPACT_THRESHOLD', '3')
+    operations = random_operations(seed)
+    outcomes = {}
+    for mode in STORAGE_MODES:
+        storage = ContactStorage(mode=mode, data_dir=str(tmp_path / mode))
+        try:
+            outcomes[mode] = replay(storage, operations)
+            if hasattr(storage.backend, 'compact'):
+                storage.backend.compact()
+            outcomes[mode] += (contact_rows(storage), group_rows(storage))
+        finally:
+            storage.close()
+
+    for mode in STORAGE_MODES:
+        assert outcomes[mode] == outcomes['json'], mode
+
+
+def compact(storage):
+    """Fold journaled changes into the snapshot, in the modes that have one"""
+    if hasattr(storage.backend, 'compact'):
+        storage.backend.compact()
+
+
+def test_names_are_freed_and_taken_after_changes(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_contact('Bob Jones', '+14155550102')
+    storage.add_contact('Carol White', '+14155550103')
+    compact(storage)
+
+    # A rename frees the old name, a renumber the old phone, a delete both
+    storage.update_contact('+14155550101', 'Alice Jones', '+14155550101')
+    storage.update_contact('+14155550102', 'Bob Jones', '+14155550112')
+    storage.delete_contact(storage.get_contact_by_phone('+14155550103'))
+
+    def check(storage):
+        assert not storage.add_contact('alice jones', '+14155550109').is_valid
+        assert not storage.add_contact('Bob Jones', '+14155550109').is_valid
+        assert not storage.add_contact('Someone Else', '+14155550112').is_valid
+
+    check(storage)
+    assert storage.get_contact_by_phone('+14155550102') is None
+    assert storage.add_contact('Alice Smith', '+14155550104').is_valid
+    assert storage.add_contact('Carol White', '+14155550103').is_valid
+    assert storage.add_contact('Dan Roe', '+14155550102').is_valid
+    expected = contact_rows(storage)
+    compact(storage)
+    check(storage)
+    storage.close()
+
+    reopened = open_storage()
+    check(reopened)
+    assert contact_rows(reopened) == expected
+    assert [name for name, _, _ in expected] == \
+        ['Alice Jones', 'Bob Jones', 'Alice Smith', 'Carol White', 'Dan Roe']
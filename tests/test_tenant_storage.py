@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+from services.tenant_storage import TenantStorageRegistry
+
+
+@pytest.fixture
+def registry(tmp_path, mode, monkeypatch):
+    # Writes stay in the commit window until the shard is closed
+    monkeypatch.setenv('ONARRIVAL_GROUP_COMMIT_MS', '60000')
+    registry = TenantStorageRegistry(base_dir=str(tmp_path), max_open=1, mode=mode)
+    yield registry
+    registry.close()
+
+
+def test_tenants_are_isolated(registry):
+    with registry.shard('acme') as storage:
+        storage.add_contact('Alice Smith', '+14155550101')
+    with registry.shard('globex') as storage:
+        assert storage.load_contacts() == []
+    assert registry.open_tenants() == ['globex']
+    with registry.shard('acme') as storage:
+        assert [c.name for c in storage.load_contacts()] == ['Alice Smith']
+
+
+def test_reopen_waits_for_evicted_shard_to_close(registry, monkeypatch):
+    with registry.shard('acme') as storage:
+        storage.add_contact('Alice Smith', '+14155550101')
+        evicted = storage
+    close = evicted.close
+    closing = threading.Event()
+
+    def slow_close():
+        closing.set()
+        time.sleep(0.2)
+        close()
+
+    monkeypatch.setattr(evicted, 'close', slow_close)
+
+    def open_other_tenant():
+        with registry.shard('globex'):
+            pass
+
+    # Opening another tenant evicts acme and closes it, slowly
+    other = threading.Thread(target=open_other_tenant)
+    other.start()
+    assert closing.wait(5)
+
+    with registry.shard('acme') as storage:
+        assert storage is not evicted
+        assert [c.name for c in storage.load_contacts()] == ['Alice Smith']
+    other.join()
@@ -0,0 +1,85 @@
+import pytest
+
+
+def snapshot(storage):
+    return ([(c.name, c.phone, c.version) for c in storage.load_contacts()],
+            [(g.name, g.version, [c.phone for c in g.contacts]) for g in storage.load_groups()])
+
+
+def test_transaction_commits_all_changes(open_storage):
+    storage = open_storage()
+    with storage.transaction():
+        storage.add_contact('Alice Smith', '+14155550101')
+        storage.add_group('Family')
+        # Later calls see the changes made before them
+        assert storage.add_contact_to_group('Family', 'Alice Smith', '+14155550101').is_valid
+    committed = snapshot(storage)
+    storage.close()
+
+    assert committed[1] == [('Family', 2, ['+14155550101'])]
+    assert snapshot(open_storage()) == committed
+
+
+def test_transaction_rolls_back_on_error(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_group('Family')
+    before = snapshot(storage)
+
+    with pytest.raises(RuntimeError):
+        with storage.transaction():
+            storage.add_contact('Bob Jones', '+14155550102')
+            storage.add_contact_to_group('Family', 'Alice Smith', '+14155550101')
+            storage.update_contact('+14155550101', 'Alice Jones', '+14155550111')
+            storage.delete_group('Family')
+            raise RuntimeError('abort')
+
+    assert snapshot(storage) == before
+    assert storage.get_contact_by_phone('+14155550102') is None
+    storage.close()
+    assert snapshot(open_storage()) == before
+
+
+def test_nested_transactions_commit_once(open_storage):
+    storage = open_storage()
+    with storage.transaction():
+        storage.add_contact('Alice Smith', '+14155550101')
+        with storage.transaction():
+            storage.add_contact('Bob Jones', '+14155550102')
+        storage.add_contact('Carol White', '+14155550103')
+    storage.close()
+
+    assert [c.name for c in open_storage().load_contacts()] == ['Alice Smith', 'Bob Jones', 'Carol White']
+
+
+def test_rollback_restores_names_and_phones(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_contact('Bob Jones', '+14155550102')
+    storage.add_group('Family')
+    storage.add_contact_to_group('Family', 'Bob Jones', '+14155550102')
+    assert [c.name for c in storage.search('a')] == ['Alice Smith']
+
+    with pytest.raises(RuntimeError):
+        with storage.transaction():
+            storage.update_contact('+14155550101', 'Alice Jones', '+14155550111')
+            storage.delete_contact(storage.get_contact_by_phone('+14155550102'))
+            storage.add_contact('Carol White', '+14155550103')
+            raise RuntimeError('abort')
+
+    def check(storage):
+        # Taken again, as before the transaction
+        assert not storage.add_contact('Alice Smith', '+14155550109').is_valid
+        assert not storage.add_contact('Someone Else', '+14155550102').is_valid
+        assert not storage.add_contact_to_group('Family', 'Bob Jones', '+14155550108').is_valid
+        assert [c.name for c in storage.get_group_by_name('Family').contacts] == ['Bob Jones']
+        # Free again
+        assert storage.get_contact_by_phone('+14155550111') is None
+        assert [c.name for c in storage.search('a')] == ['Alice Smith']
+
+    check(storage)
+    storage.close()
+    reopened = open_storage()
+    check(reopened)
+    assert reopened.add_contact('Alice Jones', '+14155550111').is_valid
+    assert reopened.add_contact('Carol White', '+14155550103').is_valid
@@ -0,0 +1,83 @@
+from models.group import Group
+from services.contact_storage import VERSION_CONFLICT
+
+
+def test_contact_compare_and_swap(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    assert storage.get_contact_by_phone('+14155550101').version == 1
+
+    assert storage.update_contact('+14155550101', 'Alice Jones', '+14155550101', expected_version=1).is_valid
+    stale = storage.update_contact('+14155550101', 'Alice Brown', '+14155550101', expected_version=1)
+    assert not stale.is_valid and stale.error_code == VERSION_CONFLICT
+    contact = storage.get_contact_by_phone('+14155550101')
+    assert (contact.name, contact.version) == ('Alice Jones', 2)
+
+    stale = storage.delete_contact(contact, expected_version=1)
+    assert stale.error_code == VERSION_CONFLICT
+    assert storage.delete_contact(contact, expected_version=2).is_valid
+
+
+def test_group_compare_and_swap(open_storage):
+    storage = open_storage()
+    storage.add_group('Family')
+    assert storage.get_group_by_name('Family').version == 1
+
+    assert storage.add_contact_to_group('Family', 'Alice Smith', '+14155550101', expected_version=1).is_valid
+    stale = storage.add_contact_to_group('Family', 'Bob Jones', '+14155550102', expected_version=1)
+    assert stale.error_code == VERSION_CONFLICT
+    assert storage.get_group_by_name('Family').version == 2
+
+    # Editing a contact changes the groups it is in
+    storage.update_contact('+14155550101', 'Alice Jones', '+14155550111')
+    group = storage.get_group_by_name('Family')
+    assert [c.phone for c in group.contacts] == ['+14155550111']
+
+    replacement = Group('Family', validate=False)
+    replacement.contacts = group.contacts
+    assert storage.update_group(replacement, expected_version=1).error_code == VERSION_CONFLICT
+    assert storage.remove_contact_from_group('Family', '+14155550111', expected_version=1).error_code == VERSION_CONFLICT
+    assert storage.delete_group('Family', expected_version=group.version).is_valid
+    assert storage.get_group_by_name('Family') is None
+
+
+def test_versions_survive_reopen(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.update_contact('+14155550101', 'Alice Jones', '+14155550101')
+    storage.add_group('Family')
+    storage.add_contact_to_group('Family', 'Alice Jones', '+14155550101')
+    storage.close()
+
+    reopened = open_storage()
+    assert reopened.get_contact_by_phone('+14155550101').version == 2
+    assert reopened.get_group_by_name('Family').version == 2
+    assert reopened.update_contact('+14155550101', 'Alice Smith', '+14155550101',
+                                   expected_version=1).error_code == VERSION_CONFLICT
+
+
+def test_versions_survive_compaction_and_reopen(open_storage):
+    storage = open_storage()
+    storage.add_contact('Alice Smith', '+14155550101')
+    storage.add_group('Family')
+    storage.add_contact_to_group('Family', 'Alice Smith', '+14155550101')
+    if hasattr(storage.backend, 'compact'):
+        storage.backend.compact()
+
+    # Renumbering a member changes the contact, not the group's membership
+    storage.update_contact('+14155550101', 'Alice Smith', '+14155550111', expected_version=1)
+    assert storage.get_group_by_name('Family').version == 2
+    storage.delete_group('Family')
+    storage.add_group('Family')
+    if hasattr(storage.backend, 'compact'):
+        storage.backend.compact()
+    storage.close()
+
+    reopened = open_storage()
+    assert reopened.get_contact_by_phone('+14155550111').version == 2
+    # A re-created group starts over
+    assert reopened.get_group_by_name('Family').version == 1
+    assert reopened.update_contact('+14155550111', 'Alice Jones', '+14155550111',
+                                   expected_version=1).error_code == VERSION_CONFLICT
+    assert reopened.update_contact('+14155550111', 'Alice Jones', '+14155550111', expected_version=2).is_valid
+    assert reopened.delete_group('Family', expected_version=2).error_code == VERSION_CONFLICT